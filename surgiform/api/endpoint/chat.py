@@ -1,3 +1,4 @@
+import asyncio
 from fastapi import APIRouter, HTTPException
 from typing import List
 from surgiform.api.models.chat import (
@@ -50,7 +51,8 @@ async def chat(payload: ChatRequest) -> ChatResponse:
                 print(f"  history[{i}]: role={msg.role}, content={msg.content[:50]}..., timestamp={msg.timestamp}")
         print(f"payload.consents: {type(payload.consents)}")
         print(f"payload.references: {type(payload.references)}")
-        return chat_with_ai(payload)
+        # chat_with_ai는 sync LLM 호출을 하므로 이벤트 루프 밖(스레드)에서 실행
+        return await asyncio.to_thread(chat_with_ai, payload)
     except Exception as e:
         print(f"채팅 처리 중 오류: {str(e)}")
         print(f"오류 타입: {type(e)}")
@@ -1,7 +1,16 @@
 from fastapi import APIRouter
+from fastapi import Header
+from fastapi import Query
+from fastapi.responses import StreamingResponse
 from surgiform.api.models.consent import ConsentGenerateIn
 from surgiform.api.models.consent import ConsentGenerateOut
+from surgiform.api.models.consent import ConsentBatchGenerateIn
+from surgiform.api.models.consent import ConsentRegenerateIn
+from surgiform.api.models.consent import GenerationMode
 from surgiform.deploy.service.consent import create_consent
+from surgiform.deploy.service.consent import stream_consent_events
+from surgiform.deploy.service.consent import regenerate_consent
+from surgiform.deploy.service.consent import stream_consent_batch
 
 router = APIRouter(tags=["consent"])
 
@@ -13,5 +22,55 @@ router = APIRouter(tags=["consent"])
 )
 async def consent_endpoint(
     payload: ConsentGenerateIn,
+    request_timeout: float | None = Header(None, alias="X-Request-Timeout", description="요청 deadline(초). 생략하면 서버 기본값, 0이면 제한 없음"),
+    mode: GenerationMode | None = Query(None, description="생성 모드 (sections: 섹션별 호출, structured: 구조화 출력 1회). 생략하면 서버 기본값"),
 ) -> ConsentGenerateOut:
-    return await create_consent(payload)
\ No newline at end of file
+    return await create_consent(payload, request_timeout, mode.value if mode else None)
+
+
+@router.post(
+    "/consent/regenerate",
+    response_model=ConsentGenerateOut,
+    summary="수술동의서 일부 섹션 재생성",
+    description="기존 동의서와 수정된 입력, 다시 생성할 섹션 키 목록을 받아 해당 섹션만 다시 생성하고 "
+                "나머지 섹션은 기존 내용을 그대로 병합해 반환합니다.",
+)
+async def consent_regenerate_endpoint(
+    payload: ConsentRegenerateIn,
+    request_timeout: float | None = Header(None, alias="X-Request-Timeout", description="요청 deadline(초). 생략하면 서버 기본값, 0이면 제한 없음"),
+) -> ConsentGenerateOut:
+    return await regenerate_consent(payload, request_timeout)
+
+
+@router.post(
+    "/consent/stream",
+    summary="수술동의서 생성 (SSE 스트리밍)",
+    description="섹션이 완료되는 순서대로 `section` 이벤트를 보내고, 진행 상황은 `progress`, "
+                "섹션 실패는 `error`, 마지막에 전체 결과(ConsentGenerateOut)를 `done` 이벤트로 보냅니다.",
+    response_class=StreamingResponse,
+)
+async def consent_stream_endpoint(
+    payload: ConsentGenerateIn,
+    request_timeout: float | None = Header(None, alias="X-Request-Timeout", description="요청 deadline(초). 생략하면 서버 기본값, 0이면 제한 없음"),
+    mode: GenerationMode | None = Query(None, description="생성 모드 (sections: 섹션별 호출, structured: 구조화 출력 1회). 생략하면 서버 기본값"),
+) -> StreamingResponse:
+    return StreamingResponse(
+        stream_consent_events(payload, request_timeout, mode.value if mode else None),
+        media_type="text/event-stream",
+        # 프록시(nginx 등)가 이벤트를 모아서 보내지 않도록
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post(
+    "/consent/batch",
+    summary="수술동의서 일괄 생성",
+    description="여러 환자의 동의서를 (수술명, 진단명) 그룹 단위로 검색·전처리를 공유해 생성하고, "
+                "끝나는 순서대로 NDJSON 한 줄씩 반환합니다.",
+    response_class=StreamingResponse,
+)
+async def consent_batch_endpoint(
+    payload: ConsentBatchGenerateIn,
+    mode: GenerationMode | None = Query(None, description="생성 모드 (sections: 섹션별 호출, structured: 구조화 출력 1회). 생략하면 서버 기본값"),
+) -> StreamingResponse:
+    return StreamingResponse(stream_consent_batch(payload, mode.value if mode else None), media_type="application/x-ndjson")
@@ -3,6 +3,18 @@ from datetime import timezone
 
 from fastapi import APIRouter
 from surgiform.deploy.settings import get_settings
+from surgiform.core.ingest.uptodate.run_es import get_es_pool_stats
+from surgiform.core.ingest.uptodate.run_es import get_retrieval_cache
+from surgiform.core.consent.evidence_pack import get_evidence_pack
+from surgiform.core.consent.result_cache import get_consent_cache
+from surgiform.core.consent.result_cache import get_consent_singleflight
+from surgiform.core.consent.result_cache import get_section_cache
+from surgiform.core.consent.pipeline import get_preprocess_cache
+from surgiform.core.ingest.uptodate.local_bm25 import get_local_index
+from surgiform.external.openai_client import get_llm_gateway
+from surgiform.external.openai_client import get_model_router
+from surgiform.external.openai_client import get_prompt_cache_stats
+from surgiform.core.hedge import get_llm_hedger
 
 router = APIRouter(tags=["health"])
 
@@ -16,11 +28,41 @@ async def health() -> dict:
     - `time`: UTC ISO8601 타임스탬프
     - `env`: 실행 환경(dev/prod 등)
     - `version`: 패키지 버전(pyproject.toml의 version)
+    - `es_pool`: Elasticsearch 커넥션 풀 상태 (사용 중/유휴 커넥션 수)
+    - `es_cache`: 검색 결과 캐시 통계 (hit/miss, generation 등)
+    - `consent_cache`: 동의서 전체 결과 캐시 통계
+    - `consent_singleflight`: 실행 중인 동의서 생성과 합쳐진 중복 요청 수
+    - `section_cache`: 섹션별 생성 결과 캐시 통계
+    - `preprocess_cache`: 번역·키워드 추출 결과 캐시 통계
+    - `evidence_pack`: 사용 중인 evidence pack 정보 (없거나 live 인덱스 generation과 달라 쓰지 않으면 null)
+    - `llm_gateway`: 모델별 LLM 예산·대기열 상태와 우선순위별 대기 시간
+    - `llm_router`: 모델별 최근 지연·오류율·429 비율과 모델 선택 사유별 횟수
+    - `prompt_cache`: 모델별 입력 토큰 중 provider prefix 캐시에서 읽은 비율과 캐시 적중 여부별 평균 지연
+    - `llm_hedge`: 섹션 생성 hedge 요청 수·hedge 승리 수와 모델별 hedge threshold
+    - `retrieval_backend`: 검색 백엔드·모드(bm25/hybrid)와 로컬 BM25 인덱스 정보
     """
     settings = get_settings()
+    evidence_pack = get_evidence_pack()
+    local_index = get_local_index()
     return {
         "status": "ok",
         "time": datetime.now(timezone.utc).isoformat(),
         "env": settings.app_env,
         "version": "0.1.0",  # 버전 문자열을 하드코딩하거나 importlib.metadata 사용 가능
+        "es_pool": get_es_pool_stats(),
+        "es_cache": get_retrieval_cache().stats(),
+        "consent_cache": get_consent_cache().stats(),
+        "consent_singleflight": get_consent_singleflight().stats(),
+        "section_cache": get_section_cache().stats(),
+        "preprocess_cache": get_preprocess_cache().stats(),
+        "evidence_pack": evidence_pack.stats() if evidence_pack else None,
+        "llm_gateway": get_llm_gateway().stats(),
+        "llm_router": get_model_router().stats(),
+        "prompt_cache": get_prompt_cache_stats().stats(),
+        "llm_hedge": get_llm_hedger().stats(),
+        "retrieval_backend": {
+            "backend": settings.retrieval_backend,
+            "mode": settings.retrieval_mode,
+            "local_index": local_index.stats() if local_index else None,
+        },
     }
\ No newline at end of file
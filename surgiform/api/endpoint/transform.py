@@ -1,3 +1,4 @@
+import asyncio
 from fastapi import APIRouter
 from surgiform.api.models.transform import ConsentTransformIn
 from surgiform.api.models.transform import ConsentTransformOut
@@ -14,4 +15,5 @@ router = APIRouter(tags=["transform"])
 async def transform_endpoint(
     payload: ConsentTransformIn,
 ) -> ConsentTransformOut:
-    return transform_consent(payload)
\ No newline at end of file
+    # transform_consent는 sync LLM 호출을 하므로 이벤트 루프 밖(스레드)에서 실행
+    return await asyncio.to_thread(transform_consent, payload)
\ No newline at end of file
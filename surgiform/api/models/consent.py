@@ -1,5 +1,6 @@
 from datetime import date
 from enum import Enum
+from typing import Literal
 
 from pydantic import BaseModel
 from pydantic import Field
@@ -7,6 +8,7 @@ from pydantic import constr
 
 from surgiform.api.models.base import ConsentBase
 from surgiform.api.models.base import ReferenceBase
+from surgiform.core.consent.sections import SECTION_NAMES
 
 # -------------------------------------------------
 # 1) 보조 Enum / 타입
@@ -16,6 +18,17 @@ class Gender(str, Enum):
     female = "F"
 
 
+class GenerationMode(str, Enum):
+    sections = "sections"  # 섹션별 LLM 호출
+    structured = "structured"  # 모든 섹션을 구조화 출력 1회로 생성 (대량 생성용)
+
+
+class ConsentProfileName(str, Enum):
+    fast = "fast"  # 빠른 모델·입력값 키워드만 검색 (외래 진료실 대화형)
+    balanced = "balanced"  # 기본 설정
+    thorough = "thorough"  # 상위 모델·넓은 evidence (야간 일괄 생성)
+
+
 BoolOrStr = bool | constr(strip_whitespace=True, min_length=1)
 
 
@@ -101,7 +114,28 @@ class ConsentGenerateIn(PrivateConsentGenerateIn, PublicConsentGenerateIn):
     """
     수술동의서 생성 요청
     """
-    pass
+    profile: ConsentProfileName | None = Field(None, description="생성 프로필 (fast / balanced / thorough). 생략하면 서버 기본값")
+
+
+class ConsentBatchGenerateIn(BaseModel):
+    """
+    수술동의서 일괄 생성 요청
+    """
+    records: list[ConsentGenerateIn] = Field(..., min_items=1, description="환자별 동의서 생성 요청 목록")
+
+
+# 다시 생성할 수 있는 섹션 키 (섹션 레지스트리에서 생성)
+ConsentSectionName = Literal[SECTION_NAMES]
+
+
+class ConsentRegenerateIn(BaseModel):
+    """
+    수술동의서 일부 섹션 재생성 요청
+    """
+    payload: ConsentGenerateIn = Field(..., description="수정된 동의서 생성 요청")
+    consents: ConsentBase = Field(..., description="기존 수술동의서")
+    references: ReferenceBase = Field(default_factory=ReferenceBase, description="기존 참고 문헌")
+    sections: list[ConsentSectionName] = Field(..., min_items=1, description="다시 생성할 섹션 키 목록")
 
 
 class ConsentGenerateOut(BaseModel):
@@ -110,3 +144,8 @@ class ConsentGenerateOut(BaseModel):
     """
     consents: ConsentBase = Field(..., description="수술동의서")
     references: ReferenceBase = Field(..., description="참고 문헌")
+    degraded_sections: dict[str, str] = Field(
+        default_factory=dict,
+        description="시간 제한 때문에 품질을 낮춰 생성한 섹션 → 사유 (fast_model: 빠른 모델로 생성, placeholder: 안내 문구로 대체, failed: 재생성 실패로 기존 내용 유지)",
+    )
+    profile: str | None = Field(None, description="결과를 생성한 생성 프로필")
@@ -0,0 +1,237 @@
+"""
+프로세스 내 비동기 TTL/LRU 캐시
+
+- 크기(maxsize)·유효시간(ttl) 제한
+- hit/miss 통계
+- 같은 키에 대한 동시 계산은 하나로 합침 (in-flight dedup)
+- generation 값이 바뀌면 전체 무효화 (인덱스 재생성 등)
+"""
+
+import time
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable
+
+# 로깅 설정
+logger = logging.getLogger(__name__)
+
+
+class AsyncTTLCache:
+    """asyncio 단일 이벤트 루프에서 공유하는 TTL/LRU 캐시"""
+
+    def __init__(self, name: str, maxsize: int = 1024, ttl: float = 3600.0):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.generation: Any = None
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._inflight: dict[Hashable, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.maxsize > 0 and self.ttl > 0
+
+    def get(self, key: Hashable) -> tuple[bool, Any]:
+        """(찾음 여부, 값) 반환. 만료된 항목은 삭제"""
+        entry = self._data.get(key)
+        if entry is None:
+            return False, None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._data[key]
+            return False, None
+        self._data.move_to_end(key)
+        return True, value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        if not self.enabled:
+            return
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self._data.clear()
+        self.invalidations += 1
+
+    def set_generation(self, generation: Any) -> None:
+        """generation이 바뀌면 저장된 항목을 모두 버림"""
+        if generation == self.generation:
+            return
+        if self.generation is not None:
+            logger.info(f"캐시 '{self.name}' 무효화: generation {self.generation} → {generation}")
+            self.clear()
+        self.generation = generation
+
+    async def get_or_compute(
+        self,
+        key: Hashable,
+        compute: Callable[[], Awaitable[Any]],
+        cacheable: Callable[[Any], bool] = lambda value: True,
+    ) -> Any:
+        """캐시 조회 후 없으면 계산 (같은 키의 동시 계산은 1회로 합침)"""
+        results = await self.get_many_or_compute(
+            [key],
+            lambda keys: _single(compute),
+            cacheable=cacheable,
+        )
+        return results[0]
+
+    async def get_many_or_compute(
+        self,
+        keys: list[Hashable],
+        compute_many: Callable[[list[Hashable]], Awaitable[list[Any]]],
+        cacheable: Callable[[Any], bool] = lambda value: True,
+    ) -> list[Any]:
+        """
+        여러 키를 한 번에 조회하고, 캐시에 없고 계산 중도 아닌 키만 모아서
+        compute_many 한 번으로 계산 (입력 순서대로 결과 반환)
+        """
+        results: list[Any] = [None] * len(keys)
+        waiting: list[tuple[int, asyncio.Future]] = []
+        missing: dict[Hashable, list[int]] = {}
+
+        for i, key in enumerate(keys):
+            found, value = self.get(key)
+            if found:
+                self.hits += 1
+                results[i] = value
+            elif key in self._inflight:
+                self.coalesced += 1
+                waiting.append((i, self._inflight[key]))
+            elif key in missing:
+                self.coalesced += 1
+                missing[key].append(i)
+            else:
+                self.misses += 1
+                missing[key] = [i]
+
+        if missing:
+            loop = asyncio.get_running_loop()
+            futures = {}
+            for key in missing:
+                future = loop.create_future()
+                # 기다리는 쪽이 없어도 "exception was never retrieved" 경고가 나지 않도록
+                future.add_done_callback(_consume_exception)
+                futures[key] = future
+                self._inflight[key] = future
+
+            try:
+                values = await compute_many(list(missing))
+            except asyncio.CancelledError:
+                for future in futures.values():
+                    future.cancel()
+                raise
+            except BaseException as e:
+                for future in futures.values():
+                    if not future.done():
+                        future.set_exception(e)
+                raise
+            finally:
+                for key in missing:
+                    self._inflight.pop(key, None)
+
+            for key, value in zip(missing, values):
+                if cacheable(value):
+                    self.set(key, value)
+                futures[key].set_result(value)
+                for i in missing[key]:
+                    results[i] = value
+
+        for i, future in waiting:
+            try:
+                results[i] = await asyncio.shield(future)
+            except asyncio.CancelledError:
+                # 계산을 맡은 요청이 취소된 경우에는 직접 다시 계산
+                if not future.cancelled():
+                    raise
+                results[i] = (await self.get_many_or_compute([keys[i]], compute_many, cacheable))[0]
+
+        return results
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "generation": self.generation,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "inflight": len(self._inflight),
+        }
+
+
+async def _single(compute: Callable[[], Awaitable[Any]]) -> list[Any]:
+    return [await compute()]
+
+
+def _consume_exception(future: asyncio.Future) -> None:
+    if not future.cancelled():
+        future.exception()
+
+
+class SingleFlight:
+    """
+    같은 키의 동시 요청을 하나의 계산으로 합침 (캐시 없이 실행 중인 동안만 공유)
+
+    계산은 어느 한 요청에 묶이지 않은 별도 task로 실행되므로, 먼저 온 요청이
+    연결을 끊어도 남은 요청은 계속 같은 결과를 기다린다. 기다리는 요청이
+    모두 취소된 경우에만 계산도 취소한다.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: dict[Hashable, list] = {}  # key → [task, 대기 중인 요청 수]
+        self.calls = 0
+        self.coalesced = 0
+        self.cancelled = 0
+
+    async def run(self, key: Hashable, compute: Callable[[], Awaitable[Any]]) -> Any:
+        entry = self._calls.get(key)
+        if entry is None:
+            self.calls += 1
+            task = asyncio.ensure_future(compute())
+            entry = [task, 0]
+            self._calls[key] = entry
+            task.add_done_callback(lambda _: self._forget(key, entry))
+            task.add_done_callback(_consume_exception)
+        else:
+            self.coalesced += 1
+
+        task = entry[0]
+        entry[1] += 1
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if entry[1] == 1 and not task.done():
+                # 마지막 대기자가 떠나면 더 기다릴 사람이 없으므로 계산도 중단
+                self.cancelled += 1
+                task.cancel()
+            raise
+        finally:
+            entry[1] -= 1
+
+    def _forget(self, key: Hashable, entry: list) -> None:
+        if self._calls.get(key) is entry:
+            del self._calls[key]
+
+    def stats(self) -> dict:
+        return {
+            "inflight": len(self._calls),
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "cancelled": self.cancelled,
+        }
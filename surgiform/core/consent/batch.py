@@ -0,0 +1,177 @@
+"""
+동의서 일괄 생성 (다음 날 수술 일정 전체 등)
+
+환자를 (수술명, 진단명) 그룹으로 묶어 같은 그룹을 연달아 실행한다. 번역·키워드 추출
+(preprocess 캐시), ES 검색(검색 캐시), 수술 정보만 쓰는 섹션(섹션 캐시)은 캐시와
+in-flight 합치기로 그룹당 한 번만 계산되고, 전체 동시 생성 수는 concurrency로 제한한다.
+결과는 끝나는 대로 JSONL 한 줄씩 기록하며, 같은 출력 파일로 다시 실행하면 이미 성공한
+레코드는 건너뛴다.
+
+    python -m surgiform.core.consent.batch --input data/schedule.jsonl --output data/consents.jsonl
+"""
+
+import os
+import csv
+import sys
+import json
+import hashlib
+import asyncio
+import logging
+import argparse
+from collections import Counter
+from typing import AsyncIterator
+
+from tqdm import tqdm
+
+from surgiform.api.models.consent import ConsentGenerateIn
+from surgiform.api.models.consent import ConsentGenerateOut
+from surgiform.core.consent.pipeline import generate_consent_with_status
+from surgiform.core.consent.profiles import get_profile
+from surgiform.core.consent.evidence_pack import load_evidence_pack
+from surgiform.core.consent.evidence_pack import close_evidence_pack
+from surgiform.core.ingest.uptodate.run_es import close_es_client
+from surgiform.core.ingest.uptodate.run_es import refresh_index_generation
+from surgiform.core.ingest.uptodate.local_bm25 import load_local_index
+from surgiform.core.ingest.uptodate.local_bm25 import close_local_index
+from surgiform.deploy.settings import get_settings
+
+# 로깅 설정
+logger = logging.getLogger(__name__)
+
+# CSV에서 JSON 문자열로 받는 중첩 필드
+CSV_JSON_FIELDS = ("participants", "special_conditions", "possum_score")
+
+
+def record_key(record: ConsentGenerateIn) -> str:
+    """레코드 식별 키 (재실행 시 완료 여부 확인용, 환자 식별 정보 포함)"""
+    canonical = json.dumps(record.model_dump(mode="json"), ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def group_key(record: ConsentGenerateIn) -> tuple[str, str]:
+    return record.surgery_name, record.diagnosis
+
+
+def load_batch_records(path: str) -> list[ConsentGenerateIn]:
+    """JSONL 또는 CSV(중첩 필드는 JSON 문자열) 파일에서 ConsentGenerateIn 목록 로드"""
+    records = []
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        if path.lower().endswith(".csv"):
+            for row in csv.DictReader(f):
+                data = {key: value for key, value in row.items() if value not in (None, "")}
+                for field in CSV_JSON_FIELDS:
+                    if field in data:
+                        data[field] = json.loads(data[field])
+                records.append(ConsentGenerateIn(**data))
+        else:
+            for line in f:
+                if line.strip():
+                    records.append(ConsentGenerateIn(**json.loads(line)))
+    return records
+
+
+def load_completed_keys(path: str) -> set[str]:
+    """이전 실행에서 성공한 레코드 키 (출력 파일이 없으면 빈 집합)"""
+    if not os.path.exists(path):
+        return set()
+    completed = set()
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError:
+                # 중단 시점에 잘린 마지막 줄은 무시
+                continue
+            if row.get("status") == "ok":
+                completed.add(row["key"])
+    return completed
+
+
+async def iter_batch(records: list[ConsentGenerateIn], concurrency: int | None = None, skip_keys: set[str] | None = None,
+                     mode: str | None = None) -> AsyncIterator[dict]:
+    """
+    동의서 일괄 생성 (끝나는 순서대로 결과 행 반환)
+
+    mode가 structured면 레코드마다 구조화 출력 1회로 전체 섹션을 생성한다 (입력 토큰 절감).
+    일괄 생성은 응답 시간보다 완성도가 중요하므로 요청 deadline(CONSENT_DEADLINE)을 적용하지 않는다.
+    deadline 때문에 빠른 모델·placeholder로 degrade된 결과가 "ok"로 기록되면 재실행 시에도
+    다시 생성되지 않기 때문이다.
+
+    Yields:
+        dict: {"key", "registration_no", "status": "ok" | "error", "result" | "error"}
+    """
+    concurrency = concurrency or get_settings().consent_batch_concurrency
+    skip_keys = skip_keys or set()
+    pending = [record for record in records if record_key(record) not in skip_keys]
+    # 같은 그룹을 연달아 실행해야 그룹 내 요청이 캐시·in-flight 계산을 공유함
+    pending.sort(key=group_key)
+    groups = Counter(group_key(record) for record in pending)
+    logger.info(f"동의서 일괄 생성: {len(pending)}건 ({len(records) - len(pending)}건은 이미 완료), 그룹 {len(groups)}개")
+
+    sem = asyncio.Semaphore(concurrency)
+
+    async def _generate(record: ConsentGenerateIn) -> dict:
+        row = {"key": record_key(record), "registration_no": record.registration_no}
+        async with sem:
+            try:
+                consents, references, degraded_sections = await generate_consent_with_status(record, timeout=0, mode=mode)
+            except Exception as e:
+                logger.error(f"동의서 일괄 생성 실패 ({record.registration_no}): {type(e).__name__}: {e}")
+                return {**row, "status": "error", "error": f"{type(e).__name__}: {e}"}
+        out = ConsentGenerateOut(consents=consents, references=references, degraded_sections=degraded_sections,
+                                 profile=get_profile(record.profile).name)
+        return {**row, "status": "ok", "result": out.model_dump(mode="json")}
+
+    tasks = [asyncio.ensure_future(_generate(record)) for record in pending]
+    try:
+        for future in asyncio.as_completed(tasks):
+            yield await future
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def run_batch(input_path: str, output_path: str, concurrency: int | None = None, mode: str | None = None) -> dict:
+    """입력 파일 전체를 생성해 출력 JSONL에 이어서 기록 (이미 성공한 레코드는 건너뜀)"""
+    records = load_batch_records(input_path)
+    completed = load_completed_keys(output_path)
+    already_done = sum(record_key(record) in completed for record in records)
+    summary = Counter()
+
+    # 서버 lifespan과 같이 evidence pack·로컬 인덱스를 열고 끝나면 정리
+    await refresh_index_generation()
+    load_evidence_pack()
+    load_local_index()
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    try:
+        with open(output_path, "a", encoding="utf-8") as f, \
+                tqdm(total=len(records), initial=already_done, desc="📝 consents", unit="patients") as pbar:
+            async for row in iter_batch(records, concurrency, skip_keys=completed, mode=mode):
+                f.write(json.dumps(row, ensure_ascii=False) + "\n")
+                # 중단되어도 완료된 결과는 남도록 한 줄씩 기록
+                f.flush()
+                summary[row["status"]] += 1
+                pbar.update(1)
+    finally:
+        await close_es_client()
+        close_local_index()
+        close_evidence_pack()
+
+    return {"total": len(records), "skipped": already_done, **summary}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="동의서 일괄 생성")
+    parser.add_argument("--input", required=True, help="ConsentGenerateIn 레코드 (JSONL 또는 CSV)")
+    parser.add_argument("--output", required=True, help="결과 JSONL (재실행 시 이어서 기록)")
+    parser.add_argument("--concurrency", type=int, help="동시에 생성하는 동의서 수 (기본값: CONSENT_BATCH_CONCURRENCY)")
+    parser.add_argument("--mode", choices=["sections", "structured"], help="생성 모드 (기본값: CONSENT_GENERATION_MODE)")
+
+    args = parser.parse_args()
+
+    try:
+        summary = asyncio.run(run_batch(args.input, args.output, args.concurrency, args.mode))
+        print(f"✅ {args.output}: {summary}")
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
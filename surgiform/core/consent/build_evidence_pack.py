@@ -0,0 +1,135 @@
+"""
+evidence pack 오프라인 생성 작업
+
+수술 목록(JSONL: {"surgery_name": ..., "diagnosis": ..., "surgical_site_marks": [...]})을 받아,
+요청 처리와 같은 검색 쿼리 구성(build_query)·섹션 재정렬(rank_for_section)로 수술 기본 키워드
+(PROCEDURE_KEYWORD), 수술 부위 키워드(surgical_site_marks, 선택), 고정 어휘 키워드(COMMON_KEYWORDS)의
+evidence를 미리 계산해 pack 파일로 저장한다. 나이·자유 기술 항목 키워드는 환자마다 달라 요청 시 검색한다.
+
+    python -m surgiform.core.consent.build_evidence_pack \
+        --procedures data/procedures.jsonl --output data/evidence.pack
+"""
+
+import sys
+import json
+import asyncio
+import argparse
+
+from tqdm import tqdm
+
+from surgiform.core.consent.sections import SECTION_NAMES
+from surgiform.core.consent.retrieval import COMMON_KEYWORDS
+from surgiform.core.consent.retrieval import PROCEDURE_KEYWORD
+from surgiform.core.consent.retrieval import SHARED_SECTION
+from surgiform.core.consent.retrieval import PLAN_CANDIDATES_K
+from surgiform.core.consent.retrieval import build_query
+from surgiform.core.consent.retrieval import rank_for_section
+from surgiform.core.consent.evidence import evidence_key
+from surgiform.core.consent.evidence_pack import write_evidence_pack
+from surgiform.core.ingest.uptodate.run_es import get_es_responses
+from surgiform.core.ingest.uptodate.run_es import get_retrieval_cache
+from surgiform.core.ingest.uptodate.run_es import close_es_client
+from surgiform.external.openai_client import translate_text
+
+
+def dedupe_hits(hits: list[dict]) -> list[dict]:
+    """순위를 유지한 채 같은 문장 제거"""
+    seen = set()
+    unique = []
+    for hit in hits:
+        key = evidence_key(hit)
+        if key not in seen:
+            seen.add(key)
+            unique.append(hit)
+    return unique
+
+
+def procedure_keywords(surgical_site_marks: list[str] = ()) -> list[str]:
+    """수술 1건에 대해 미리 계산할 키워드 (순서 유지, 중복 제거)"""
+    return list(dict.fromkeys([PROCEDURE_KEYWORD, *surgical_site_marks, *COMMON_KEYWORDS]))
+
+
+async def build_procedure_entries(surgery_name: str, diagnosis: str, surgical_site_marks: list[str] = (),
+                                  section_k: int = 10) -> dict:
+    """수술 1건의 (surgery, diagnosis, section, keyword)별 evidence"""
+    loop = asyncio.get_running_loop()
+    diagnosis_en, surgery_name_en = await asyncio.gather(
+        loop.run_in_executor(None, translate_text, diagnosis),
+        loop.run_in_executor(None, translate_text, surgery_name),
+    )
+
+    keywords = procedure_keywords(surgical_site_marks)
+    queries = [build_query(diagnosis_en, surgery_name_en, keyword) for keyword in keywords]
+    results = await get_es_responses(queries, k=PLAN_CANDIDATES_K, score_threshold=1)
+
+    entries = {}
+    for keyword, hits in zip(keywords, results):
+        for section in SECTION_NAMES:
+            ranked = dedupe_hits(rank_for_section(hits, section, k=len(hits)))
+            entries[(surgery_name, diagnosis, section, keyword)] = ranked[:section_k]
+    # 모든 섹션 공통 evidence(RetrievalPlan.shared_hits)는 섹션 재정렬 없는 검색 순위 그대로
+    procedure_hits = results[keywords.index(PROCEDURE_KEYWORD)]
+    entries[(surgery_name, diagnosis, SHARED_SECTION, PROCEDURE_KEYWORD)] = dedupe_hits(procedure_hits)[:section_k]
+    return entries
+
+
+async def build_evidence_pack(procedures: list[dict], output: str, concurrency: int = 4) -> dict:
+    """수술 목록 전체에 대해 evidence pack 생성"""
+    sem = asyncio.Semaphore(concurrency)
+    entries = {}
+
+    async def _build(procedure):
+        async with sem:
+            return await build_procedure_entries(procedure["surgery_name"], procedure["diagnosis"],
+                                                 procedure["surgical_site_marks"])
+
+    try:
+        tasks = [asyncio.ensure_future(_build(procedure)) for procedure in procedures]
+        with tqdm(total=len(tasks), desc="📦 evidence pack", unit="procedures") as pbar:
+            for future in asyncio.as_completed(tasks):
+                entries.update(await future)
+                pbar.update(1)
+    finally:
+        await close_es_client()
+
+    return write_evidence_pack(output, entries, index_generation=get_retrieval_cache().generation)
+
+
+def load_procedures(path: str) -> list[dict]:
+    """JSONL 수술 목록 로드 (surgery_name, diagnosis 기준 중복 제거, 수술 부위는 합침)"""
+    procedures = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            procedure = procedures.setdefault((record["surgery_name"], record["diagnosis"]), {
+                "surgery_name": record["surgery_name"],
+                "diagnosis": record["diagnosis"],
+                "surgical_site_marks": [],
+            })
+            # 배치 입력처럼 surgical_site_mark 하나만 있어도 사용
+            site_marks = record.get("surgical_site_marks") or [record.get("surgical_site_mark")]
+            for site_mark in site_marks:
+                if site_mark and site_mark not in procedure["surgical_site_marks"]:
+                    procedure["surgical_site_marks"].append(site_mark)
+    return list(procedures.values())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="수술별 evidence pack 생성")
+    parser.add_argument("--procedures", required=True,
+                        help="JSONL: {\"surgery_name\": ..., \"diagnosis\": ..., \"surgical_site_marks\": [...]}")
+    parser.add_argument("--output", default="data/evidence.pack")
+    parser.add_argument("--concurrency", type=int, default=4)
+
+    args = parser.parse_args()
+
+    try:
+        procedures = load_procedures(args.procedures)
+        print(f"📂 {len(procedures)} procedures")
+        summary = asyncio.run(build_evidence_pack(procedures, args.output, concurrency=args.concurrency))
+        print(f"✅ {args.output}: {summary}")
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
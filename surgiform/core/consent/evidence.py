@@ -0,0 +1,250 @@
+"""
+섹션별 evidence 후처리
+
+- 문장 단위 중복 제거 (sentence id, 없으면 정규화된 텍스트 해시)
+- 키워드별 검색 결과 순위를 reciprocal-rank fusion(RRF)으로 통합
+- (선택) TF-IDF 기반 MMR로 유사 문장을 걸러 다양한 evidence 선택
+- 섹션·모델별 토큰 예산에 맞춘 evidence 패킹
+"""
+
+import re
+import math
+import hashlib
+import logging
+from collections import Counter
+from functools import lru_cache
+
+import numpy as np
+import tiktoken
+
+from surgiform.deploy.settings import get_settings
+from surgiform.core.text import tokenize
+
+# 로깅 설정
+logger = logging.getLogger(__name__)
+
+# RRF 상수 (Cormack et al. 2009 기본값)
+RRF_K = 60
+
+# MMR용 TF-IDF 어휘 상한 (밀집 행렬 크기 n_texts x vocab 제한)
+TFIDF_MAX_VOCABULARY = 4096
+
+_WHITESPACE_PATTERN = re.compile(r"\s+")
+
+
+def evidence_key(hit: dict) -> str:
+    """중복 판정 키: sentence id 우선, 없으면 텍스트 해시"""
+    if hit.get("id"):
+        return f"id:{hit['id']}"
+    normalized = _WHITESPACE_PATTERN.sub(" ", hit["text"]).strip().lower()
+    return f"text:{hashlib.sha1(normalized.encode('utf-8')).hexdigest()}"
+
+
+def fuse_evidence(result_lists: list[list[dict]], top_n: int | None = None, rrf_k: int = RRF_K) -> list[dict]:
+    """
+    키워드별 hit 리스트를 RRF로 통합하고 같은 문장은 하나로 합침
+
+    Args:
+        result_lists: 키워드(쿼리)별 점수순 hit 리스트
+        top_n: 반환할 최대 evidence 수 (None이면 전부)
+        rrf_k: RRF 상수
+
+    Returns:
+        list[dict]: 통합 점수(`rrf_score`) 내림차순의 중복 없는 hit 리스트
+    """
+    fused: dict[str, dict] = {}
+    for hits in result_lists:
+        seen_in_list = set()
+        for rank, hit in enumerate(hits, start=1):
+            key = evidence_key(hit)
+            # 같은 리스트 안의 중복은 가장 높은 순위만 반영
+            if key in seen_in_list:
+                continue
+            seen_in_list.add(key)
+
+            contribution = 1.0 / (rrf_k + rank)
+            if key in fused:
+                fused[key]["rrf_score"] += contribution
+            else:
+                fused[key] = {**hit, "rrf_score": contribution}
+
+    ranked = sorted(fused.values(), key=lambda hit: hit["rrf_score"], reverse=True)
+    return ranked[:top_n] if top_n is not None else ranked
+
+
+def tfidf_matrix(texts: list[str], max_vocabulary: int = TFIDF_MAX_VOCABULARY) -> np.ndarray:
+    """
+    후보 문장들의 L2 정규화된 TF-IDF 행렬 (n_texts x vocab)
+
+    후보는 섹션당 수십~수백 문장이라 scipy.sparse 없이 밀집 NumPy 행렬로 계산한다.
+    어휘는 문서 빈도가 높은 순으로 max_vocabulary개까지만 써 행렬 크기를 제한한다.
+    """
+    token_lists = [tokenize(text) for text in texts]
+    document_counts = Counter(token for tokens in token_lists for token in set(tokens))
+    # 문서 빈도 내림차순 (같으면 처음 나온 순서)
+    vocabulary = {token: i for i, (token, _) in enumerate(document_counts.most_common(max_vocabulary))}
+
+    counts = np.zeros((len(texts), max(len(vocabulary), 1)), dtype=np.float32)
+    for row, tokens in enumerate(token_lists):
+        columns = [vocabulary[token] for token in tokens if token in vocabulary]
+        if columns:
+            np.add.at(counts[row], columns, 1.0)
+
+    # sublinear tf * smooth idf
+    document_frequency = np.count_nonzero(counts, axis=0)
+    idf = np.log((1 + len(texts)) / (1 + document_frequency)) + 1
+    weights = np.log1p(counts) * idf
+    norms = np.linalg.norm(weights, axis=1, keepdims=True)
+    return weights / np.where(norms == 0, 1, norms)
+
+
+def select_mmr(hits: list[dict], top_n: int, diversity: float = 0.3) -> list[dict]:
+    """
+    Maximal Marginal Relevance로 서로 겹치지 않는 evidence 선택
+
+    relevance는 검색 단계의 통합 점수(`rrf_score`, 없으면 `score`)를 최댓값으로 정규화한 값,
+    redundancy는 이미 고른 문장들과의 TF-IDF 코사인 유사도 최댓값을 쓴다.
+
+    Args:
+        hits: 순위순 evidence hit 리스트
+        top_n: 고를 evidence 수
+        diversity: 0이면 순위 그대로, 1에 가까울수록 다양성 우선
+
+    Returns:
+        list[dict]: 선택 순서대로의 hit 리스트
+    """
+    if len(hits) <= top_n:
+        return list(hits)
+
+    relevance = np.array([hit.get("rrf_score", hit["score"]) for hit in hits], dtype=np.float32)
+    relevance = relevance / relevance.max() if relevance.max() > 0 else relevance
+
+    vectors = tfidf_matrix([hit["text"] for hit in hits])
+    similarity = vectors @ vectors.T
+
+    selected = []
+    max_similarity = np.zeros(len(hits), dtype=np.float32)
+    available = np.ones(len(hits), dtype=bool)
+    for _ in range(top_n):
+        scores = (1 - diversity) * relevance - diversity * max_similarity
+        scores[~available] = -math.inf
+        index = int(np.argmax(scores))
+        selected.append(index)
+        available[index] = False
+        np.maximum(max_similarity, similarity[index], out=max_similarity)
+
+    return [hits[index] for index in selected]
+
+
+# 섹션별 토큰 예산 배율 (기본 예산 CONSENT_EVIDENCE_TOKEN_BUDGET 기준)
+# 환자 특이사항·합병증처럼 근거가 많이 필요한 섹션은 넉넉하게, 절차적 섹션은 적게
+SECTION_TOKEN_BUDGET_RATIO = {
+    "possible_complications_sequelae": 1.5,
+    "mortality_risk": 1.2,
+    "alternative_treatments": 1.2,
+    "estimated_duration": 0.5,
+    "surgeon_change_possibility": 0.5,
+    "method_change_or_addition": 0.75,
+}
+
+# 모델별 evidence 토큰 상한 (컨텍스트 창이 작은 모델 보호)
+MODEL_TOKEN_BUDGET_LIMIT = {
+    "gpt-3.5-turbo": 6000,
+}
+
+# evidence 사이 구분자("\n\n") 몫
+SEPARATOR_TOKENS = 1
+
+
+@lru_cache
+def _get_encoding(model_name: str):
+    """
+    모델 토크나이저 (불러올 수 없으면 None)
+
+    실패도 캐시해 토크나이저가 없는 환경(오프라인 등)에서 프로세스당 한 번만 시도한다.
+    """
+    try:
+        try:
+            return tiktoken.encoding_for_model(model_name)
+        except KeyError:
+            # tiktoken이 아직 모르는 최신 모델(gpt-4.1, gpt-5 계열)은 o200k_base 사용
+            return tiktoken.get_encoding("o200k_base")
+    except Exception as e:
+        logger.warning(f"토크나이저 로드 실패, 글자 수 근사치 사용 ({model_name}): {type(e).__name__}: {e}")
+        return None
+
+
+def count_tokens(text: str, model_name: str) -> int:
+    """모델 토크나이저 기준 토큰 수 (인코딩을 불러올 수 없으면 글자 수로 근사)"""
+    encoding = _get_encoding(model_name)
+    if encoding is None:
+        return len(text) // 3 + 1
+    return len(encoding.encode(text))
+
+
+def evidence_token_budget(task_name: str, model_name: str, base_budget: int | None = None) -> int:
+    """섹션·모델별 evidence 토큰 예산 (base_budget이 없으면 CONSENT_EVIDENCE_TOKEN_BUDGET 설정)"""
+    base_budget = base_budget if base_budget is not None else get_settings().consent_evidence_token_budget
+    budget = int(base_budget * SECTION_TOKEN_BUDGET_RATIO.get(task_name, 1.0))
+    return min(budget, MODEL_TOKEN_BUDGET_LIMIT.get(model_name, budget))
+
+
+class PackedEvidence:
+    """토큰 예산 안에 담긴 evidence와 잘려 나간 evidence"""
+    def __init__(self, hits: list[dict], dropped: list[dict], tokens: int, budget: int):
+        self.hits = hits
+        self.dropped = dropped
+        self.tokens = tokens
+        self.budget = budget
+
+
+def pack_evidence(hits: list[dict], budget: int, model_name: str) -> PackedEvidence:
+    """
+    순위 순서대로 evidence를 담다가 예산을 넘는 지점에서 중단
+
+    Args:
+        hits: 순위순 evidence hit 리스트
+        budget: evidence 토큰 예산
+        model_name: 토큰 계산에 쓸 모델명
+
+    Returns:
+        PackedEvidence: 담긴 hit, 제외된 hit, 사용 토큰 수
+    """
+    packed = []
+    used = 0
+    for i, hit in enumerate(hits):
+        tokens = count_tokens(hit["text"], model_name) + SEPARATOR_TOKENS
+        if used + tokens > budget:
+            return PackedEvidence(packed, hits[i:], used, budget)
+        packed.append(hit)
+        used += tokens
+    return PackedEvidence(packed, [], used, budget)
+
+
+def select_evidence(result_lists: list[list[dict]], task_name: str, model_name: str, exclude_texts: set[str] | None = None,
+                    token_budget: int | None = None) -> PackedEvidence:
+    """
+    섹션 1개의 evidence 선택 (RRF 통합 → (선택) MMR → 공통 evidence 제외 → 토큰 예산 패킹)
+
+    Args:
+        result_lists: 키워드별 검색 결과 (섹션 순위로 재정렬된 상태)
+        exclude_texts: 이미 프롬프트의 다른 곳(공통 evidence)에 들어간 문장
+        token_budget: 섹션 비율 적용 전 evidence 토큰 예산 (생성 프로필, 없으면 설정값)
+    """
+    settings = get_settings()
+    # 결과 통합: 문장 중복 제거 + RRF 순위 통합 후 상위 evidence만 사용
+    fused_hits = fuse_evidence(result_lists, top_n=settings.consent_evidence_top_n)
+
+    # (선택) 거의 같은 내용의 문장을 걸러 다양한 evidence만 남기기
+    if settings.consent_evidence_mmr:
+        fused_hits = select_mmr(fused_hits, settings.consent_evidence_mmr_top_n, settings.consent_evidence_mmr_diversity)
+
+    if exclude_texts:
+        fused_hits = [hit for hit in fused_hits if hit["text"] not in exclude_texts]
+
+    # 섹션·모델별 토큰 예산 안에서 순위순으로 담기
+    packed = pack_evidence(fused_hits, evidence_token_budget(task_name, model_name, token_budget), model_name)
+    if packed.dropped:
+        logger.debug(f"작업 '{task_name}': evidence {len(packed.hits)}개 사용 ({packed.tokens}/{packed.budget} 토큰), "
+                     f"예산 초과로 {len(packed.dropped)}개 제외")
+    return packed
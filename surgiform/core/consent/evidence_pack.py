@@ -0,0 +1,217 @@
+"""
+수술별 사전 계산 evidence pack (memory-mapped)
+
+트래픽 대부분을 차지하는 수술에 대해 (surgery, diagnosis, section, keyword)별
+순위·중복 제거가 끝난 evidence를 오프라인으로 만들어 두고, 워커는 시작 시
+파일을 mmap으로 열어 ES 없이 바로 사용한다. 생성은 build_evidence_pack 참고.
+
+pack을 만든 시점의 인덱스 generation이 live 인덱스와 다르면 (재색인 후) 로드하지 않고,
+실행 중 generation이 바뀌면 그때부터 쓰지 않는다.
+
+파일 내용 (core/mmap_file 포맷)
+    header: 조회 키 → [시작, 길이] 색인
+    arrays: entry_sentence_ids(u32[m]), entry_scores(f32[m])
+    blobs: 중복 제거된 문장 레코드(JSON)
+"""
+
+import os
+import re
+import json
+import logging
+from datetime import datetime
+
+import numpy as np
+
+from surgiform.deploy.settings import get_settings
+from surgiform.core.mmap_file import MmapFile
+from surgiform.core.mmap_file import write_mmap_file
+from surgiform.core.ingest.uptodate.run_es import get_retrieval_cache
+
+# 로깅 설정
+logger = logging.getLogger(__name__)
+
+MAGIC = b"SFEVPK01"
+FORMAT_VERSION = 1
+KEY_SEPARATOR = "\x1f"
+
+# 문장 레코드에 저장하는 필드 (score는 항목별로 따로 저장)
+SENTENCE_FIELDS = ("id", "url", "text", "title", "section", "entities")
+
+_WHITESPACE_PATTERN = re.compile(r"\s+")
+
+
+def _normalize(value: str) -> str:
+    return _WHITESPACE_PATTERN.sub(" ", value).strip().lower()
+
+
+def pack_key(*parts: str) -> str:
+    """정규화된 조회 키 (대소문자·공백 차이 무시)"""
+    return KEY_SEPARATOR.join(_normalize(part) for part in parts)
+
+
+def write_evidence_pack(path: str, entries: dict[tuple[str, str, str, str], list[dict]], index_generation=None) -> dict:
+    """
+    evidence pack 파일 작성
+
+    Args:
+        path: 출력 파일 경로
+        entries: (surgery_name, diagnosis, section, keyword) → 순위순 hit 리스트
+        index_generation: pack을 만든 시점의 fast-sentences generation 스탬프
+
+    Returns:
+        dict: 작성된 pack의 헤더 요약
+    """
+    sentence_ids: dict[bytes, int] = {}
+    sentence_blobs: list[bytes] = []
+    entry_sentence_ids: list[int] = []
+    entry_scores: list[float] = []
+    index: dict[str, list[int]] = {}
+
+    for key, hits in entries.items():
+        start = len(entry_sentence_ids)
+        for hit in hits:
+            blob = json.dumps({field: hit.get(field) for field in SENTENCE_FIELDS}, ensure_ascii=False, sort_keys=True).encode("utf-8")
+            if blob not in sentence_ids:
+                sentence_ids[blob] = len(sentence_blobs)
+                sentence_blobs.append(blob)
+            entry_sentence_ids.append(sentence_ids[blob])
+            entry_scores.append(hit["score"])
+        index[pack_key(*key)] = [start, len(hits)]
+
+    header = {
+        "version": FORMAT_VERSION,
+        "created_at": datetime.now().isoformat(),
+        "index_generation": index_generation,
+        "procedure_count": len({key[:2] for key in entries}),
+        "entries": index,
+    }
+    write_mmap_file(
+        path,
+        MAGIC,
+        header,
+        {
+            "entry_sentence_ids": np.asarray(entry_sentence_ids, dtype="<u4"),
+            "entry_scores": np.asarray(entry_scores, dtype="<f4"),
+        },
+        sentence_blobs,
+    )
+
+    summary = {key: value for key, value in header.items() if key != "entries"}
+    summary.update({"sentence_count": len(sentence_blobs), "entry_count": len(entry_sentence_ids)})
+    return summary
+
+
+class EvidencePack:
+    """mmap으로 연 evidence pack (읽기 전용)"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = MmapFile(path, MAGIC)
+        header = self._file.header
+
+        self.created_at = header["created_at"]
+        self.index_generation = header["index_generation"]
+        self.procedure_count = header["procedure_count"]
+        # 실행 중 live 인덱스 generation이 달라져 더 이상 쓰지 않는 pack
+        self.stale = False
+        self._entries: dict[str, list[int]] = header["entries"]
+        # (surgery, diagnosis, keyword) → pack에 있는지 빠르게 확인하기 위한 집합
+        self._covered = set()
+        for key in self._entries:
+            surgery_name, diagnosis, _, keyword = key.split(KEY_SEPARATOR)
+            self._covered.add(KEY_SEPARATOR.join((surgery_name, diagnosis, keyword)))
+
+    def is_stale(self, live_generation) -> bool:
+        """live 인덱스 generation을 알고 있고 pack을 만든 generation과 다르면 True"""
+        return live_generation is not None and self.index_generation != live_generation
+
+    def covers(self, surgery_name: str, diagnosis: str, keyword: str) -> bool:
+        return pack_key(surgery_name, diagnosis, keyword) in self._covered
+
+    def get(self, surgery_name: str, diagnosis: str, section: str, keyword: str) -> list[dict] | None:
+        """순위순 hit 리스트 (없으면 None)"""
+        span = self._entries.get(pack_key(surgery_name, diagnosis, section, keyword))
+        if span is None:
+            return None
+        start, length = span
+        sentence_ids = self._file.arrays["entry_sentence_ids"][start:start + length]
+        scores = self._file.arrays["entry_scores"][start:start + length]
+        return [
+            {**json.loads(self._file.blob(int(sentence_id))), "score": float(score)}
+            for sentence_id, score in zip(sentence_ids, scores)
+        ]
+
+    def stats(self) -> dict:
+        return {
+            "path": self.path,
+            "created_at": self.created_at,
+            "index_generation": self.index_generation,
+            "procedures": self.procedure_count,
+            "entries": len(self._entries),
+            "sentences": self._file.blob_count,
+        }
+
+    def close(self) -> None:
+        self._file.close()
+
+
+_evidence_pack: EvidencePack | None = None
+
+
+def load_evidence_pack(path: str | None = None) -> EvidencePack | None:
+    """
+    설정된 evidence pack을 열어 워커 전역으로 등록 (없으면 None → 항상 ES 사용)
+
+    live 인덱스 generation(refresh_index_generation으로 먼저 확인)과 다른 pack은 등록하지 않는다.
+    """
+    global _evidence_pack
+    path = path or get_settings().consent_evidence_pack_path
+    if not path:
+        return None
+    if not os.path.exists(path):
+        logger.warning(f"evidence pack 파일이 없습니다: {path}. ES 검색만 사용합니다.")
+        return None
+
+    try:
+        pack = EvidencePack(path)
+    except Exception as e:
+        logger.error(f"evidence pack 로드 실패: {type(e).__name__}: {e}. ES 검색만 사용합니다.")
+        return None
+
+    live_generation = get_retrieval_cache().generation
+    if pack.is_stale(live_generation):
+        logger.warning(f"evidence pack generation({pack.index_generation})이 live 인덱스({live_generation})와 다릅니다: {path}. "
+                       f"ES 검색만 사용합니다.")
+        pack.close()
+        return None
+
+    close_evidence_pack()
+    _evidence_pack = pack
+    logger.info(f"evidence pack 로드 완료: {pack.stats()}")
+    return pack
+
+
+def close_evidence_pack() -> None:
+    global _evidence_pack
+    if _evidence_pack is not None:
+        _evidence_pack.close()
+        _evidence_pack = None
+
+
+def get_evidence_pack() -> EvidencePack | None:
+    """
+    검색에 쓸 evidence pack (없거나 live 인덱스 generation과 다르면 None → ES 사용)
+
+    실행 중 재색인으로 generation이 바뀐 pack은 진행 중인 요청이 읽고 있을 수 있어 닫지 않고 쓰지만 않는다.
+    """
+    pack = _evidence_pack
+    if pack is None:
+        return None
+    live_generation = get_retrieval_cache().generation
+    if pack.is_stale(live_generation):
+        if not pack.stale:
+            pack.stale = True
+            logger.warning(f"live 인덱스 generation이 {live_generation}(으)로 바뀌어 evidence pack"
+                           f"(generation {pack.index_generation})을 더 이상 사용하지 않습니다.")
+        return None
+    return pack
@@ -1,10 +1,12 @@
 from copy import deepcopy
 from functools import partial
+from functools import lru_cache
 import re
 import asyncio
 import logging
+from typing import Any, AsyncIterator, Awaitable, Callable
 
-from tenacity import retry, wait_exponential, stop_after_attempt, retry_if_exception_type
+from tenacity import retry, wait_exponential, stop_after_attempt, retry_if_exception
 import openai
 
 from surgiform.api.models.consent import ConsentGenerateIn
@@ -13,72 +15,94 @@ from surgiform.api.models.base import ConsentBase
 from surgiform.api.models.base import SurgeryDetails
 from surgiform.api.models.base import ReferenceBase
 from surgiform.api.models.base import SurgeryDetailsReference
-from surgiform.core.ingest.uptodate.run_es import get_es_response
-from surgiform.external.openai_client import get_chat_llm
+from surgiform.core.consent.retrieval import RetrievalPlan
+from surgiform.core.consent.retrieval import base_keyword_sources
+from surgiform.core.consent.retrieval import extracted_keyword_sources
+from surgiform.core.dag import AsyncDAG
+from surgiform.core.cache import AsyncTTLCache
+from surgiform.core.deadline import RequestBudget
+from surgiform.core.deadline import budget_context
+from surgiform.core.deadline import current_budget
+from surgiform.core.hedge import get_llm_hedger
+from surgiform.core.consent.evidence import select_evidence
+from surgiform.core.consent.relevance import filter_section_evidence
+from surgiform.core.consent.result_cache import consent_fingerprint
+from surgiform.core.consent.result_cache import get_consent_cache
+from surgiform.core.consent.result_cache import get_cached_consent
+from surgiform.core.consent.result_cache import set_cached_consent
+from surgiform.core.consent.result_cache import get_section_cache
+from surgiform.core.consent.result_cache import section_fingerprint
+from surgiform.core.consent.sections import SECTION_NAMES
+from surgiform.core.consent.prompts import SYSTEM_PROMPT
+from surgiform.core.consent.prompts import CONTEXT_PROMPT
+from surgiform.core.consent.prompts import USER_PROMPT
+from surgiform.core.consent.prompts import FIELD_PROMPT
+from surgiform.core.consent.prompts import STRUCTURED_PROMPT
+from surgiform.core.consent.prompts import RELEVANCE_PROMPT
+from surgiform.core.consent.prompts import build_section_prompt
+from surgiform.core.consent.structured import generate_structured_sections
+from surgiform.core.consent.profiles import ConsentProfile
+from surgiform.core.consent.profiles import get_profile
+from surgiform.core.consent.sections import SURGERY_DETAIL_SECTION_NAMES
+from surgiform.core.consent.sections import section_dependencies
+from surgiform.core.consent.result_cache import text_version
+from surgiform.core.ingest.uptodate.run_es import get_retrieval_cache
+from surgiform.deploy.settings import get_settings
+from surgiform.external.openai_client import get_model_router
 from surgiform.external.openai_client import get_key_word_list_from_text
 from surgiform.external.openai_client import translate_text
-# from surgiform.external.openai_client import llm_validater
-from surgiform.external.openai_client import allm_validater
-from surgiform.api.models.consent import Gender
+from surgiform.external.openai_client import llm_priority_config
 
 # 로깅 설정
 logger = logging.getLogger(__name__)
 
 
-SYSTEM_PROMPT = """\
-You are a medical communication expert who explains surgical consent forms clearly and accurately for patients.
-
-### ROLE
-- Act as an expert writer of patient consent documents.
-- Your task is to generate the **content for the field <{field}> only**.
-
-### OUTPUT RULES
-- Output must be written in **plain Korean (5–10 sentences)**.
-- Write the final answer as **one continuous paragraph** without bullets, extra line breaks, headings, labels, or commentary.
-- Each sentence must be **short and clear** (ideally under 30 words) to improve readability.
-- The tone must **remain formal enough for a consent form**, yet **sound natural as if a doctor is directly explaining to a patient**.
-- Use **official Korean medical terms** (학술 용어) but explain them in everyday simple words; **append the precise term in parentheses only once at first mention**.
-- After the first mention, use only the plain explanation or a short expression **without repeating the term in parentheses**.
-- Do not redundantly append terms when the simple explanation and the medical term are essentially the same.
-- Do not append medical terms for generic or self-explanatory words that are not true medical terminology.
-- **Do NOT** include the patient's name or registration number.
-- **Do NOT** output any XML/HTML/JSON tags, identifiers, or metadata—just plain text.
-- **Do NOT** copy or quote evidence sentences verbatim; rephrasing and synthesis are mandatory.
-- If no relevant evidence exists for the field, omit it rather than force irrelevant content.
-- **Do NOT** fabricate data, numbers, or risks. Only include what is clearly supported.
-- Keep sentences short **but ensure natural flow between sentences**; avoid a fragmented or list-like feel.
-
-### ADDITIONAL RULES
-- The final result must be **one paragraph**, but sentences must be clearly separated for readability.
-- Medical terms must be shown in parentheses **only once**, and afterward described in short and simple expressions.
-- If the same risk factors or diseases appear multiple times, mention them once and later summarize as **“이러한 기저질환”**.
-- When describing risks, **clearly distinguish** between categories and **always present common ones first** using a consistent phrasing pattern:  
-  **“흔히 나타날 수 있는 부작용은 …”**, 이어서 **“드물지만 심각한 합병증은 …”**.
-- Only medical terms require additional explanations; all other words should remain as they are without extra rephrasing.
-- Maintain **medical accuracy** while writing in **plain Korean understandable by a middle school student**.
-- **Do not repeat** the same concept with duplicate explanations or redundant medical term annotations.
-
-### EVIDENCE USAGE
-- You will be provided with:
-  1. **Patient context (JSON)**
-  2. **Evidence (medical references)**
-- Use evidence only if relevant to the patient’s context and the target field.
-- Summarize and rephrase; do not include irrelevant details.
-- It is acceptable to refer to the same source across sentences, but rephrasing and synthesis are the default.
-
-### GOAL
-- Produce a **clear, medically accurate, patient-friendly explanation of <{field}>** in plain Korean **as a single paragraph**, nothing else.
-"""
-
-USER_PROMPT = """\
-### PATIENT_CONTEXT
-```json
-{patient_json}
-```
-
-## EVIDENCE_BLOCK
-{evidence_block}
-"""
+# 동의서 생성 LLM 호출은 대화형 채팅보다 뒤에 처리 (LLM gateway 우선순위)
+CONSENT_LLM_PRIORITY = "batch"
+
+# sections: 섹션별 LLM 호출, structured: 모든 섹션을 구조화 출력 1회로 생성 (실패한 섹션만 섹션별 호출)
+GENERATION_MODES = ("sections", "structured")
+
+
+
+def resolve_generation_mode(mode: str | None = None) -> str:
+    """요청 생성 모드 (없으면 CONSENT_GENERATION_MODE 설정)"""
+    mode = mode or get_settings().consent_generation_mode
+    if mode not in GENERATION_MODES:
+        raise ValueError(f"지원하지 않는 생성 모드입니다: {mode} (지원: {', '.join(GENERATION_MODES)})")
+    return mode
+
+
+def consent_cache_versions(mode: str | None = None, profile: str | None = None) -> dict:
+    """동의서 결과 캐시 키에 포함할 생성 설정 (바뀌면 이전 결과는 재사용하지 않음)"""
+    settings = get_settings()
+    return {
+        "mode": resolve_generation_mode(mode),
+        "profile": get_profile(profile).versions(),
+        "models": [settings.llm_router_models, settings.llm_router_quality_floor],
+        "prompt": text_version(SYSTEM_PROMPT, CONTEXT_PROMPT, USER_PROMPT, FIELD_PROMPT, STRUCTURED_PROMPT),
+        "retrieval": settings.retrieval_mode,
+        "relevance": [
+            settings.consent_relevance_filter,
+            settings.consent_relevance_min_score,
+            settings.consent_llm_validation_model,
+            settings.consent_llm_validation_max_candidates,
+            text_version(RELEVANCE_PROMPT),
+        ],
+        "evidence": [
+            settings.consent_evidence_top_n,
+            settings.consent_evidence_token_budget,
+            settings.consent_evidence_mmr,
+            settings.consent_evidence_mmr_top_n,
+            settings.consent_evidence_mmr_diversity,
+            settings.consent_shared_evidence_top_n,
+        ],
+    }
+
+
+def consent_request_fingerprint(payload: ConsentGenerateIn, mode: str | None = None) -> str:
+    """요청의 비식별화된 입력 + 생성 설정(모드·프로필) fingerprint (결과 캐시·중복 요청 합치기 키)"""
+    return consent_fingerprint(preprocess(payload), consent_cache_versions(mode, payload.profile))
 
 
 def remove_xml_tags(text: str) -> str:
@@ -101,39 +125,25 @@ def preprocess(in_data: ConsentGenerateIn) -> PublicConsentGenerateIn:
     data = deepcopy(in_data).dict()
     data.pop("registration_no", None)
     data.pop("patient_name", None)
+    # 생성 옵션은 환자 정보가 아님
+    data.pop("profile", None)
 
     return PublicConsentGenerateIn(**data)
 
 
 class ProcessedPayload:
     """미리 계산된 공통 데이터를 담는 클래스"""
-    def __init__(self, payload: PublicConsentGenerateIn, diagnosis: str, surgery_name: str, patient_condition_keys: list, special_conditions_other_keys: list):
+    def __init__(self, payload: PublicConsentGenerateIn, diagnosis: str, surgery_name: str, patient_condition_keys: list, special_conditions_other_keys: list,
+                 retrieval_plan: RetrievalPlan | None = None, profile: ConsentProfile | None = None):
         self.payload = payload
         self.diagnosis = diagnosis
         self.surgery_name = surgery_name
         self.patient_condition_keys = patient_condition_keys
         self.special_conditions_other_keys = special_conditions_other_keys
-
-    @classmethod
-    async def create(cls, payload: PublicConsentGenerateIn):
-        """비동기 팩토리 메서드로 병렬 처리"""
-        import asyncio
-        from concurrent.futures import ThreadPoolExecutor
-        
-        # ThreadPoolExecutor를 사용해 동기 함수들을 병렬로 실행
-        loop = asyncio.get_running_loop()
-        
-        tasks = [
-            loop.run_in_executor(None, translate_text, payload.diagnosis),
-            loop.run_in_executor(None, translate_text, payload.surgery_name), 
-            loop.run_in_executor(None, get_key_word_list_from_text, payload.patient_condition),
-            loop.run_in_executor(None, get_key_word_list_from_text, payload.special_conditions.other)
-        ]
-        
-        results = await asyncio.gather(*tasks)
-        diagnosis, surgery_name, patient_condition_keys, special_conditions_other_keys = results
-        
-        return cls(payload, diagnosis, surgery_name, patient_condition_keys, special_conditions_other_keys)
+        # DAG의 retrieval_* 노드에서 실행한 검색 계획 (섹션·재시도 간 공유)
+        self.retrieval_plan = retrieval_plan
+        # 모델 후보·k·evidence 예산·재시도 횟수 (없으면 기본 프로필)
+        self.profile = profile or get_profile()
 
 
 def is_rate_limit_error(exception):
@@ -186,132 +196,96 @@ def log_retry_attempt(retry_state):
                   f"다음 재시도까지 대기: {retry_state.next_action.sleep if retry_state.next_action else 0}초")
 
 
-async def generate_rag_response(processed_payload: ProcessedPayload, task_name: str, attempt_number: int = 1) -> tuple[str, list[str]]:
+def quota_fallback_text(task_name: str) -> str:
+    """OpenAI 할당량 초과 시 섹션 본문 대신 반환하는 안내 문구"""
+    return f"{task_name.replace('_', ' ')}에 대한 내용을 작성할 수 없습니다. OpenAI API 할당량을 확인해주세요."
+
+
+async def generate_rag_response(processed_payload: ProcessedPayload, task_name: str, tried_models: list[str] | None = None) -> tuple[str, list[str]]:
     """
     공통 RAG 로직: 키워드 추출, 문서 검색, LLM 응답 생성 (Async 버전 + 병렬 ES 검색)
+
+    Args:
+        tried_models: 이 섹션의 이전 시도에서 쓴 모델 (라우터 후보에서 제외, 이번에 고른 모델이 추가됨)
     """
     try:
-        MODEL_ORDER = [
-            "gpt-5",
-            "gpt-5-mini",
-            "gpt-4.1",
-            "gpt-4.1-mini",
-            "gpt-3.5-turbo",
-        ]
-        def get_model_name(attempt: int) -> str:
-            return MODEL_ORDER[min(attempt - 1, len(MODEL_ORDER) - 1)]
-        
-        model_name = get_model_name(attempt_number)
+        tried_models = tried_models if tried_models is not None else []
+        # 모델별 최근 지연·오류율·429 비율로 모델 선택 (재시도면 이미 쓴 모델 제외)
+        profile = processed_payload.profile
+        model_name = get_model_router().choose(exclude=tuple(tried_models), models=profile.models, quality_floor=profile.quality_floor)
+        attempt_number = len(tried_models) + 1
+        tried_models.append(model_name)
+        settings = get_settings()
+        budget = current_budget()
+
+        # 남은 시간이 빠른 모델 예약분 이하면 처음부터 빠른 모델 사용
+        remaining = budget.remaining()
+        if remaining is not None and remaining <= settings.consent_fast_model_reserve and model_name != settings.consent_fast_model:
+            logger.warning(f"작업 '{task_name}': 남은 시간 {remaining:.1f}초, {settings.consent_fast_model}로 대체")
+            model_name = settings.consent_fast_model
+            budget.mark_degraded(task_name, "fast_model")
         
         if attempt_number > 1:
             logger.info(f"재시도 중 - 작업 '{task_name}'에서 {model_name} 사용 (시도: {attempt_number})")
         
         logger.debug(f"작업 '{task_name}' 시작 (시도: {attempt_number}, 모델: {model_name})")
         payload = processed_payload.payload
-        diagnosis = processed_payload.diagnosis
-        surgery_name = processed_payload.surgery_name
-        patient_condition_keys = processed_payload.patient_condition_keys
-        special_conditions_other_keys = processed_payload.special_conditions_other_keys
 
+        shared_evidence = []
         evidence_blocks = []
         references = []
         
-        es_query = f"{task_name.replace('_', ' ')} {diagnosis} {surgery_name}" 
-        
-        # 모든 키워드 수집
-        keywords = [
-            f"{payload.age} years old",
-            "male" if payload.gender is Gender.male else "female",
-            f"{payload.surgical_site_mark}",
-            *patient_condition_keys,
-            "past_history" if payload.special_conditions.past_history else None,
-            "diabetes" if payload.special_conditions.diabetes else None,
-            "smoking" if payload.special_conditions.smoking else None,
-            "hypertension" if payload.special_conditions.hypertension else None,
-            "allergy" if payload.special_conditions.allergy else None,
-            "cardiovascular" if payload.special_conditions.cardiovascular else None,
-            "respiratory" if payload.special_conditions.respiratory else None,
-            "coagulation" if payload.special_conditions.coagulation else None,
-            "medications" if payload.special_conditions.medications else None,
-            "renal" if payload.special_conditions.renal else None,
-            "drug_abuse" if payload.special_conditions.drug_abuse else None,
-            *special_conditions_other_keys
-        ]
-        
-        # None 값 제거하고 ES 쿼리 생성
-        valid_keywords = [kw for kw in keywords if kw is not None]
-        es_queries = [f"{es_query} {keyword}" for keyword in valid_keywords]
-        
-        # 모든 ES 검색을 병렬로 실행
-        if es_queries:
-            # 키워드가 많을 때 gather 폭주 가능성 있음. semaphore(n=8)로 동시성 제한
-            sem = asyncio.Semaphore(8)
-            async def _es(query): 
-                async with sem:
-                    return await get_es_response(query, k=10, score_threshold=1)
-            es_results = await asyncio.gather(*[_es(q) for q in es_queries])
-
-#             # llm validator - 모든 validation을 병렬로 처리
-#             validation_tasks = []
-#             hit_mappings = []  # (result_idx, hit_idx, hit) 매핑 정보 저장
-            
-#             for result_idx, result in enumerate(es_results):
-#                 for hit_idx, hit in enumerate(result):
-#                     prompt = SYSTEM_PROMPT.format(field=task_name)
-#                     user_prompt = """\
-# ### PATIENT_CONTEXT
-# ```json
-# {patient_json}
-# ```
-
-# Determine whether the EVIDENCE_BLOCK contains information that is directly relevant and appropriate for writing the specified section of the surgical consent form, based on the PATIENT_CONTEXT.
-
-# If it is relevant and appropriate, answer with "Y".
-# If it is not relevant, answer with "N".
-
-# Respond with only one letter, either "Y" or "N".
-# Answer:
-# """
-#                     full_prompt = prompt + user_prompt.format(patient_json=payload.model_dump_json(), evidence_block=hit["text"])
-#                     validation_tasks.append(allm_validater(full_prompt))
-#                     hit_mappings.append((result_idx, hit_idx, hit))
+        # 섹션이 사용하는 입력 필드 (프롬프트 환자 정보와 검색 키워드를 이 범위로 제한)
+        fields = section_dependencies(task_name)
+
+        # 동의서 단위로 공유되는 검색 결과를 섹션명 기준으로 재정렬해서 사용
+        retrieval_plan = processed_payload.retrieval_plan
+        if retrieval_plan.queries:
+            # 수술 기본 검색 결과 상위 몇 개는 모든 섹션의 공통 prefix에 넣음 (섹션과 무관한 순서)
+            shared_hits = retrieval_plan.shared_hits(k=settings.consent_shared_evidence_top_n)
+            shared_evidence = [hit["text"] for hit in shared_hits]
+            es_results = retrieval_plan.hits_for_section(task_name, k=profile.k, fields=fields)
+
+            # 환자·섹션과 무관한 후보 제외 (로컬 점수, 선택적으로 섹션당 LLM 검증 1회)
+            filtered_results = await filter_section_evidence(processed_payload, retrieval_plan, task_name, es_results, fields,
+                                                             CONSENT_LLM_PRIORITY, exclude_texts=set(shared_evidence))
             
-#             # 모든 validation을 병렬로 실행
-#             if validation_tasks:
-#                 logger.debug(f"작업 '{task_name}': {len(validation_tasks)}개의 evidence 병렬 validation 시작")
-#                 validation_results = await asyncio.gather(*validation_tasks)
-                
-#                 # 결과를 원래 구조로 재구성
-#                 filtered_results = [[] for _ in es_results]
-#                 valid_count = 0
-#                 for i, is_valid in enumerate(validation_results):
-#                     if is_valid:
-#                         result_idx, hit_idx, hit = hit_mappings[i]
-#                         filtered_results[result_idx].append(hit)
-#                         valid_count += 1
-                
-#                 logger.debug(f"작업 '{task_name}': validation 완료 - {valid_count}/{len(validation_tasks)}개 evidence 유효")
-#             else:
-#                 filtered_results = []
-            filtered_results = es_results
-            
-            # 결과 통합
-            for evidence_block in filtered_results:
-                evidence_blocks.extend([hit["text"] for hit in evidence_block])
-                references.extend([{
-                    "url": hit["url"],
-                    "title": hit["title"],
-                    "text": hit["text"]
-                } for hit in evidence_block])
-
-        llm = get_chat_llm(model_name=model_name)
-        prompt = SYSTEM_PROMPT.format(field=task_name)
-        evidence_blocks = "\n\n".join(evidence_blocks)
-        prompt += USER_PROMPT.format(patient_json=payload.model_dump_json(), evidence_block=evidence_blocks)
+            # 공통 evidence에 이미 있는 문장은 섹션 evidence에서 제외
+            packed = select_evidence(filtered_results, task_name, model_name, exclude_texts=set(shared_evidence),
+                                     token_budget=profile.evidence_token_budget)
+
+            evidence_blocks.extend([hit["text"] for hit in packed.hits])
+            references.extend([{
+                "url": hit["url"],
+                "title": hit["title"],
+                "text": hit["text"]
+            } for hit in [*shared_hits, *packed.hits]])
+
+        prompt = build_section_prompt(task_name, payload, fields, shared_evidence, evidence_blocks)
         
         # LangChain의 async invoke 사용
         logger.debug(f"작업 '{task_name}' OpenAI API 호출 중... (모델: {model_name})")
-        response = await llm.ainvoke(prompt)
+        # deadline이 있으면 빠른 모델로 다시 생성할 시간을 남겨두고 호출
+        remaining = budget.remaining()
+        primary_timeout = None
+        if remaining is not None and model_name != settings.consent_fast_model:
+            primary_timeout = max(remaining - settings.consent_fast_model_reserve, 0.0)
+        try:
+            response = await asyncio.wait_for(invoke_section_llm(model_name, prompt), primary_timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"작업 '{task_name}': {model_name} 응답 시간 초과, {settings.consent_fast_model}로 재생성")
+            budget.mark_degraded(task_name, "fast_model")
+            model_name = settings.consent_fast_model
+            try:
+                response = await asyncio.wait_for(
+                    get_model_router().ainvoke(model_name, prompt, config=llm_priority_config(CONSENT_LLM_PRIORITY)),
+                    budget.remaining(),
+                )
+            except asyncio.TimeoutError:
+                # 빠른 모델도 남은 시간 안에 끝나지 않으면 placeholder (degrade 사유도 placeholder로 기록)
+                logger.warning(f"작업 '{task_name}': {model_name}도 deadline 안에 응답하지 않아 placeholder 반환")
+                budget.mark_degraded(task_name, "placeholder")
+                return degraded_placeholder(task_name), []
 
         # XML 태그 제거
         cleaned_content = remove_xml_tags(response.content)
@@ -327,174 +301,436 @@ async def generate_rag_response(processed_payload: ProcessedPayload, task_name:
         # OpenAI API 할당량 초과 오류인 경우 기본 텍스트 반환
         if "insufficient_quota" in error_msg or "rate_limit" in error_msg.lower():
             logger.warning(f"OpenAI API 할당량 초과로 인한 작업 '{task_name}' 실패. 기본 응답 반환.")
-            return f"{task_name.replace('_', ' ')}에 대한 내용을 작성할 수 없습니다. OpenAI API 할당량을 확인해주세요.", []
+            return quota_fallback_text(task_name), []
         
         # 기타 오류는 tenacity가 재시도하도록 다시 발생시킴
         raise
 
 
-# Async partial 함수들을 사용해서 각 동의서 필드별 함수 생성
+async def invoke_section_llm(model_name: str, prompt: str):
+    """섹션 생성 LLM 호출 (LLM_HEDGE_ENABLED면 느린 호출에 hedge 요청)"""
+    config = llm_priority_config(CONSENT_LLM_PRIORITY)
+    settings = get_settings()
+    router = get_model_router()
+    if not settings.llm_hedge_enabled:
+        return await router.ainvoke(model_name, prompt, config=config)
+
+    hedge_model = settings.llm_hedge_model or model_name
+    return await get_llm_hedger().call(
+        model_name,
+        lambda: router.ainvoke(model_name, prompt, config=config),
+        hedge_model=hedge_model,
+        hedge=lambda: router.ainvoke(hedge_model, prompt, config=config),
+    )
+
+
+async def _create_consent_func(task_name: str, processed_payload: ProcessedPayload) -> tuple[str, list[str]]:
+    """섹션 1개 생성 (rate limit 재시도마다 이미 쓴 모델은 라우터 후보에서 제외, 최대 시도 수는 프로필 기준)"""
+    generate = _generate_with_retry.retry_with(stop=stop_after_attempt(processed_payload.profile.max_attempts))
+    return await generate(task_name, processed_payload, [])
+
+
 @retry(
     wait=wait_exponential(multiplier=2, min=4, max=60),
     stop=stop_after_attempt(5),
-    retry=is_rate_limit_error,
+    retry=retry_if_exception(is_rate_limit_error),
     before_sleep=log_retry_attempt
 )
-async def _create_consent_func(task_name: str, processed_payload: ProcessedPayload) -> tuple[str, list[str]]:
-    # tenacity retry context에서 현재 시도 횟수를 가져오기 위한 트릭
-    import inspect
-    frame = inspect.currentframe()
-    attempt_number = 1
+async def _generate_with_retry(task_name: str, processed_payload: ProcessedPayload, tried_models: list[str]) -> tuple[str, list[str]]:
+    return await generate_rag_response(processed_payload, task_name, tried_models)
+
+
+def section_cache_key(task_name: str, payload: PublicConsentGenerateIn, mode: str | None = None, profile: str | None = None) -> str:
+    return section_fingerprint(task_name, payload, section_dependencies(task_name), consent_cache_versions(mode, profile))
+
+
+async def cached_section(task_name: str, payload: PublicConsentGenerateIn, compute: Callable[[], Awaitable[tuple[str, list]]],
+                         mode: str | None = None, profile: str | None = None) -> tuple[str, list[str]]:
+    """
+    섹션 캐시 조회 후 없으면 compute로 생성
+
+    캐시 키는 섹션 레지스트리(SECTION_DEPENDENCIES)에 선언된 입력 필드만으로 만들어,
+    환자 의존도가 낮은 섹션은 다른 환자의 요청에서도 재사용된다.
+
+    계산은 같은 섹션을 동시에 기다리는 요청들이 공유하므로 요청 deadline(within_deadline)은
+    이 함수 바깥에서 요청마다 적용한다. 계산 중 빠른 모델로 degrade되었으면 그 사유를 결과와
+    함께 넘겨, 함께 기다린 요청도 자신의 budget에 같은 사유를 기록한다.
+    """
+    fingerprint = section_cache_key(task_name, payload, mode, profile)
+
+    async def compute_with_status() -> tuple[str, list, str | None]:
+        content, refs = await compute()
+        # 계산을 맡은 요청의 budget에 기록된 degrade 사유
+        return content, refs, current_budget().degraded.get(task_name)
+
+    cache = get_section_cache()
+    cache.set_generation(get_retrieval_cache().generation)
+    content, refs, degraded = await cache.get_or_compute(
+        fingerprint,
+        compute_with_status,
+        # 할당량 초과 안내 문구와 degrade된 결과는 캐시하지 않음
+        cacheable=lambda result: result[0] != quota_fallback_text(task_name) and result[2] is None,
+    )
+    if degraded is not None:
+        current_budget().mark_degraded(task_name, degraded)
+    return content, refs
+
+
+def degraded_placeholder(task_name: str) -> str:
+    """시간 제한 안에 생성하지 못한 섹션 대신 넣는 안내 문구"""
+    return f"[자동 생성 지연] {task_name.replace('_', ' ')}에 대한 내용은 담당 의료진이 직접 설명드립니다."
+
+
+async def within_deadline(task_name: str, compute: Callable[[], Awaitable[tuple[str, list]]]) -> tuple[str, list]:
+    """요청 deadline 안에 섹션 생성 (시간 초과 시 placeholder로 대체하고 degrade 기록)"""
+    budget = current_budget()
     try:
-        # 현재 실행 중인 함수의 프레임에서 retry 상태 확인
-        for f in inspect.getouterframes(frame):
-            if 'retry_state' in f.frame.f_locals:
-                retry_state = f.frame.f_locals['retry_state']
-                attempt_number = retry_state.attempt_number
-                break
-    finally:
-        del frame
-    
-    return await generate_rag_response(processed_payload, task_name, attempt_number)
+        return await asyncio.wait_for(compute(), budget.remaining())
+    except asyncio.TimeoutError:
+        logger.warning(f"작업 '{task_name}': 요청 deadline 초과로 placeholder 반환")
+        budget.mark_degraded(task_name, "placeholder")
+        return degraded_placeholder(task_name), []
 
-async def get_prognosis_without_surgery(processed_payload: ProcessedPayload) -> tuple[str, list[str]]:
-    return await _create_consent_func("prognosis_without_surgery", processed_payload)
 
-async def get_alternative_treatments(processed_payload: ProcessedPayload) -> tuple[str, list[str]]:
-    return await _create_consent_func("alternative_treatments", processed_payload)
+# LLM 키워드 추출 결과(자유 기술 항목)에 의존하는 입력 필드
+EXTRACTED_KEYWORD_FIELDS = {"patient_condition", "special_conditions"}
 
-async def get_surgery_purpose_necessity_effect(processed_payload: ProcessedPayload) -> tuple[str, list[str]]:
-    return await _create_consent_func("surgery_purpose_necessity_effect", processed_payload)
 
-async def get_possible_complications_sequelae(processed_payload: ProcessedPayload) -> tuple[str, list[str]]:
-    return await _create_consent_func("possible_complications_sequelae", processed_payload)
+def needs_extracted_keywords(task_name: str) -> bool:
+    """섹션이 LLM 키워드 추출 결과를 기다려야 하는지 (아니면 기본 검색만으로 시작)"""
+    fields = section_dependencies(task_name)
+    return fields is None or bool(EXTRACTED_KEYWORD_FIELDS & set(fields))
 
-async def get_emergency_measures(processed_payload: ProcessedPayload) -> tuple[str, list[str]]:
-    return await _create_consent_func("emergency_measures", processed_payload)
 
-async def get_mortality_risk(processed_payload: ProcessedPayload) -> tuple[str, list[str]]:
-    return await _create_consent_func("mortality_risk", processed_payload)
+def _in_executor(func: Callable, *args) -> Callable[[], Awaitable]:
+    async def run():
+        return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+    return run
 
-async def get_overall_description(processed_payload: ProcessedPayload) -> tuple[str, list[str]]:
-    return await _create_consent_func("overall_description", processed_payload)
 
-async def get_estimated_duration(processed_payload: ProcessedPayload) -> tuple[str, list[str]]:
-    return await _create_consent_func("estimated_duration", processed_payload)
+@lru_cache
+def get_preprocess_cache() -> AsyncTTLCache:
+    """번역·키워드 추출 결과 캐시 (같은 수술·진단명이 반복되는 요청·일괄 생성에서 1회만 호출)"""
+    settings = get_settings()
+    return AsyncTTLCache("consent_preprocess", maxsize=settings.consent_preprocess_cache_maxsize, ttl=settings.consent_preprocess_cache_ttl)
 
-async def get_method_change_or_addition(processed_payload: ProcessedPayload) -> tuple[str, list[str]]:
-    return await _create_consent_func("method_change_or_addition", processed_payload)
 
-async def get_transfusion_possibility(processed_payload: ProcessedPayload) -> tuple[str, list[str]]:
-    return await _create_consent_func("transfusion_possibility", processed_payload)
+def _memoized(kind: str, func: Callable, text: str | None, cacheable: Callable[[Any], bool]) -> Callable[[], Awaitable]:
+    async def run():
+        return await get_preprocess_cache().get_or_compute((kind, text), _in_executor(func, text), cacheable=cacheable)
+    return run
 
-async def get_surgeon_change_possibility(processed_payload: ProcessedPayload) -> tuple[str, list[str]]:
-    return await _create_consent_func("surgeon_change_possibility", processed_payload)
 
+async def _no_keywords() -> list[str]:
+    return []
 
-async def generate_consent(payload: ConsentGenerateIn) -> tuple[ConsentBase, ReferenceBase]:
+
+def build_consent_dag(payload: PublicConsentGenerateIn, mode: str = "sections", profile: ConsentProfile | None = None) -> AsyncDAG:
     """
-    Graph-RAG 파이프라인 준비 전 임시 동의서 목업 (Async 병렬 처리 버전)
+    동의서 생성 단계 DAG
+
+        translate_* ─ retrieval_base ─ processed_base ─ 수술 정보만 쓰는 섹션
+        translate_* + *_keys ─ retrieval_extracted ─ retrieval_plan(+ retrieval_base) ─ processed_payload ─ 환자 정보 섹션
+
+    입력값만으로 만드는 키워드(나이·성별·부위·특이사항 플래그)는 번역이 끝나는 즉시 검색하고,
+    LLM 키워드 추출이 필요한 검색만 추출 완료를 기다린다. 각 섹션은 섹션 캐시를 먼저 확인하고,
+    없을 때만 자신의 검색 결과가 준비되기를 기다린다.
+
+    structured 모드에서는 processed_payload ─ structured(섹션 캐시에 없는 섹션 전체를 1회 생성) 노드가
+    추가되고, 각 섹션은 그 결과를 쓰되 검증에 실패한 섹션만 섹션별로 생성한다.
+
+    프로필이 키워드 추출을 끄면(fast) *_keys 노드는 LLM 호출 없이 빈 목록을 반환한다.
+    """
+    profile = profile or get_profile()
+    dag = AsyncDAG("consent")
+    translate = partial(translate_text, priority=CONSENT_LLM_PRIORITY)
+    extract_keywords = partial(get_key_word_list_from_text, priority=CONSENT_LLM_PRIORITY)
+    # 실패 시 원문(번역)·빈 리스트(키워드)가 반환되므로 그런 결과는 캐시하지 않음
+    dag.add("translate_diagnosis", _memoized("translate", translate, payload.diagnosis, lambda result: result != payload.diagnosis))
+    dag.add("translate_surgery_name", _memoized("translate", translate, payload.surgery_name, lambda result: result != payload.surgery_name))
+    if profile.extract_keywords:
+        dag.add("patient_condition_keys", _memoized("keywords", extract_keywords, payload.patient_condition, bool))
+        dag.add("special_conditions_other_keys", _memoized("keywords", extract_keywords, payload.special_conditions.other, bool))
+    else:
+        dag.add("patient_condition_keys", _no_keywords)
+        dag.add("special_conditions_other_keys", _no_keywords)
+
+    base_sources = base_keyword_sources(payload)
+    base_keywords = {keyword for keyword, _ in base_sources}
+    translations = ("translate_diagnosis", "translate_surgery_name")
+    extracted_keys = ("patient_condition_keys", "special_conditions_other_keys")
+
+    async def retrieve_base(diagnosis, surgery_name):
+        return await RetrievalPlan.search(payload, diagnosis, surgery_name, base_sources)
+
+    async def retrieve_extracted(diagnosis, surgery_name, patient_condition_keys, special_conditions_other_keys):
+        sources = extracted_keyword_sources(patient_condition_keys, special_conditions_other_keys)
+        # 기본 검색에 이미 있는 키워드는 다시 검색하지 않음
+        return await RetrievalPlan.search(payload, diagnosis, surgery_name, [source for source in sources if source[0] not in base_keywords])
+
+    async def merge_plans(base_plan, extracted_plan, patient_condition_keys, special_conditions_other_keys):
+        plan = RetrievalPlan.merge([base_plan, extracted_plan])
+        plan.attribute(extracted_keyword_sources(patient_condition_keys, special_conditions_other_keys))
+        return plan
+
+    async def processed_base(diagnosis, surgery_name, base_plan):
+        return ProcessedPayload(payload, diagnosis, surgery_name, [], [], retrieval_plan=base_plan, profile=profile)
+
+    async def processed_full(diagnosis, surgery_name, patient_condition_keys, special_conditions_other_keys, plan):
+        return ProcessedPayload(payload, diagnosis, surgery_name, patient_condition_keys, special_conditions_other_keys, retrieval_plan=plan, profile=profile)
+
+    dag.add("retrieval_base", retrieve_base, translations)
+    dag.add("retrieval_extracted", retrieve_extracted, (*translations, *extracted_keys))
+    dag.add("retrieval_plan", merge_plans, ("retrieval_base", "retrieval_extracted", *extracted_keys))
+    dag.add("processed_base", processed_base, (*translations, "retrieval_base"))
+    dag.add("processed_payload", processed_full, (*translations, *extracted_keys, "retrieval_plan"))
+
+    if mode == "structured":
+        async def structured(processed):
+            # 섹션 캐시에 이미 있는 섹션은 요청하지 않음
+            cache = get_section_cache()
+            missing = [task_name for task_name in SECTION_NAMES if not cache.get(section_cache_key(task_name, payload, mode, profile.name))[0]]
+            if not missing:
+                return {}
+            try:
+                return await generate_structured_sections(processed, missing, CONSENT_LLM_PRIORITY, profile)
+            except Exception as e:
+                # 구조화 생성이 통째로 실패하면 모든 섹션을 섹션별로 생성
+                logger.error(f"구조화 생성 실패, 섹션별 생성으로 대체: {type(e).__name__}: {e}")
+                return {}
+
+        dag.add("structured", structured, ("processed_payload",))
+
+    def section_node(task_name: str):
+        source = "processed_payload" if needs_extracted_keywords(task_name) else "processed_base"
+
+        async def generate():
+            if mode == "structured":
+                structured_results = await dag.result("structured")
+                if task_name in structured_results:
+                    content, refs = structured_results[task_name]
+                    return remove_xml_tags(content), refs
+            return await _create_consent_func(task_name, await dag.result(source))
+
+        async def run():
+            # 의존 노드는 캐시 miss일 때만 기다림 (캐시 hit 섹션은 번역·검색 없이 바로 완료)
+            # deadline은 공유 계산 바깥에서 요청마다 적용 (다른 요청의 placeholder가 섞이지 않도록)
+            return await within_deadline(task_name, lambda: cached_section(task_name, payload, generate, mode, profile.name))
+        return run
+
+    for task_name in SECTION_NAMES:
+        dag.add(task_name, section_node(task_name))
+    return dag
+
+
+def assemble_consent(section_results: dict[str, tuple[str, list]]) -> tuple[ConsentBase, ReferenceBase]:
+    """섹션별 (본문, references)를 ConsentBase / ReferenceBase로 조립 (없는 섹션은 빈 값)"""
+    def content(task_name: str) -> str:
+        return section_results.get(task_name, ("", []))[0]
+
+    def refs(task_name: str) -> list:
+        return section_results.get(task_name, ("", []))[1]
+
+    consents = ConsentBase(
+        prognosis_without_surgery=content("prognosis_without_surgery"),
+        alternative_treatments=content("alternative_treatments"),
+        surgery_purpose_necessity_effect=content("surgery_purpose_necessity_effect"),
+        surgery_method_content=SurgeryDetails(
+            overall_description=content("overall_description"),
+            estimated_duration=content("estimated_duration"),
+            method_change_or_addition=content("method_change_or_addition"),
+            transfusion_possibility=content("transfusion_possibility"),
+            surgeon_change_possibility=content("surgeon_change_possibility")
+        ),
+        possible_complications_sequelae=content("possible_complications_sequelae"),
+        emergency_measures=content("emergency_measures"),
+        mortality_risk=content("mortality_risk")
+    )
+
+    references = ReferenceBase(
+        prognosis_without_surgery=refs("prognosis_without_surgery"),
+        alternative_treatments=refs("alternative_treatments"),
+        surgery_purpose_necessity_effect=refs("surgery_purpose_necessity_effect"),
+        surgery_method_content=SurgeryDetailsReference(
+            overall_description=refs("overall_description"),
+            estimated_duration=refs("estimated_duration"),
+            method_change_or_addition=refs("method_change_or_addition"),
+            transfusion_possibility=refs("transfusion_possibility"),
+            surgeon_change_possibility=refs("surgeon_change_possibility")
+        ),
+        possible_complications_sequelae=refs("possible_complications_sequelae"),
+        emergency_measures=refs("emergency_measures"),
+        mortality_risk=refs("mortality_risk")
+    )
+
+    return consents, references
+
+
+def _cached_section_results(consents: ConsentBase, references: ReferenceBase) -> dict[str, tuple[str, list]]:
+    """동의서를 섹션별 (본문, references)로 분해 (캐시 hit 스트리밍 응답·섹션 재생성 병합용)"""
+    results = {}
+    for task_name in SECTION_NAMES:
+        if task_name in SURGERY_DETAIL_SECTION_NAMES:
+            content = getattr(consents.surgery_method_content, task_name)
+            refs = getattr(references.surgery_method_content, task_name)
+        else:
+            content = getattr(consents, task_name)
+            refs = getattr(references, task_name)
+        # 새로 생성한 섹션과 같은 dict 형태로 맞춤 (section 이벤트를 JSON으로 보낼 수 있도록)
+        results[task_name] = (content, [ref.model_dump(mode="json") for ref in refs])
+    return results
+
+
+async def _run_section(dag: AsyncDAG, task_name: str) -> tuple[str, tuple[str, list] | None, Exception | None]:
+    try:
+        return task_name, await dag.result(task_name), None
+    except Exception as e:
+        return task_name, None, e
+
+
+async def stream_consent(payload: ConsentGenerateIn, timeout: float | None = None, mode: str | None = None) -> AsyncIterator[tuple[str, dict]]:
+    """
+    동의서 생성 이벤트 스트림 (섹션이 끝나는 순서대로 전달)
+
+    Args:
+        payload: 동의서 생성 요청
+        timeout: 요청 deadline(초). None이면 CONSENT_DEADLINE 설정 사용, 0이면 제한 없음
+        mode: 생성 모드 (sections | structured). None이면 CONSENT_GENERATION_MODE 설정 사용
+
+    이벤트 (이름, 데이터)
+        progress: 단계 진행 상황 {"stage", "completed", "total"}
+        section: 완료된 섹션 {"section", "content", "references", "degraded", "completed", "total"}
+        error: 실패한 섹션 {"section", "error", "completed", "total"}
+        done: 최종 결과 {"consents": ConsentBase, "references": ReferenceBase, "degraded_sections": {섹션: 사유}, "profile": 프로필 이름}
+
+    생성 프로필은 payload.profile (없으면 CONSENT_PROFILE 설정)
     """
     deidentified_payload: PublicConsentGenerateIn = preprocess(payload)
-    # 공통 계산을 병렬로 수행
-    processed_payload = await ProcessedPayload.create(deidentified_payload)
-    
-    # 모든 get_* 함수들을 병렬로 실행 (개별 오류 처리를 위해 return_exceptions=True 사용)
+    total = len(SECTION_NAMES)
+    budget = RequestBudget(get_settings().consent_deadline if timeout is None else timeout)
+    mode = resolve_generation_mode(mode)
+    profile = get_profile(payload.profile)
+
+    # 같은 입력으로 이미 만든 동의서가 있으면 그대로 반환 (인덱스가 바뀌었으면 무효화)
+    get_consent_cache().set_generation(get_retrieval_cache().generation)
+    fingerprint = consent_request_fingerprint(payload, mode)
+    cached = get_cached_consent(fingerprint)
+    if cached is not None:
+        logger.info(f"동의서 캐시 hit: {fingerprint[:12]}")
+        consents, references = cached
+        for completed, (task_name, (content, refs)) in enumerate(_cached_section_results(consents, references).items(), 1):
+            yield "section", {"section": task_name, "content": content, "references": refs, "degraded": None, "completed": completed, "total": total}
+        yield "done", {"consents": consents, "references": references, "degraded_sections": {}, "profile": profile.name}
+        return
+
+    # 번역·키워드 추출·검색·섹션 생성을 DAG로 실행 (각 단계는 입력이 준비되는 즉시 시작)
     logger.info("동의서 생성 시작: 모든 섹션을 병렬로 생성 중...")
-    
-    tasks = [
-        ("overall_description", get_overall_description(processed_payload)),
-        ("estimated_duration", get_estimated_duration(processed_payload)),
-        ("method_change_or_addition", get_method_change_or_addition(processed_payload)),
-        ("transfusion_possibility", get_transfusion_possibility(processed_payload)),
-        ("surgeon_change_possibility", get_surgeon_change_possibility(processed_payload)),
-        ("prognosis_without_surgery", get_prognosis_without_surgery(processed_payload)),
-        ("alternative_treatments", get_alternative_treatments(processed_payload)),
-        ("surgery_purpose_necessity_effect", get_surgery_purpose_necessity_effect(processed_payload)),
-        ("possible_complications_sequelae", get_possible_complications_sequelae(processed_payload)),
-        ("emergency_measures", get_emergency_measures(processed_payload)),
-        ("mortality_risk", get_mortality_risk(processed_payload))
-    ]
-    
-    # 병렬 실행 - 개별 오류도 결과로 반환
-    task_names = [name for name, _ in tasks]
-    task_coroutines = [coro for _, coro in tasks]
-    
-    results = await asyncio.gather(*task_coroutines, return_exceptions=True)
-    
-    # 결과 처리 및 오류 체크
-    processed_results = []
+    yield "progress", {"stage": "generate", "completed": 0, "total": total}
+
+    dag = build_consent_dag(deidentified_payload, mode, profile)
+    # 모든 단계 task가 같은 요청 deadline을 보도록 budget이 설정된 context에서 시작
+    budget_context(budget).run(dag.start)
+    futures = [asyncio.ensure_future(_run_section(dag, task_name)) for task_name in SECTION_NAMES]
+    section_results = {}
     failed_tasks = []
-    successful_tasks = []
-    
-    for i, result in enumerate(results):
-        task_name = task_names[i]
-        if isinstance(result, Exception):
-            logger.error(f"작업 '{task_name}' 실행 중 오류 발생: {str(result)}")
-            failed_tasks.append(task_name)
-            # 기본값 설정 (빈 문자열과 빈 참조 리스트)
-            processed_results.append(("", []))
-        else:
-            logger.info(f"작업 '{task_name}' 성공적으로 완료")
-            successful_tasks.append(task_name)
-            processed_results.append(result)
-    
+    try:
+        for completed, future in enumerate(asyncio.as_completed(futures), 1):
+            task_name, result, error = await future
+            if error is not None:
+                logger.error(f"작업 '{task_name}' 실행 중 오류 발생: {str(error)}")
+                failed_tasks.append(task_name)
+                yield "error", {"section": task_name, "error": str(error), "completed": completed, "total": total}
+            else:
+                logger.info(f"작업 '{task_name}' 성공적으로 완료")
+                section_results[task_name] = result
+                content, refs = result
+                yield "section", {
+                    "section": task_name, "content": content, "references": refs,
+                    "degraded": budget.degraded.get(task_name), "completed": completed, "total": total,
+                }
+    finally:
+        # 클라이언트 연결이 끊겨 스트림이 중단되면 남은 섹션 생성도 취소
+        for future in futures:
+            future.cancel()
+        dag.cancel()
+
     # 전체 작업 완료 통계 로깅
-    total_tasks = len(task_names)
-    success_count = len(successful_tasks)
-    failed_count = len(failed_tasks)
-    
-    logger.info(f"동의서 생성 완료: 총 {total_tasks}개 작업 중 {success_count}개 성공, {failed_count}개 실패")
+    logger.info(f"동의서 생성 완료: 총 {total}개 작업 중 {len(section_results)}개 성공, {len(failed_tasks)}개 실패")
+    logger.info(f"동의서 생성 단계별 시간(ms): {dag.timing_summary()}")
     if failed_tasks:
         logger.warning(f"실패한 작업들: {', '.join(failed_tasks)}")
-    
-    # 결과 언패킹
-    (consents_overall_description, references_overall_description), \
-    (consents_estimated_duration, references_estimated_duration), \
-    (consents_method_change_or_addition, references_method_change_or_addition), \
-    (consents_transfusion_possibility, references_transfusion_possibility), \
-    (consents_surgeon_change_possibility, references_surgeon_change_possibility), \
-    (consents_prognosis_without_surgery, references_prognosis_without_surgery), \
-    (consents_alternative_treatments, references_alternative_treatments), \
-    (consents_surgery_purpose_necessity_effect, references_surgery_purpose_necessity_effect), \
-    (consents_possible_complications_sequelae, references_possible_complications_sequelae), \
-    (consents_emergency_measures, references_emergency_measures), \
-    (consents_mortality_risk, references_mortality_risk) = processed_results
-
-    consents_surgery_method_content = SurgeryDetails(
-        overall_description=consents_overall_description,
-        estimated_duration=consents_estimated_duration,
-        method_change_or_addition=consents_method_change_or_addition,
-        transfusion_possibility=consents_transfusion_possibility,
-        surgeon_change_possibility=consents_surgeon_change_possibility
-    )
 
-    consents = ConsentBase(
-        prognosis_without_surgery=consents_prognosis_without_surgery,
-        alternative_treatments=consents_alternative_treatments,
-        surgery_purpose_necessity_effect=consents_surgery_purpose_necessity_effect,
-        surgery_method_content=consents_surgery_method_content,
-        possible_complications_sequelae=consents_possible_complications_sequelae,
-        emergency_measures=consents_emergency_measures,
-        mortality_risk=consents_mortality_risk
-    )
+    # 실패한 섹션은 기본값(빈 문자열과 빈 참조 리스트)
+    consents, references = assemble_consent(section_results)
 
-    references_surgery_method_content = SurgeryDetailsReference(
-        overall_description=references_overall_description,
-        estimated_duration=references_estimated_duration,
-        method_change_or_addition=references_method_change_or_addition,
-        transfusion_possibility=references_transfusion_possibility,
-        surgeon_change_possibility=references_surgeon_change_possibility
-    )
+    if budget.degraded:
+        logger.warning(f"deadline 때문에 degrade된 섹션: {budget.degraded}")
+
+    # 일부 섹션이 실패했거나 degrade된 결과는 캐시하지 않음
+    if not failed_tasks and not budget.degraded:
+        set_cached_consent(fingerprint, consents, references)
+
+    yield "done", {"consents": consents, "references": references, "degraded_sections": dict(budget.degraded), "profile": profile.name}
+
+
+async def generate_consent_with_status(payload: ConsentGenerateIn, timeout: float | None = None,
+                                       mode: str | None = None) -> tuple[ConsentBase, ReferenceBase, dict[str, str]]:
+    """동의서 생성 + degrade된 섹션 정보 ({섹션: 사유})"""
+    async for event, data in stream_consent(payload, timeout, mode):
+        if event == "done":
+            return data["consents"], data["references"], data["degraded_sections"]
+    raise RuntimeError("동의서 생성 스트림이 결과 없이 종료되었습니다.")
 
-    references = ReferenceBase(
-        prognosis_without_surgery=references_prognosis_without_surgery,
-        alternative_treatments=references_alternative_treatments,
-        surgery_purpose_necessity_effect=references_surgery_purpose_necessity_effect,
-        surgery_method_content=references_surgery_method_content,
-        possible_complications_sequelae=references_possible_complications_sequelae,
-        emergency_measures=references_emergency_measures,
-        mortality_risk=references_mortality_risk
-    )
 
+async def regenerate_sections(payload: ConsentGenerateIn, consents: ConsentBase, references: ReferenceBase, sections: list[str],
+                              timeout: float | None = None) -> tuple[ConsentBase, ReferenceBase, dict[str, str]]:
+    """
+    기존 동의서에서 지정한 섹션만 수정된 입력으로 다시 생성해 병합
+
+    같은 DAG에서 요청한 섹션 노드와 그 의존 노드만 실행하므로 번역·키워드 추출(preprocess 캐시)과
+    검색(검색 캐시)은 이전 요청 결과를 재사용하고, LLM 호출은 요청한 섹션 수만큼만 발생한다.
+    섹션이 쓰는 입력 필드가 바뀌지 않았으면 섹션 캐시 결과가 그대로 반환된다.
+    다시 생성하지 못한 섹션은 기존 내용을 유지하고 degrade 사유 "failed"로 보고한다.
+
+    Returns:
+        (병합된 ConsentBase, 병합된 ReferenceBase, degrade된 섹션 → 사유)
+    """
+    unknown = [task_name for task_name in sections if task_name not in SECTION_NAMES]
+    if unknown:
+        raise ValueError(f"알 수 없는 섹션입니다: {', '.join(unknown)}")
+    sections = list(dict.fromkeys(sections))
+
+    deidentified_payload = preprocess(payload)
+    profile = get_profile(payload.profile)
+    budget = RequestBudget(get_settings().consent_deadline if timeout is None else timeout)
+
+    logger.info(f"섹션 재생성 시작: {', '.join(sections)}")
+    dag = build_consent_dag(deidentified_payload, "sections", profile)
+    budget_context(budget).run(dag.start, sections)
+    try:
+        outcomes = await asyncio.gather(*[_run_section(dag, task_name) for task_name in sections])
+    finally:
+        dag.cancel()
+    logger.info(f"섹션 재생성 단계별 시간(ms): {dag.timing_summary()}")
+
+    section_results = _cached_section_results(consents, references)
+    degraded = dict(budget.degraded)
+    for task_name, result, error in outcomes:
+        if error is not None:
+            logger.error(f"작업 '{task_name}' 재생성 실패, 기존 내용 유지: {error}")
+            degraded[task_name] = "failed"
+        else:
+            section_results[task_name] = result
+    # 일부만 바뀐 결과라 전체 결과 캐시에는 저장하지 않음
+    merged_consents, merged_references = assemble_consent(section_results)
+    # 섹션이 아닌 항목(기타 동의서 정보)은 기존 값 유지
+    merged_consents.consent_information = consents.consent_information
+    return merged_consents, merged_references, degraded
+
+
+async def generate_consent(payload: ConsentGenerateIn) -> tuple[ConsentBase, ReferenceBase]:
+    """
+    Graph-RAG 파이프라인 준비 전 임시 동의서 목업 (Async 병렬 처리 버전)
+    """
+    consents, references, _ = await generate_consent_with_status(payload)
     return consents, references
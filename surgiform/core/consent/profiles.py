@@ -0,0 +1,83 @@
+"""
+동의서 생성 프로필 (fast / balanced / thorough)
+
+모델 후보·품질 하한, 자유 기술 항목 키워드 추출(검색 fan-out), 키워드당 evidence 후보 수(k),
+섹션 evidence 토큰 예산, 재시도 횟수, LLM evidence 검증 여부를 이름 하나로 묶는다.
+외래 진료실에서는 fast로 10초 안팎의 응답을, 야간 일괄 생성에서는 thorough로 품질 우선 결과를 얻는다.
+"""
+
+from dataclasses import dataclass
+
+from surgiform.deploy.settings import get_settings
+
+
+@dataclass(frozen=True)
+class ConsentProfile:
+    name: str
+    # 모델 라우터 후보 (우선순위 순). None이면 LLM_ROUTER_MODELS 설정
+    models: tuple[str, ...] | None
+    # 후보로 쓸 최소 품질 등급. None이면 LLM_ROUTER_QUALITY_FLOOR 설정
+    quality_floor: int | None
+    # 환자 상태·기타 특이사항에서 LLM으로 키워드를 추출해 추가 검색할지 여부
+    extract_keywords: bool
+    # 섹션별로 재정렬한 뒤 키워드당 남길 evidence 후보 수
+    k: int
+    # 섹션 evidence 토큰 예산 (섹션 비율 적용 전). None이면 CONSENT_EVIDENCE_TOKEN_BUDGET 설정
+    evidence_token_budget: int | None
+    # rate limit 재시도를 포함한 섹션당 최대 LLM 호출 수
+    max_attempts: int
+    # 섹션당 LLM 1회로 evidence 후보를 검증할지 여부. None이면 CONSENT_LLM_VALIDATION 설정
+    llm_validation: bool | None = None
+
+    @property
+    def uses_llm_validation(self) -> bool:
+        return get_settings().consent_llm_validation if self.llm_validation is None else self.llm_validation
+
+    def versions(self) -> list:
+        """캐시 키에 포함할 프로필 설정"""
+        return [self.name, self.models, self.quality_floor, self.extract_keywords, self.k, self.evidence_token_budget, self.uses_llm_validation]
+
+
+CONSENT_PROFILES = {
+    # 빠른 모델, 입력값 키워드만 검색, 작은 evidence, 재시도 최소화, LLM evidence 검증 없음
+    "fast": ConsentProfile(
+        name="fast",
+        models=("gpt-4.1-mini", "gpt-4.1", "gpt-4o-mini"),
+        quality_floor=2,
+        extract_keywords=False,
+        k=5,
+        evidence_token_budget=1000,
+        max_attempts=2,
+        llm_validation=False,
+    ),
+    # 기존 기본 동작 (설정의 모델 후보·evidence 예산)
+    "balanced": ConsentProfile(
+        name="balanced",
+        models=None,
+        quality_floor=None,
+        extract_keywords=True,
+        k=10,
+        evidence_token_budget=None,
+        max_attempts=5,
+    ),
+    # 품질 우선 (상위 모델만, 넓은 evidence, LLM evidence 검증)
+    "thorough": ConsentProfile(
+        name="thorough",
+        models=("gpt-5", "gpt-5-mini", "gpt-4.1"),
+        quality_floor=4,
+        extract_keywords=True,
+        k=20,
+        evidence_token_budget=4000,
+        max_attempts=5,
+        llm_validation=True,
+    ),
+}
+
+
+def get_profile(name: str | None = None) -> ConsentProfile:
+    """이름으로 프로필 조회 (없으면 CONSENT_PROFILE 설정)"""
+    # API 모델의 ConsentProfileName(Enum)도 받음
+    name = getattr(name, "value", name) or get_settings().consent_profile
+    if name not in CONSENT_PROFILES:
+        raise ValueError(f"지원하지 않는 생성 프로필입니다: {name} (지원: {', '.join(CONSENT_PROFILES)})")
+    return CONSENT_PROFILES[name]
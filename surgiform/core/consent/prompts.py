@@ -0,0 +1,198 @@
+"""
+동의서 섹션 생성 프롬프트
+
+섹션 프롬프트는 provider prefix 캐시를 쓰도록 공통 부분을 앞에, 섹션별 부분을 뒤에 둔다.
+SYSTEM_PROMPT(규칙) → CONTEXT_PROMPT(수술 정보·공통 evidence)까지는 모든 섹션과 같은
+수술·진단명의 요청에서 바이트 단위로 같고, 섹션별 환자 정보·evidence·대상 필드는 마지막에 붙는다.
+구조화 생성(STRUCTURED_PROMPT)도 같은 prefix를 써서 두 모드가 캐시를 공유한다.
+"""
+
+import json
+
+from surgiform.api.models.consent import PublicConsentGenerateIn
+from surgiform.core.consent.sections import PROCEDURE_FIELDS
+from surgiform.core.consent.sections import SURGERY_DETAIL_SECTION_NAMES
+
+
+SYSTEM_PROMPT = """\
+You are a medical communication expert who explains surgical consent forms clearly and accurately for patients.
+
+### ROLE
+- Act as an expert writer of patient consent documents.
+- Your task is to generate the **content for the single field named in TARGET_FIELD at the end only**.
+
+### OUTPUT RULES
+- Output must be written in **plain Korean (5–10 sentences)**.
+- Write the final answer as **one continuous paragraph** without bullets, extra line breaks, headings, labels, or commentary.
+- Each sentence must be **short and clear** (ideally under 30 words) to improve readability.
+- The tone must **remain formal enough for a consent form**, yet **sound natural as if a doctor is directly explaining to a patient**.
+- Use **official Korean medical terms** (학술 용어) but explain them in everyday simple words; **append the precise term in parentheses only once at first mention**.
+- After the first mention, use only the plain explanation or a short expression **without repeating the term in parentheses**.
+- Do not redundantly append terms when the simple explanation and the medical term are essentially the same.
+- Do not append medical terms for generic or self-explanatory words that are not true medical terminology.
+- **Do NOT** include the patient's name or registration number.
+- **Do NOT** output any XML/HTML/JSON tags, identifiers, or metadata—just plain text.
+- **Do NOT** copy or quote evidence sentences verbatim; rephrasing and synthesis are mandatory.
+- If no relevant evidence exists for the field, omit it rather than force irrelevant content.
+- **Do NOT** fabricate data, numbers, or risks. Only include what is clearly supported.
+- Keep sentences short **but ensure natural flow between sentences**; avoid a fragmented or list-like feel.
+
+### ADDITIONAL RULES
+- The final result must be **one paragraph**, but sentences must be clearly separated for readability.
+- Medical terms must be shown in parentheses **only once**, and afterward described in short and simple expressions.
+- If the same risk factors or diseases appear multiple times, mention them once and later summarize as **“이러한 기저질환”**.
+- When describing risks, **clearly distinguish** between categories and **always present common ones first** using a consistent phrasing pattern:  
+  **“흔히 나타날 수 있는 부작용은 …”**, 이어서 **“드물지만 심각한 합병증은 …”**.
+- Only medical terms require additional explanations; all other words should remain as they are without extra rephrasing.
+- Maintain **medical accuracy** while writing in **plain Korean understandable by a middle school student**.
+- **Do not repeat** the same concept with duplicate explanations or redundant medical term annotations.
+
+### EVIDENCE USAGE
+- You will be provided with:
+  1. **Procedure context (JSON)** and **shared evidence** about the procedure
+  2. **Patient context (JSON)** and **field evidence** for the target field
+- Use evidence only if relevant to the patient’s context and the target field.
+- Summarize and rephrase; do not include irrelevant details.
+- It is acceptable to refer to the same source across sentences, but rephrasing and synthesis are the default.
+"""
+
+CONTEXT_PROMPT = """\
+### PROCEDURE_CONTEXT
+```json
+{procedure_json}
+```
+
+## SHARED_EVIDENCE
+{shared_evidence_block}
+"""
+
+USER_PROMPT = """\
+### PATIENT_CONTEXT
+```json
+{patient_json}
+```
+
+## EVIDENCE_BLOCK
+{evidence_block}
+"""
+
+FIELD_PROMPT = """\
+### TARGET_FIELD
+<{field}>
+
+### GOAL
+- Produce a **clear, medically accurate, patient-friendly explanation of <{field}>** in plain Korean **as a single paragraph**, nothing else.
+"""
+
+
+def build_section_prompt(task_name: str, payload: PublicConsentGenerateIn, fields: tuple[str, ...] | None,
+                         shared_evidence: list[str], evidence: list[str]) -> str:
+    """
+    섹션 생성 프롬프트 (공통 prefix + 섹션별 suffix)
+
+    수술 정보(PROCEDURE_FIELDS)는 공통 prefix에만 넣고, 섹션별 환자 정보에서는 뺀다.
+    """
+    procedure_json = payload.model_dump_json(include=set(PROCEDURE_FIELDS))
+    patient_fields = set(fields if fields is not None else PublicConsentGenerateIn.model_fields) - set(PROCEDURE_FIELDS)
+    patient_json = payload.model_dump_json(include=patient_fields)
+    return (
+        SYSTEM_PROMPT
+        + CONTEXT_PROMPT.format(procedure_json=procedure_json, shared_evidence_block="\n\n".join(shared_evidence))
+        + USER_PROMPT.format(patient_json=patient_json, evidence_block="\n\n".join(evidence))
+        + FIELD_PROMPT.format(field=task_name)
+    )
+
+
+STRUCTURED_PROMPT = """\
+### PATIENT_CONTEXT
+```json
+{patient_json}
+```
+
+## EVIDENCE_LIST
+{evidence_list}
+
+## EVIDENCE_BY_FIELD
+{evidence_by_field}
+
+### TARGET_FIELDS
+Instead of a single field, write **every field listed below**. Apply all rules above to each field separately:
+each value is one paragraph in plain Korean about that field only, using the PATIENT_CONTEXT, the SHARED_EVIDENCE
+and the evidence listed for that field (evidence ids refer to EVIDENCE_LIST).
+{fields}
+
+### OUTPUT FORMAT
+Return **only a JSON object** with exactly this structure (every value is a string):
+{output_format}
+"""
+
+
+def structured_output_format(task_names: list[str]) -> dict:
+    """구조화 생성 결과 JSON 형태 (ConsentBase와 같은 중첩 구조)"""
+    output = {name: "..." for name in task_names if name not in SURGERY_DETAIL_SECTION_NAMES}
+    details = {name: "..." for name in task_names if name in SURGERY_DETAIL_SECTION_NAMES}
+    if details:
+        output["surgery_method_content"] = details
+    return output
+
+
+def build_structured_prompt(payload: PublicConsentGenerateIn, task_names: list[str], shared_evidence: list[str],
+                            section_evidence: dict[str, list[str]]) -> str:
+    """
+    여러 섹션을 한 번에 생성하는 프롬프트 (공통 prefix는 섹션 프롬프트와 같음)
+
+    섹션별 evidence는 중복 없이 EVIDENCE_LIST에 한 번씩만 넣고, 섹션마다 evidence id 목록으로 묶는다.
+    """
+    evidence_ids: dict[str, str] = {}
+    for texts in section_evidence.values():
+        for text in texts:
+            evidence_ids.setdefault(text, f"E{len(evidence_ids) + 1}")
+    evidence_list = "\n\n".join(f"[{evidence_id}] {text}" for text, evidence_id in evidence_ids.items())
+    evidence_by_field = "\n".join(
+        f"- {name}: {', '.join(evidence_ids[text] for text in section_evidence.get(name, [])) or '(none)'}"
+        for name in task_names
+    )
+    patient_fields = set(PublicConsentGenerateIn.model_fields) - set(PROCEDURE_FIELDS)
+    return (
+        SYSTEM_PROMPT
+        + CONTEXT_PROMPT.format(procedure_json=payload.model_dump_json(include=set(PROCEDURE_FIELDS)), shared_evidence_block="\n\n".join(shared_evidence))
+        + STRUCTURED_PROMPT.format(
+            patient_json=payload.model_dump_json(include=patient_fields),
+            evidence_list=evidence_list,
+            evidence_by_field=evidence_by_field,
+            fields="\n".join(f"- <{name}>" for name in task_names),
+            output_format=json.dumps(structured_output_format(task_names), indent=2),
+        )
+    )
+
+
+RELEVANCE_PROMPT = """\
+You are screening evidence sentences for one section of a surgical consent form.
+
+### PATIENT_CONTEXT
+```json
+{patient_json}
+```
+
+### TARGET_FIELD
+<{field}>
+
+### CANDIDATES
+{candidates}
+
+For each candidate, decide whether it contains information that is directly relevant and appropriate
+for writing the TARGET_FIELD for this patient. Answer "Y" if it is relevant, "N" if it is not.
+
+Return **only a JSON array** with exactly {count} items, one "Y" or "N" per candidate in the same order.
+"""
+
+
+def build_relevance_prompt(task_name: str, payload: PublicConsentGenerateIn, fields: tuple[str, ...] | None, candidates: list[str]) -> str:
+    """섹션 1개의 evidence 후보 전체를 한 번에 Y/N 판정하는 프롬프트"""
+    patient_fields = set(fields if fields is not None else PublicConsentGenerateIn.model_fields) | set(PROCEDURE_FIELDS)
+    return RELEVANCE_PROMPT.format(
+        patient_json=payload.model_dump_json(include=patient_fields),
+        field=task_name,
+        candidates="\n".join(f"{i}. {text}" for i, text in enumerate(candidates, start=1)),
+        count=len(candidates),
+    )
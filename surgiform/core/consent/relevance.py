@@ -0,0 +1,156 @@
+"""
+섹션 evidence 관련성 필터
+
+검색 후보 중 환자·섹션과 관련 없는 문장을 프롬프트에 넣기 전에 걸러낸다.
+
+1. 로컬 점수 (LLM 호출 없음): 환자 문맥(번역된 진단·수술명, 섹션 검색 키워드) 용어 겹침,
+   섹션명 용어 겹침, 문장의 `entities` 필드와 환자 문맥 일치
+2. (선택) LLM 검증: 섹션당 1회 호출로 남은 후보 전체의 Y/N 목록을 받아 N인 문장 제외
+
+예전 설계(문장마다 allm_validater 호출, 동의서당 수백 회)를 대체한다. LLM 검증이 실패하거나
+시간을 넘기면 로컬 필터 결과를 그대로 쓴다.
+"""
+
+import re
+import json
+import asyncio
+import logging
+
+from surgiform.api.models.consent import PublicConsentGenerateIn
+from surgiform.core.deadline import current_budget
+from surgiform.core.text import tokenize
+from surgiform.core.consent.evidence import evidence_key
+from surgiform.core.consent.evidence import fuse_evidence
+from surgiform.core.consent.prompts import build_relevance_prompt
+from surgiform.core.consent.retrieval import section_terms
+from surgiform.external.openai_client import get_model_router
+from surgiform.external.openai_client import llm_priority_config
+from surgiform.deploy.settings import get_settings
+
+# 로깅 설정
+logger = logging.getLogger(__name__)
+
+# 점수 가중치 (합 1.0)
+LEXICAL_WEIGHT = 0.5
+SECTION_WEIGHT = 0.2
+ENTITY_WEIGHT = 0.3
+# 환자 문맥 용어가 이 개수 이상 겹치면 lexical 점수 1.0
+LEXICAL_SATURATION = 3
+# 일치하는 entity가 이 개수 이상이면 entity 점수 1.0
+ENTITY_SATURATION = 2
+
+# 나이 키워드("45 years old") 등에서 나오는 관련성과 무관한 용어
+_CONTEXT_STOPWORDS = {"or", "and", "of", "the", "with", "without", "years", "old", "year"}
+_ANSWER_PATTERN = re.compile(r"\[.*\]", re.DOTALL)
+
+
+def context_terms(diagnosis: str, surgery_name: str, keywords: list[str]) -> set[str]:
+    """환자 문맥 용어 (번역된 진단·수술명 + 섹션 검색 키워드)"""
+    terms = set(tokenize(" ".join([diagnosis, surgery_name, *keywords])))
+    return {term for term in terms if term not in _CONTEXT_STOPWORDS and not term.isdigit()}
+
+
+def relevance_score(hit: dict, context: set[str], section: set[str]) -> float:
+    """환자 문맥·섹션명 용어 겹침과 entities 일치로 계산한 0~1 점수"""
+    hit_terms = set(tokenize(f"{hit['text']} {hit.get('title', '')} {hit.get('section', '')}"))
+    lexical = min(1.0, len(context & hit_terms) / LEXICAL_SATURATION)
+    section_overlap = len(section & hit_terms) / len(section) if section else 0.0
+    # entity는 여러 단어일 수 있으므로 용어 하나라도 환자 문맥과 겹치면 일치
+    matched_entities = sum(bool(set(tokenize(entity)) & context) for entity in hit.get("entities") or [])
+    entity = min(1.0, matched_entities / ENTITY_SATURATION)
+    return LEXICAL_WEIGHT * lexical + SECTION_WEIGHT * section_overlap + ENTITY_WEIGHT * entity
+
+
+def filter_relevant(result_lists: list[list[dict]], task_name: str, context: set[str], min_score: float | None = None) -> list[list[dict]]:
+    """
+    키워드별 후보에서 로컬 관련성 점수가 min_score 미만인 문장 제외 (순위는 유지)
+
+    Returns:
+        list[list[dict]]: 같은 구조의 결과 (hit마다 `relevance` 점수 추가)
+    """
+    min_score = get_settings().consent_relevance_min_score if min_score is None else min_score
+    section = section_terms(task_name)
+    filtered = []
+    total = kept = 0
+    for hits in result_lists:
+        scored = [{**hit, "relevance": relevance_score(hit, context, section)} for hit in hits]
+        filtered.append([hit for hit in scored if hit["relevance"] >= min_score])
+        total += len(hits)
+        kept += len(filtered[-1])
+    if kept < total:
+        logger.debug(f"작업 '{task_name}': 관련성 필터로 evidence 후보 {total - kept}/{total}개 제외")
+    return filtered
+
+
+def parse_verdicts(content: str, count: int) -> list[bool] | None:
+    """LLM 응답의 Y/N JSON 배열을 bool 목록으로 변환 (형식·개수가 맞지 않으면 None)"""
+    match = _ANSWER_PATTERN.search(content)
+    if match is None:
+        return None
+    try:
+        answers = json.loads(match.group(0))
+    except json.JSONDecodeError:
+        return None
+    if not isinstance(answers, list) or len(answers) != count:
+        return None
+    verdicts = []
+    for answer in answers:
+        answer = str(answer).strip().upper()
+        if answer not in ("Y", "N"):
+            return None
+        verdicts.append(answer == "Y")
+    return verdicts
+
+
+async def validate_with_llm(result_lists: list[list[dict]], task_name: str, payload: PublicConsentGenerateIn,
+                            fields: tuple[str, ...] | None, priority: str, exclude_texts: set[str] | None = None) -> list[list[dict]]:
+    """
+    섹션당 LLM 1회로 evidence 후보 전체를 Y/N 판정해 N인 문장 제외
+
+    후보는 RRF 통합 순위 상위 CONSENT_LLM_VALIDATION_MAX_CANDIDATES개만 판정하고, 그 밖의 후보와
+    공통 evidence(exclude_texts)는 그대로 둔다. 호출 실패·시간 초과·응답 형식 오류 시 입력을 그대로 반환.
+    """
+    settings = get_settings()
+    exclude_texts = exclude_texts or set()
+    candidates = [hit for hit in fuse_evidence(result_lists) if hit["text"] not in exclude_texts]
+    candidates = candidates[:settings.consent_llm_validation_max_candidates]
+    if not candidates:
+        return result_lists
+
+    prompt = build_relevance_prompt(task_name, payload, fields, [hit["text"] for hit in candidates])
+    try:
+        response = await asyncio.wait_for(
+            get_model_router().ainvoke(settings.consent_llm_validation_model, prompt, config=llm_priority_config(priority)),
+            current_budget().timeout(settings.consent_llm_validation_timeout),
+        )
+    except Exception as e:
+        logger.warning(f"작업 '{task_name}': evidence LLM 검증 실패, 로컬 필터 결과 사용: {type(e).__name__}: {e}")
+        return result_lists
+
+    verdicts = parse_verdicts(response.content, len(candidates))
+    if verdicts is None:
+        logger.warning(f"작업 '{task_name}': evidence LLM 검증 응답 형식 오류, 로컬 필터 결과 사용")
+        return result_lists
+
+    rejected = {evidence_key(hit) for hit, verdict in zip(candidates, verdicts) if not verdict}
+    logger.debug(f"작업 '{task_name}': evidence LLM 검증 완료 - {len(candidates) - len(rejected)}/{len(candidates)}개 유효")
+    return [[hit for hit in hits if evidence_key(hit) not in rejected] for hits in result_lists]
+
+
+async def filter_section_evidence(processed_payload, plan, task_name: str, result_lists: list[list[dict]],
+                                  fields: tuple[str, ...] | None, priority: str, exclude_texts: set[str] | None = None,
+                                  llm_validation: bool | None = None) -> list[list[dict]]:
+    """
+    섹션 evidence 후보 관련성 필터 (CONSENT_RELEVANCE_FILTER면 로컬 점수, 프로필이 켜면 LLM 검증 1회)
+
+    Args:
+        plan: 동의서의 RetrievalPlan (섹션 검색 키워드를 환자 문맥으로 사용)
+        llm_validation: LLM 검증 사용 여부 (None이면 프로필 설정)
+    """
+    if get_settings().consent_relevance_filter:
+        context = context_terms(processed_payload.diagnosis, processed_payload.surgery_name, plan.section_keywords(fields))
+        result_lists = filter_relevant(result_lists, task_name, context)
+    if processed_payload.profile.uses_llm_validation if llm_validation is None else llm_validation:
+        result_lists = await validate_with_llm(result_lists, task_name, processed_payload.payload, fields, priority,
+                                               exclude_texts=exclude_texts)
+    return result_lists
@@ -0,0 +1,91 @@
+"""
+동의서 전체 결과 캐시
+
+같은 양식을 다시 제출하는 경우가 많아, 비식별화된 입력(preprocess 결과)과
+모델·프롬프트 버전으로 만든 fingerprint가 같으면 저장된 ConsentBase/ReferenceBase를
+LLM 호출 없이 그대로 돌려준다. 검색 인덱스 generation이 바뀌면 전체 무효화된다.
+"""
+
+import json
+import hashlib
+import logging
+from functools import lru_cache
+
+from surgiform.api.models.consent import PublicConsentGenerateIn
+from surgiform.api.models.base import ConsentBase
+from surgiform.api.models.base import ReferenceBase
+from surgiform.core.cache import AsyncTTLCache
+from surgiform.core.cache import SingleFlight
+from surgiform.deploy.settings import get_settings
+
+# 로깅 설정
+logger = logging.getLogger(__name__)
+
+
+def text_version(*texts: str) -> str:
+    """프롬프트 문자열 버전 (내용이 바뀌면 자동으로 바뀜)"""
+    return hashlib.sha256("\x1f".join(texts).encode("utf-8")).hexdigest()[:12]
+
+
+def consent_fingerprint(payload: PublicConsentGenerateIn, versions: dict) -> str:
+    """
+    비식별화된 입력 + 생성 설정 버전의 정규화된 해시
+
+    필드 순서·공백과 무관하도록 키를 정렬한 JSON으로 직렬화한다.
+    """
+    canonical = json.dumps(
+        {"payload": payload.model_dump(mode="json"), "versions": versions},
+        ensure_ascii=False,
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+@lru_cache
+def get_consent_cache() -> AsyncTTLCache:
+    """fingerprint → (ConsentBase, ReferenceBase) 캐시 (워커당 1개)"""
+    settings = get_settings()
+    return AsyncTTLCache("consent", maxsize=settings.consent_cache_maxsize, ttl=settings.consent_cache_ttl)
+
+
+@lru_cache
+def get_consent_singleflight() -> SingleFlight:
+    """fingerprint별 실행 중인 동의서 생성 (중복 제출을 하나로 합침, 워커당 1개)"""
+    return SingleFlight("consent")
+
+
+def get_cached_consent(fingerprint: str) -> tuple[ConsentBase, ReferenceBase] | None:
+    """캐시된 결과의 사본 (없으면 None)"""
+    cache = get_consent_cache()
+    found, value = cache.get(fingerprint)
+    if not found:
+        cache.misses += 1
+        return None
+    cache.hits += 1
+    consents, references = value
+    # 호출 측에서 결과를 수정해도 캐시가 오염되지 않도록 사본 반환
+    return consents.model_copy(deep=True), references.model_copy(deep=True)
+
+
+def set_cached_consent(fingerprint: str, consents: ConsentBase, references: ReferenceBase) -> None:
+    get_consent_cache().set(fingerprint, (consents.model_copy(deep=True), references.model_copy(deep=True)))
+
+
+@lru_cache
+def get_section_cache() -> AsyncTTLCache:
+    """섹션 fingerprint → (본문, references) 캐시 (워커당 1개)"""
+    settings = get_settings()
+    return AsyncTTLCache("consent_section", maxsize=settings.consent_section_cache_maxsize, ttl=settings.consent_section_cache_ttl)
+
+
+def section_fingerprint(task_name: str, payload: PublicConsentGenerateIn, fields: tuple[str, ...] | None, versions: dict) -> str:
+    """섹션이 사용하는 입력 필드만으로 만든 fingerprint (fields가 None이면 전체 필드)"""
+    section_payload = payload.model_dump(mode="json", include=set(fields) if fields is not None else None)
+    canonical = json.dumps(
+        {"section": task_name, "payload": section_payload, "versions": versions},
+        ensure_ascii=False,
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
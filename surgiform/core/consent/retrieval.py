@@ -0,0 +1,235 @@
+"""
+동의서 1건 단위 검색 계획 (섹션 간 중복 검색 제거)
+
+11개 섹션이 모두 같은 키워드 목록을 쓰므로, (keyword, diagnosis, surgery) 조합별로
+한 번만 검색한 뒤 섹션명 용어 일치도를 가산점으로 섹션별 재정렬한다.
+"""
+
+import asyncio
+import logging
+
+from surgiform.api.models.consent import Gender
+from surgiform.core.ingest.uptodate.run_es import get_es_responses
+from surgiform.core.ingest.uptodate.run_es import get_knn_responses
+from surgiform.external.openai_client import get_query_embeddings
+from surgiform.deploy.settings import get_settings
+from surgiform.core.consent.evidence_pack import get_evidence_pack
+from surgiform.core.text import tokenize
+from surgiform.core.consent.evidence import fuse_evidence
+
+# 로깅 설정
+logger = logging.getLogger(__name__)
+
+# 섹션별 재정렬을 위해 키워드당 넉넉하게 가져올 후보 수
+PLAN_CANDIDATES_K = 30
+# 섹션명 용어가 모두 일치할 때 점수에 더해지는 비율
+SECTION_BOOST = 0.5
+
+_SECTION_STOPWORDS = {"or", "and", "of", "the", "without", "with"}
+
+
+def section_terms(task_name: str) -> set[str]:
+    """섹션명(task_name)에서 재정렬에 쓸 용어 집합"""
+    return {term for term in tokenize(task_name.replace("_", " ")) if term not in _SECTION_STOPWORDS}
+
+
+# SpecialCondition 플래그 → 검색 키워드 (필드명 그대로 사용)
+SPECIAL_CONDITION_KEYWORDS = (
+    "past_history",
+    "diabetes",
+    "smoking",
+    "hypertension",
+    "allergy",
+    "cardiovascular",
+    "respiratory",
+    "coagulation",
+    "medications",
+    "renal",
+    "drug_abuse",
+)
+
+# 환자와 무관하게 고정된 어휘라 미리 계산(evidence pack)할 수 있는 키워드
+COMMON_KEYWORDS = ("male", "female", *SPECIAL_CONDITION_KEYWORDS)
+
+
+# 수술·진단명만으로 검색하는 기본 키워드 (모든 섹션이 사용)
+PROCEDURE_KEYWORD = ""
+# evidence pack에서 섹션 재정렬 없는 공통 evidence 순위를 저장하는 섹션 키
+SHARED_SECTION = ""
+
+
+def base_keyword_sources(payload) -> list[tuple[str, str]]:
+    """LLM 키워드 추출 없이 입력값만으로 만드는 (검색 키워드, 출처 입력 필드) 목록"""
+    special_conditions = payload.special_conditions
+
+    sources = [
+        (PROCEDURE_KEYWORD, "surgery_name"),
+        (f"{payload.age} years old", "age"),
+        ("male" if payload.gender is Gender.male else "female", "gender"),
+        (f"{payload.surgical_site_mark}", "surgical_site_mark"),
+        *[(keyword if getattr(special_conditions, keyword) else None, "special_conditions") for keyword in SPECIAL_CONDITION_KEYWORDS],
+    ]
+    return [(keyword, field) for keyword, field in sources if keyword is not None]
+
+
+def extracted_keyword_sources(patient_condition_keys: list[str], special_conditions_other_keys: list[str]) -> list[tuple[str, str]]:
+    """자유 기술 항목에서 LLM으로 추출한 키워드의 (검색 키워드, 출처 입력 필드) 목록"""
+    return [
+        *[(keyword, "patient_condition") for keyword in patient_condition_keys],
+        *[(keyword, "special_conditions") for keyword in special_conditions_other_keys],
+    ]
+
+
+def build_query(diagnosis: str, surgery_name: str, keyword: str) -> str:
+    """섹션과 무관한 공통 검색 쿼리"""
+    return f"{diagnosis} {surgery_name} {keyword}".strip()
+
+
+def section_score(hit: dict, terms: set[str]) -> float:
+    """섹션명 용어 일치 비율로 가산한 점수"""
+    if not terms:
+        return hit["score"]
+    hit_terms = set(tokenize(f"{hit['text']} {hit['title']} {hit['section']}"))
+    overlap = len(terms & hit_terms) / len(terms)
+    return hit["score"] * (1 + SECTION_BOOST * overlap)
+
+
+async def hybrid_search(queries: list[str], k: int = PLAN_CANDIDATES_K, score_threshold: float = 1) -> list[list[dict]]:
+    """
+    BM25(_msearch)와 kNN(embedding)을 함께 실행해 쿼리별로 RRF 통합
+
+    쿼리 임베딩은 동의서 1건의 쿼리를 한 번에 배치로 요청하고 디스크에 캐시한다.
+    BM25와 kNN 점수는 척도가 달라 통합 후 `score`는 RRF 점수로 바꾼다.
+    """
+    loop = asyncio.get_running_loop()
+    bm25_task = asyncio.ensure_future(get_es_responses(queries, k=k, score_threshold=score_threshold))
+    try:
+        vectors = await loop.run_in_executor(None, get_query_embeddings, queries)
+        knn_results = await get_knn_responses(vectors, k=k)
+    except Exception as e:
+        logger.error(f"kNN 검색 실패, BM25 결과만 사용: {type(e).__name__}: {e}")
+        knn_results = [[] for _ in queries]
+    bm25_results = await bm25_task
+
+    results = []
+    for bm25_hits, knn_hits in zip(bm25_results, knn_results):
+        fused = fuse_evidence([bm25_hits, knn_hits], top_n=k)
+        results.append([{**hit, "score": hit["rrf_score"]} for hit in fused])
+    return results
+
+
+def rank_for_section(hits: list[dict], task_name: str, k: int = 10) -> list[dict]:
+    """검색 후보를 섹션명 가산점으로 재정렬해 상위 k개 반환"""
+    terms = section_terms(task_name)
+    rescored = [{**hit, "score": section_score(hit, terms)} for hit in hits]
+    rescored.sort(key=lambda hit: hit["score"], reverse=True)
+    return rescored[:k]
+
+
+class RetrievalPlan:
+    """동의서 1건의 고유 검색 조합과 그 결과"""
+
+    def __init__(self, keywords: list[str], queries: list[str], results: list[list[dict] | None], pack=None, pack_key: tuple[str, str] | None = None,
+                 keyword_fields: list[set[str]] | None = None):
+        self.keywords = keywords
+        self.queries = queries
+        # evidence pack으로 대체된 키워드는 None
+        self.results = results
+        self.pack = pack
+        self.pack_key = pack_key
+        # 키워드별 출처 입력 필드 (섹션이 쓰지 않는 필드에서 나온 키워드는 제외)
+        self.keyword_fields = keyword_fields if keyword_fields is not None else [set() for _ in keywords]
+
+    @classmethod
+    async def search(cls, payload, diagnosis: str, surgery_name: str, keyword_sources: list[tuple[str, str]],
+                     k: int = PLAN_CANDIDATES_K, score_threshold: float = 1) -> "RetrievalPlan":
+        """
+        주어진 키워드만 검색하는 계획 실행
+
+        Args:
+            payload: 비식별화된 입력 (evidence pack 조회 키)
+            diagnosis, surgery_name: 번역된 진단명·수술명 (검색 쿼리)
+            keyword_sources: (검색 키워드, 출처 입력 필드) 목록
+        """
+        sources: dict[str, set[str]] = {}
+        for keyword, field in keyword_sources:
+            sources.setdefault(keyword, set()).add(field)
+        keywords = list(sources)
+        queries = [build_query(diagnosis, surgery_name, keyword) for keyword in keywords]
+
+        pack = get_evidence_pack()
+        pack_key = (payload.surgery_name, payload.diagnosis)
+        packed = [pack is not None and pack.covers(*pack_key, keyword) for keyword in keywords]
+
+        live_queries = [query for query, is_packed in zip(queries, packed) if not is_packed]
+        search = hybrid_search if get_settings().retrieval_mode == "hybrid" else get_es_responses
+        live_results = iter(await search(live_queries, k=k, score_threshold=score_threshold) if live_queries else [])
+        results = [None if is_packed else next(live_results) for is_packed in packed]
+
+        logger.info(f"검색 계획 실행 완료: 고유 쿼리 수={len(queries)}, evidence pack 사용={sum(packed)}")
+        return cls(keywords, queries, results, pack=pack, pack_key=pack_key, keyword_fields=[sources[keyword] for keyword in keywords])
+
+    @classmethod
+    def merge(cls, plans: list["RetrievalPlan"]) -> "RetrievalPlan":
+        """여러 단계로 나눠 실행한 검색 계획을 하나로 합침 (같은 키워드는 먼저 나온 결과 사용)"""
+        merged = cls([], [], [], keyword_fields=[])
+        positions: dict[str, int] = {}
+        for plan in plans:
+            merged.pack = merged.pack or plan.pack
+            merged.pack_key = merged.pack_key or plan.pack_key
+            for keyword, query, hits, fields in zip(plan.keywords, plan.queries, plan.results, plan.keyword_fields):
+                if keyword in positions:
+                    merged.keyword_fields[positions[keyword]] |= fields
+                    continue
+                positions[keyword] = len(merged.keywords)
+                merged.keywords.append(keyword)
+                merged.queries.append(query)
+                merged.results.append(hits)
+                merged.keyword_fields.append(set(fields))
+        return merged
+
+    def attribute(self, keyword_sources: list[tuple[str, str]]) -> None:
+        """이미 검색한 키워드에 출처 입력 필드 추가 (다른 단계에서 같은 키워드가 나온 경우)"""
+        positions = {keyword: i for i, keyword in enumerate(self.keywords)}
+        for keyword, field in keyword_sources:
+            if keyword in positions:
+                self.keyword_fields[positions[keyword]].add(field)
+
+    def shared_hits(self, k: int = 5) -> list[dict]:
+        """
+        수술 기본 키워드(PROCEDURE_KEYWORD)의 검색 결과 상위 k개 (섹션 재정렬 없음)
+
+        모든 섹션 프롬프트의 공통 prefix에 들어가므로 섹션과 무관하게 같은 순서를 유지한다.
+        evidence pack에는 같은 순위가 SHARED_SECTION 키로 저장되어 있다.
+        """
+        if k <= 0 or PROCEDURE_KEYWORD not in self.keywords:
+            return []
+        hits = self.results[self.keywords.index(PROCEDURE_KEYWORD)]
+        if hits is None:
+            return (self.pack.get(*self.pack_key, SHARED_SECTION, PROCEDURE_KEYWORD) or [])[:k]
+        return hits[:k]
+
+    def _uses_keyword(self, keyword: str, keyword_fields: set[str], fields: tuple[str, ...] | None) -> bool:
+        """fields가 주어지면 그 입력 필드에서 나온 키워드만 사용 (수술 기본 키워드는 항상 포함)"""
+        return fields is None or keyword == PROCEDURE_KEYWORD or bool(keyword_fields & set(fields))
+
+    def section_keywords(self, fields: tuple[str, ...] | None = None) -> list[str]:
+        """섹션이 사용하는 검색 키워드 (hits_for_section과 같은 범위)"""
+        return [keyword for keyword, keyword_fields in zip(self.keywords, self.keyword_fields)
+                if self._uses_keyword(keyword, keyword_fields, fields)]
+
+    def hits_for_section(self, task_name: str, k: int = 10, fields: tuple[str, ...] | None = None) -> list[list[dict]]:
+        """
+        키워드별 후보를 섹션명 가산점으로 재정렬해 상위 k개씩 반환
+
+        fields가 주어지면 그 입력 필드에서 나온 키워드만 사용 (수술 기본 키워드는 항상 포함)
+        """
+        section_results = []
+        for keyword, hits, keyword_fields in zip(self.keywords, self.results, self.keyword_fields):
+            if not self._uses_keyword(keyword, keyword_fields, fields):
+                continue
+            if hits is None:
+                section_results.append(self.pack.get(*self.pack_key, task_name, keyword)[:k])
+            else:
+                section_results.append(rank_for_section(hits, task_name, k))
+        return section_results
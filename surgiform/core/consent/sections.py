@@ -0,0 +1,51 @@
+"""동의서 섹션(필드) 목록"""
+
+# generate_consent가 병렬로 생성하는 섹션 (ConsentBase / SurgeryDetails 필드명)
+SECTION_NAMES = (
+    "overall_description",
+    "estimated_duration",
+    "method_change_or_addition",
+    "transfusion_possibility",
+    "surgeon_change_possibility",
+    "prognosis_without_surgery",
+    "alternative_treatments",
+    "surgery_purpose_necessity_effect",
+    "possible_complications_sequelae",
+    "emergency_measures",
+    "mortality_risk",
+)
+
+# SurgeryDetails(수술 방법 및 내용) 하위 섹션
+SURGERY_DETAIL_SECTION_NAMES = (
+    "overall_description",
+    "estimated_duration",
+    "method_change_or_addition",
+    "transfusion_possibility",
+    "surgeon_change_possibility",
+)
+
+# 섹션별로 실제 사용하는 입력 필드 (PublicConsentGenerateIn 필드명)
+# 프롬프트의 환자 정보와 검색 키워드를 이 필드로 제한하고, 섹션 캐시 키도 이 필드로만 만든다.
+# 환자 의존도가 낮은 섹션은 다른 환자 사이에서도 캐시를 공유한다.
+PROCEDURE_FIELDS = ("surgery_name", "diagnosis")
+
+SECTION_DEPENDENCIES = {
+    "overall_description": (*PROCEDURE_FIELDS, "surgical_site_mark"),
+    "estimated_duration": PROCEDURE_FIELDS,
+    "method_change_or_addition": PROCEDURE_FIELDS,
+    "transfusion_possibility": (*PROCEDURE_FIELDS, "special_conditions"),
+    "surgeon_change_possibility": (*PROCEDURE_FIELDS, "participants"),
+    "prognosis_without_surgery": (*PROCEDURE_FIELDS, "age", "patient_condition"),
+    "alternative_treatments": (*PROCEDURE_FIELDS, "age", "patient_condition"),
+    "surgery_purpose_necessity_effect": (*PROCEDURE_FIELDS, "patient_condition"),
+    "possible_complications_sequelae": (
+        *PROCEDURE_FIELDS, "age", "gender", "surgical_site_mark", "patient_condition", "special_conditions", "possum_score",
+    ),
+    "emergency_measures": (*PROCEDURE_FIELDS, "patient_condition", "special_conditions"),
+    "mortality_risk": (*PROCEDURE_FIELDS, "age", "patient_condition", "special_conditions", "possum_score"),
+}
+
+
+def section_dependencies(task_name: str) -> tuple[str, ...] | None:
+    """섹션이 사용하는 입력 필드 (등록되지 않은 섹션은 None → 전체 필드)"""
+    return SECTION_DEPENDENCIES.get(task_name)
@@ -0,0 +1,113 @@
+"""
+구조화 출력 1회로 여러 섹션 생성 (structured 생성 모드)
+
+섹션별 호출은 같은 규칙·환자 정보·겹치는 evidence를 섹션마다 다시 보내므로, 대량 생성에서는
+모든 섹션을 JSON 응답 한 번으로 만든다. evidence는 섹션별로 선택한 뒤 중복 없이 한 번씩만
+넣고 섹션마다 evidence id로 묶는다. 응답은 ConsentBase 모델로 검증하며, 검증에 실패한
+섹션만 섹션별 호출로 다시 생성한다 (pipeline.build_consent_dag).
+"""
+
+import json
+import logging
+
+from pydantic import ValidationError
+
+from surgiform.api.models.base import ConsentBase
+from surgiform.core.consent.evidence import select_evidence
+from surgiform.core.consent.relevance import filter_section_evidence
+from surgiform.core.consent.prompts import build_structured_prompt
+from surgiform.core.consent.profiles import ConsentProfile
+from surgiform.core.consent.sections import SURGERY_DETAIL_SECTION_NAMES
+from surgiform.core.consent.sections import section_dependencies
+from surgiform.deploy.settings import get_settings
+from surgiform.external.openai_client import get_model_router
+from surgiform.external.openai_client import llm_priority_config
+
+# 로깅 설정
+logger = logging.getLogger(__name__)
+
+
+def _reference(hit: dict) -> dict:
+    return {"url": hit["url"], "title": hit["title"], "text": hit["text"]}
+
+
+def validate_structured_output(content: str, task_names: list[str]) -> tuple[dict[str, str], list[str]]:
+    """
+    구조화 응답을 ConsentBase로 검증
+
+    Returns:
+        (검증을 통과한 섹션 → 본문, 실패한 섹션 목록). 요청하지 않은 섹션의 오류는 무시
+    """
+    try:
+        data = json.loads(content)
+    except (TypeError, json.JSONDecodeError):
+        return {}, list(task_names)
+    if not isinstance(data, dict):
+        return {}, list(task_names)
+
+    failed = set()
+    try:
+        ConsentBase.model_validate(data)
+    except ValidationError as e:
+        for error in e.errors():
+            loc = error["loc"]
+            if loc[0] == "surgery_method_content":
+                # 세부 항목 오류면 그 항목만, 객체 자체가 잘못되었으면 세부 항목 전체
+                failed.update([loc[1]] if len(loc) > 1 else SURGERY_DETAIL_SECTION_NAMES)
+            else:
+                failed.add(loc[0])
+
+    valid = {}
+    for task_name in task_names:
+        if task_name in failed:
+            continue
+        container = data.get("surgery_method_content") if task_name in SURGERY_DETAIL_SECTION_NAMES else data
+        text = container.get(task_name) if isinstance(container, dict) else None
+        # 빈 문자열도 생성 실패로 처리
+        if isinstance(text, str) and text.strip():
+            valid[task_name] = text
+    return valid, [task_name for task_name in task_names if task_name not in valid]
+
+
+async def generate_structured_sections(processed_payload, task_names: list[str], priority: str, profile: ConsentProfile) -> dict[str, tuple[str, list]]:
+    """
+    여러 섹션을 구조화 출력 1회로 생성
+
+    Returns:
+        검증을 통과한 섹션 → (본문, references). 실패한 섹션은 포함하지 않음
+    """
+    settings = get_settings()
+    router = get_model_router()
+    model_name = router.choose(models=profile.models, quality_floor=profile.quality_floor)
+
+    plan = processed_payload.retrieval_plan
+    shared_hits = plan.shared_hits(k=settings.consent_shared_evidence_top_n) if plan.queries else []
+    shared_texts = {hit["text"] for hit in shared_hits}
+    section_hits = {}
+    for task_name in task_names:
+        if not plan.queries:
+            section_hits[task_name] = []
+            continue
+        fields = section_dependencies(task_name)
+        results = plan.hits_for_section(task_name, k=profile.k, fields=fields)
+        # 호출 1회로 줄이는 모드이므로 섹션별 LLM 검증은 하지 않고 로컬 관련성 필터만 적용
+        results = await filter_section_evidence(processed_payload, plan, task_name, results, fields, priority, llm_validation=False)
+        section_hits[task_name] = select_evidence(results, task_name, model_name, exclude_texts=shared_texts,
+                                                  token_budget=profile.evidence_token_budget).hits
+
+    prompt = build_structured_prompt(
+        processed_payload.payload,
+        task_names,
+        [hit["text"] for hit in shared_hits],
+        {task_name: [hit["text"] for hit in hits] for task_name, hits in section_hits.items()},
+    )
+    logger.debug(f"구조화 생성 호출 중... (모델: {model_name}, 섹션 {len(task_names)}개)")
+    response = await router.ainvoke(model_name, prompt, config=llm_priority_config(priority), response_format={"type": "json_object"})
+
+    valid, failed = validate_structured_output(response.content, task_names)
+    if failed:
+        logger.warning(f"구조화 생성 검증 실패 섹션 {len(failed)}개 (섹션별 생성으로 대체): {', '.join(failed)}")
+    return {
+        task_name: (text, [_reference(hit) for hit in [*shared_hits, *section_hits[task_name]]])
+        for task_name, text in valid.items()
+    }
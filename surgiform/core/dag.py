@@ -0,0 +1,103 @@
+"""
+비동기 단계(DAG) 스케줄러
+
+각 노드는 의존 노드의 결과가 모두 준비되는 즉시 시작한다 (전체 단계를 기다리는 barrier 없음).
+노드별로 대기·실행 시간을 기록해 어느 단계가 지연의 원인인지 확인할 수 있다.
+"""
+
+import time
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable
+
+# 로깅 설정
+logger = logging.getLogger(__name__)
+
+
+class AsyncDAG:
+    """노드 = (이름, 비동기 함수, 의존 노드). 함수는 의존 노드 결과를 순서대로 인자로 받음"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._nodes: dict[str, tuple[Callable[..., Awaitable[Any]], tuple[str, ...]]] = {}
+        self._tasks: dict[str, asyncio.Task] = {}
+        self._started_at: float | None = None
+        self.timings: dict[str, dict] = {}
+
+    def add(self, name: str, func: Callable[..., Awaitable[Any]], deps: tuple[str, ...] = ()) -> None:
+        if name in self._nodes:
+            raise ValueError(f"이미 등록된 노드입니다: {name}")
+        for dep in deps:
+            if dep not in self._nodes:
+                raise ValueError(f"노드 '{name}'의 의존 노드가 먼저 등록되어야 합니다: {dep}")
+        self._nodes[name] = (func, deps)
+
+    def start(self, targets: list[str] | None = None) -> None:
+        """
+        노드를 task로 시작 (각 노드는 의존 노드 완료 시점에 실제 실행)
+
+        targets가 주어지면 그 노드와 의존 노드만 시작한다. 나머지 노드는 result()로
+        처음 요청될 때 시작된다 (일부 섹션만 다시 생성하는 경우 등).
+        """
+        if self._started_at is None:
+            self._started_at = time.perf_counter()
+        # 등록 순서가 위상 정렬 순서이므로 의존 노드의 task가 항상 먼저 만들어짐
+        for name in self._nodes if targets is None else targets:
+            self._ensure(name)
+
+    def _ensure(self, name: str) -> asyncio.Task:
+        if name not in self._tasks:
+            for dep in self._nodes[name][1]:
+                self._ensure(dep)
+            task = asyncio.ensure_future(self._run(name))
+            # 아무도 결과를 기다리지 않는 노드의 예외가 "never retrieved" 경고로 남지 않도록
+            task.add_done_callback(_consume_exception)
+            self._tasks[name] = task
+        return self._tasks[name]
+
+    async def _run(self, name: str) -> Any:
+        func, deps = self._nodes[name]
+        timing = self.timings.setdefault(name, {"status": "waiting"})
+        try:
+            # 의존 노드 하나가 실패하면 이 노드도 같은 예외로 실패
+            args = [await asyncio.shield(self._tasks[dep]) for dep in deps]
+            timing["started_ms"] = self._elapsed_ms()
+            timing["status"] = "running"
+            result = await func(*args)
+        except asyncio.CancelledError:
+            timing["status"] = "cancelled"
+            raise
+        except Exception:
+            timing["status"] = "failed"
+            raise
+        else:
+            timing["status"] = "done"
+            return result
+        finally:
+            timing["finished_ms"] = self._elapsed_ms()
+            if "started_ms" in timing:
+                timing["duration_ms"] = timing["finished_ms"] - timing["started_ms"]
+
+    def _elapsed_ms(self) -> float:
+        return round((time.perf_counter() - self._started_at) * 1000, 1)
+
+    def task(self, name: str) -> asyncio.Task:
+        if self._started_at is None:
+            self.start()
+        return self._ensure(name)
+
+    async def result(self, name: str) -> Any:
+        return await asyncio.shield(self.task(name))
+
+    def cancel(self) -> None:
+        for task in self._tasks.values():
+            task.cancel()
+
+    def timing_summary(self) -> dict[str, dict]:
+        """노드별 시작·종료 시각(DAG 시작 기준 ms)과 실행 시간"""
+        return {name: dict(timing) for name, timing in self.timings.items()}
+
+
+def _consume_exception(task: asyncio.Task) -> None:
+    if not task.cancelled():
+        task.exception()
@@ -0,0 +1,57 @@
+"""
+요청 단위 deadline과 degrade 기록
+
+동의서 요청 1건의 남은 시간을 contextvar로 전달해, 요청에서 파생된 모든 task의
+ES·LLM 호출이 같은 deadline을 보고 타임아웃을 줄이거나 빠른 모델·placeholder로
+대체(degrade)한다. 어떤 섹션이 왜 degrade되었는지는 RequestBudget에 모인다.
+"""
+
+import time
+import contextvars
+
+
+class RequestBudget:
+    """요청 1건의 deadline과 degrade된 섹션 기록"""
+
+    def __init__(self, timeout: float | None):
+        # timeout이 None이거나 0 이하면 deadline 없음
+        self.expires_at = time.monotonic() + timeout if timeout and timeout > 0 else None
+        self.degraded: dict[str, str] = {}
+
+    def remaining(self) -> float | None:
+        """남은 시간(초). deadline이 없으면 None"""
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        remaining = self.remaining()
+        return remaining is not None and remaining <= 0
+
+    def timeout(self, default: float | None = None) -> float | None:
+        """호출 1회에 줄 타임아웃 (기본값과 남은 시간 중 작은 값)"""
+        remaining = self.remaining()
+        if remaining is None:
+            return default
+        return remaining if default is None else min(default, remaining)
+
+    def mark_degraded(self, section: str, reason: str) -> None:
+        # 더 심한 degrade(placeholder)가 빠른 모델 기록을 덮어씀
+        if self.degraded.get(section) != "placeholder":
+            self.degraded[section] = reason
+
+
+_current_budget: contextvars.ContextVar[RequestBudget | None] = contextvars.ContextVar("request_budget", default=None)
+
+
+def current_budget() -> RequestBudget:
+    """현재 task의 요청 budget (설정되지 않았으면 deadline 없는 빈 budget)"""
+    return _current_budget.get() or RequestBudget(None)
+
+
+def budget_context(budget: RequestBudget) -> contextvars.Context:
+    """budget이 설정된 context (ctx.run으로 task를 만들면 그 task와 하위 task에 전달됨)"""
+    context = contextvars.copy_context()
+    context.run(_current_budget.set, budget)
+    return context
@@ -0,0 +1,125 @@
+"""
+LLM 호출 hedging (꼬리 지연 완화)
+
+섹션 11개를 병렬로 생성하면 호출 1개의 p99 지연이 동의서 전체의 p50이 된다.
+호출이 모델별로 실측한 지연 백분위(threshold)가 지나도록 끝나지 않으면 같은(또는 더 빠른)
+모델로 중복 요청을 보내 먼저 끝난 응답을 쓰고 나머지는 취소한다. 추가 비용은
+전체 호출 대비 hedge 비율(budget)로 제한한다.
+"""
+
+import time
+import asyncio
+import logging
+from collections import deque
+from functools import lru_cache
+from typing import Any, Awaitable, Callable
+
+from surgiform.deploy.settings import get_settings
+
+# 로깅 설정
+logger = logging.getLogger(__name__)
+
+
+class HedgedCaller:
+    """모델별 지연 분포를 기록하고 threshold를 넘긴 호출에 중복 요청을 보냄"""
+
+    def __init__(self, name: str, percentile: float = 0.95, min_samples: int = 20, budget: float = 0.1, window: int = 500):
+        self.name = name
+        self.percentile = percentile
+        # 분포가 충분히 쌓이기 전에는 hedge하지 않음
+        self.min_samples = min_samples
+        # 전체 호출 중 hedge할 수 있는 최대 비율
+        self.budget = budget
+        self._latencies: dict[str, deque] = {}
+        self._window = window
+        self.calls = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.budget_skips = 0
+
+    def record(self, model: str, latency: float) -> None:
+        self._latencies.setdefault(model, deque(maxlen=self._window)).append(latency)
+
+    def threshold(self, model: str) -> float | None:
+        """hedge를 보낼 대기 시간(초). 표본이 부족하면 None"""
+        latencies = self._latencies.get(model)
+        if not latencies or len(latencies) < self.min_samples:
+            return None
+        ordered = sorted(latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * self.percentile))]
+
+    def _within_budget(self) -> bool:
+        return self.hedged < self.budget * self.calls
+
+    async def call(self, model: str, primary: Callable[[], Awaitable[Any]],
+                   hedge_model: str | None = None, hedge: Callable[[], Awaitable[Any]] | None = None) -> Any:
+        """
+        primary를 실행하고 threshold 안에 끝나지 않으면 hedge도 실행해 먼저 성공한 결과 반환
+
+        Args:
+            model: primary 호출 모델 (지연 분포 키)
+            primary: 원래 호출
+            hedge_model: 중복 요청 모델 (None이면 model과 같음)
+            hedge: 중복 요청 (None이면 primary를 다시 호출)
+        """
+        hedge_model = hedge_model or model
+        hedge = hedge or primary
+        self.calls += 1
+        primary_task = asyncio.ensure_future(primary())
+        # task → (모델, 시작 시각)
+        tasks = {primary_task: (model, time.perf_counter())}
+        try:
+            threshold = self.threshold(model)
+            if threshold is not None:
+                done, _ = await asyncio.wait({primary_task}, timeout=threshold)
+                if not done:
+                    if self._within_budget():
+                        self.hedged += 1
+                        logger.debug(f"{self.name}: {model} 응답이 {threshold:.1f}초를 넘어 {hedge_model}로 hedge 요청")
+                        tasks[asyncio.ensure_future(hedge())] = (hedge_model, time.perf_counter())
+                    else:
+                        self.budget_skips += 1
+
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                # 동시에 끝났으면 성공한 쪽을 먼저 확인
+                for task in sorted(done, key=lambda task: task.exception() is not None):
+                    # 한쪽이 실패해도 다른 쪽이 남아 있으면 그 결과를 기다림
+                    if task.exception() is not None and pending:
+                        continue
+                    result = task.result()
+                    now = time.perf_counter()
+                    for other, (other_model, other_started) in tasks.items():
+                        # 취소되는 primary의 지연은 최소한 지금까지 걸린 시간이므로 그 값으로 기록
+                        # (빠른 응답만 남아 threshold가 점점 낮아지지 않도록)
+                        if other is task or other is primary_task:
+                            self.record(other_model, now - other_started)
+                    if task is not primary_task:
+                        self.hedge_wins += 1
+                    return result
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def stats(self) -> dict:
+        return {
+            "calls": self.calls,
+            "hedged": self.hedged,
+            "hedge_wins": self.hedge_wins,
+            "budget_skips": self.budget_skips,
+            "hedge_rate": round(self.hedged / self.calls, 3) if self.calls else 0.0,
+            "thresholds_s": {model: round(threshold, 2) for model in self._latencies if (threshold := self.threshold(model)) is not None},
+        }
+
+
+@lru_cache
+def get_llm_hedger() -> HedgedCaller:
+    """섹션 생성 LLM 호출용 hedger (워커당 1개)"""
+    settings = get_settings()
+    return HedgedCaller(
+        "llm",
+        percentile=settings.llm_hedge_percentile,
+        min_samples=settings.llm_hedge_min_samples,
+        budget=settings.llm_hedge_budget,
+    )
@@ -25,6 +25,80 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 from surgiform.core.ingest.uptodate.medical_parser import MedicalDocumentParser
 from surgiform.external.es_client import get_es_client
 from surgiform.external.openai_client import get_openai_client
+from surgiform.external.openai_client import EMBEDDING_MODEL
+
+
+def extract_simple_entities(text):
+    """간단한 엔티티 추출"""
+    keywords = ['surgery', 'treatment', 'cancer', 'diagnosis', 'therapy']
+    entities = []
+    text_lower = text.lower()
+    
+    for keyword in keywords:
+        if keyword in text_lower:
+            entities.append(keyword)
+    
+    return entities[:3]
+
+
+def build_sentence_records(json_file):
+    """
+    크롤링한 JSON 문서 1개를 파싱해 인덱싱할 레코드 생성
+
+    fast-sentences 인덱스와 로컬 BM25 인덱스(local_bm25)가 같은 레코드를 쓴다.
+
+    Returns:
+        (document, sentences) 또는 문장이 없으면 None
+    """
+    # JSON 로드
+    with open(json_file, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    
+    title = data.get('title', 'Unknown')
+    url = data.get('url', f'file://{json_file}')
+    content = data.get('content', '')
+    
+    # 파싱
+    parser = MedicalDocumentParser(url)
+    parser.parse_html(content)
+    
+    if not parser.sentences:
+        return None
+    
+    clean_title = title.replace(' - UpToDate', '').strip()
+    document = {
+        "url": url,
+        "title": clean_title,
+        "sentence_count": len(parser.sentences),
+        "created_at": datetime.now().isoformat()
+    }
+    
+    # 제목 문장
+    sentence_data = []
+    title_id = f"title_{hashlib.md5(url.encode()).hexdigest()[:8]}"
+    sentence_data.append({
+        "sentence_id": title_id,
+        "document_url": url,
+        "text": clean_title,
+        "document_title": clean_title,
+        "section": "TITLE",
+        "entities": extract_simple_entities(clean_title),
+        "created_at": datetime.now().isoformat()
+    })
+    
+    # 일반 문장 (최대 150개)
+    for sentence in parser.sentences[:150]:
+        sentence_data.append({
+            "sentence_id": sentence.sentence_id,
+            "document_url": url,
+            "text": sentence.text,
+            "document_title": clean_title,
+            "section": sentence.section[:20] if sentence.section else "",
+            "entities": sentence.medical_entities[:3],
+            "created_at": datetime.now().isoformat()
+        })
+    
+    return document, sentence_data
 
 
 class UltraFastMedicalRAG:
@@ -129,7 +203,7 @@ class UltraFastMedicalRAG:
             clean_texts = [t[:6000] if len(t) > 6000 else t for t in texts]
             
             response = self.openai_client.embeddings.create(
-                model="text-embedding-ada-002",
+                model=EMBEDDING_MODEL,
                 input=clean_texts
             )
             return [item.embedding for item in response.data]
@@ -140,70 +214,25 @@ class UltraFastMedicalRAG:
     def index_document_ultra_fast(self, json_file):
         """초고속 문서 인덱싱"""
         try:
-            # JSON 로드
-            with open(json_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            
-            title = data.get('title', 'Unknown')
-            url = data.get('url', f'file://{json_file}')
-            content = data.get('content', '')
-            
-            # 파싱
-            parser = MedicalDocumentParser(url)
-            parser.parse_html(content)
-            
-            if not parser.sentences:
+            parsed = build_sentence_records(json_file)
+            if parsed is None:
                 return False
+            document, sentence_data = parsed
             
             # 액션 준비
             actions = []
             
             # 1. 문서 메타데이터
-            clean_title = title.replace(' - UpToDate', '').strip()
             actions.append({
                 "_index": self.indices["documents"],
-                "_id": url,
-                "_source": {
-                    "url": url,
-                    "title": clean_title,
-                    "sentence_count": len(parser.sentences),
-                    "created_at": datetime.now().isoformat()
-                }
+                "_id": document["url"],
+                "_source": document
             })
             
-            # 2. 문장 데이터
-            texts = [clean_title]  # 제목 먼저
-            sentence_data = []
-            
-            # 제목 문장
-            title_id = f"title_{hashlib.md5(url.encode()).hexdigest()[:8]}"
-            sentence_data.append({
-                "sentence_id": title_id,
-                "document_url": url,
-                "text": clean_title,
-                "document_title": clean_title,
-                "section": "TITLE",
-                "entities": self.extract_simple_entities(clean_title),
-                "created_at": datetime.now().isoformat()
-            })
-            
-            # 일반 문장 (최대 150개)
-            for sentence in parser.sentences[:150]:
-                texts.append(sentence.text)
-                sentence_data.append({
-                    "sentence_id": sentence.sentence_id,
-                    "document_url": url,
-                    "text": sentence.text,
-                    "document_title": clean_title,
-                    "section": sentence.section[:20] if sentence.section else "",
-                    "entities": sentence.medical_entities[:3],
-                    "created_at": datetime.now().isoformat()
-                })
+            # 2. 임베딩 (선택적, 제목 먼저)
+            embeddings = self.get_embeddings([data["text"] for data in sentence_data])
             
-            # 3. 임베딩 (선택적)
-            embeddings = self.get_embeddings(texts)
-            
-            # 4. 문장 액션 생성
+            # 3. 문장 액션 생성
             for data, embedding in zip(sentence_data, embeddings):
                 if embedding:
                     data["embedding"] = embedding
@@ -214,7 +243,7 @@ class UltraFastMedicalRAG:
                     "_source": data
                 })
             
-            # 5. 배치 인덱싱
+            # 4. 배치 인덱싱
             success_count = 0
             for success, info in parallel_bulk(
                 self.es_client, actions, 
@@ -232,15 +261,7 @@ class UltraFastMedicalRAG:
     
     def extract_simple_entities(self, text):
         """간단한 엔티티 추출"""
-        keywords = ['surgery', 'treatment', 'cancer', 'diagnosis', 'therapy']
-        entities = []
-        text_lower = text.lower()
-        
-        for keyword in keywords:
-            if keyword in text_lower:
-                entities.append(keyword)
-        
-        return entities[:3]
+        return extract_simple_entities(text)
     
     def batch_index_ultra_fast(self, directory, max_files=None, workers=8):
         """초고속 배치 처리"""
@@ -303,6 +324,9 @@ class UltraFastMedicalRAG:
         for index in self.indices.values():
             self.es_client.indices.refresh(index=index)
         
+        # 검색 캐시 무효화용 generation 스탬프 기록
+        self.stamp_generation()
+        
         return {
             "success": len(successful),
             "failed": len(failed), 
@@ -310,6 +334,20 @@ class UltraFastMedicalRAG:
             "time": total_time
         }
     
+    def stamp_generation(self):
+        """
+        문장 인덱스 _meta에 새 generation 스탬프 기록
+
+        API 워커의 검색 캐시(run_es)는 이 값이 바뀌면 전체 무효화된다.
+        """
+        generation = datetime.now().isoformat()
+        self.es_client.indices.put_mapping(
+            index=self.indices["sentences"],
+            meta={"generation": generation}
+        )
+        print(f"🔖 Index generation: {generation}")
+        return generation
+    
     def search_fast(self, query, k=10):
         """초고속 검색"""
         start_time = time.time()
@@ -0,0 +1,296 @@
+"""
+Elasticsearch 없이 쓰는 프로세스 내 BM25 검색 엔진
+
+UltraFastMedicalRAG가 fast-sentences에 넣는 것과 같은 문장 레코드로 필드별
+역색인을 만들어 mmap 파일(core/mmap_file 포맷)로 저장한다. 단일 노드 배포나
+ES 장애 시 fallback으로 쓰며, 검색 결과는 get_es_response와 같은 dict 형태다.
+
+점수는 ES multi_match(best_fields) 기본값과 같게 필드별 BM25(k1=1.2, b=0.75)에
+boost를 곱한 값 중 최댓값을 쓴다.
+
+    python -m surgiform.core.ingest.uptodate.local_bm25 \
+        --directory data/uptodate/general-surgery --output data/fast-sentences.bm25
+    python -m surgiform.core.ingest.uptodate.local_bm25 --from-es --output data/fast-sentences.bm25
+"""
+
+import os
+import sys
+import glob
+import json
+import logging
+from collections import Counter
+from datetime import datetime
+
+import numpy as np
+from tqdm import tqdm
+
+from surgiform.deploy.settings import get_settings
+from surgiform.core.mmap_file import MmapFile
+from surgiform.core.mmap_file import write_mmap_file
+from surgiform.core.text import tokenize
+
+# 로깅 설정
+logger = logging.getLogger(__name__)
+
+MAGIC = b"SFBM25v1"
+FORMAT_VERSION = 1
+
+# ES 검색과 같은 필드·boost ("text^2", "document_title", "entities")
+FIELD_BOOSTS = {"text": 2.0, "document_title": 1.0, "entities": 1.0}
+
+# BM25 파라미터 (ES 기본값)
+K1 = 1.2
+B = 0.75
+
+def _field_text(record: dict, field: str) -> str:
+    value = record.get(field) or ""
+    return " ".join(value) if isinstance(value, list) else value
+
+
+def build_local_index(records, path: str, index_generation=None) -> dict:
+    """
+    문장 레코드(fast-sentences _source 형태)로 로컬 BM25 인덱스 파일 생성
+
+    Args:
+        records: sentence_id, document_url, text, document_title, section, entities를 가진 dict iterable
+        path: 출력 파일 경로
+        index_generation: 원본 인덱스 generation 스탬프 (있으면 기록)
+
+    Returns:
+        dict: 문서 수와 필드별 어휘 크기
+    """
+    blobs: list[bytes] = []
+    postings: dict[str, dict[str, list[tuple[int, int]]]] = {field: {} for field in FIELD_BOOSTS}
+    lengths: dict[str, list[int]] = {field: [] for field in FIELD_BOOSTS}
+    seen_ids = set()
+
+    for record in records:
+        # 같은 sentence_id는 ES에서 덮어쓰므로 하나만 유지
+        if record["sentence_id"] in seen_ids:
+            continue
+        seen_ids.add(record["sentence_id"])
+
+        doc_id = len(blobs)
+        blobs.append(json.dumps({
+            "id": record["sentence_id"],
+            "url": record["document_url"],
+            "text": record["text"],
+            "title": record["document_title"],
+            "section": record.get("section", ""),
+            "entities": record.get("entities", []),
+        }, ensure_ascii=False).encode("utf-8"))
+
+        for field in FIELD_BOOSTS:
+            tokens = tokenize(_field_text(record, field))
+            lengths[field].append(len(tokens))
+            for term, tf in Counter(tokens).items():
+                postings[field].setdefault(term, []).append((doc_id, tf))
+
+    header = {
+        "version": FORMAT_VERSION,
+        "created_at": datetime.now().isoformat(),
+        "index_generation": index_generation,
+        "doc_count": len(blobs),
+        "fields": {},
+    }
+    arrays = {}
+    for field, boost in FIELD_BOOSTS.items():
+        vocabulary = {}
+        docs: list[int] = []
+        tfs: list[int] = []
+        for term in sorted(postings[field]):
+            term_postings = postings[field][term]
+            vocabulary[term] = [len(docs), len(term_postings)]
+            docs.extend(doc_id for doc_id, _ in term_postings)
+            tfs.extend(tf for _, tf in term_postings)
+
+        field_lengths = np.asarray(lengths[field], dtype="<f4")
+        header["fields"][field] = {
+            "boost": boost,
+            "avgdl": float(field_lengths.mean()) if len(field_lengths) else 0.0,
+            "vocabulary": vocabulary,
+        }
+        arrays[f"{field}.doc_lengths"] = field_lengths
+        arrays[f"{field}.postings_docs"] = np.asarray(docs, dtype="<u4")
+        arrays[f"{field}.postings_tf"] = np.asarray(tfs, dtype="<f4")
+
+    write_mmap_file(path, MAGIC, header, arrays, blobs)
+    return {
+        "doc_count": len(blobs),
+        "vocabulary": {field: len(postings[field]) for field in FIELD_BOOSTS},
+    }
+
+
+class LocalBM25Index:
+    """mmap으로 연 로컬 BM25 인덱스 (읽기 전용)"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = MmapFile(path, MAGIC)
+        header = self._file.header
+
+        self.created_at = header["created_at"]
+        self.index_generation = header["index_generation"]
+        self.doc_count = header["doc_count"]
+        self._fields = header["fields"]
+
+    def search(self, query: str, k: int = 100) -> list[dict]:
+        """
+        BM25 검색
+
+        Returns:
+            list[dict]: 점수 내림차순 hit (get_es_response와 같은 형태)
+        """
+        terms = set(tokenize(query))
+        if not terms or not self.doc_count:
+            return []
+
+        best = np.zeros(self.doc_count, dtype=np.float32)
+        for field, meta in self._fields.items():
+            field_scores = self._field_scores(field, meta, terms)
+            if field_scores is not None:
+                np.maximum(best, meta["boost"] * field_scores, out=best)
+
+        matched = np.flatnonzero(best)
+        if not len(matched):
+            return []
+        if len(matched) > k:
+            matched = matched[np.argpartition(best[matched], -k)[-k:]]
+        matched = matched[np.argsort(best[matched])[::-1]]
+
+        return [{**json.loads(self._file.blob(int(doc_id))), "score": float(best[doc_id])} for doc_id in matched]
+
+    def _field_scores(self, field: str, meta: dict, terms: set[str]) -> np.ndarray | None:
+        vocabulary = meta["vocabulary"]
+        spans = [vocabulary[term] for term in terms if term in vocabulary]
+        if not spans:
+            return None
+
+        arrays = self._file.arrays
+        doc_lengths = arrays[f"{field}.doc_lengths"]
+        postings_docs = arrays[f"{field}.postings_docs"]
+        postings_tf = arrays[f"{field}.postings_tf"]
+        avgdl = meta["avgdl"] or 1.0
+
+        scores = np.zeros(self.doc_count, dtype=np.float32)
+        for start, length in spans:
+            docs = postings_docs[start:start + length]
+            tf = postings_tf[start:start + length]
+            idf = np.log(1 + (self.doc_count - length + 0.5) / (length + 0.5))
+            norm = K1 * (1 - B + B * doc_lengths[docs] / avgdl)
+            # 한 term의 posting 안에서 문서는 중복되지 않음
+            scores[docs] += idf * tf * (K1 + 1) / (tf + norm)
+        return scores
+
+    def stats(self) -> dict:
+        return {
+            "path": self.path,
+            "created_at": self.created_at,
+            "index_generation": self.index_generation,
+            "doc_count": self.doc_count,
+        }
+
+    def close(self) -> None:
+        self._file.close()
+
+
+_local_index: LocalBM25Index | None = None
+
+
+def load_local_index(path: str | None = None) -> LocalBM25Index | None:
+    """설정된 로컬 BM25 인덱스를 열어 워커 전역으로 등록 (없으면 None)"""
+    global _local_index
+    path = path or get_settings().local_bm25_index_path
+    if not path:
+        return None
+    if not os.path.exists(path):
+        logger.warning(f"로컬 BM25 인덱스 파일이 없습니다: {path}")
+        return None
+
+    try:
+        index = LocalBM25Index(path)
+    except Exception as e:
+        logger.error(f"로컬 BM25 인덱스 로드 실패: {type(e).__name__}: {e}")
+        return None
+
+    close_local_index()
+    _local_index = index
+    logger.info(f"로컬 BM25 인덱스 로드 완료: {index.stats()}")
+    return index
+
+
+def close_local_index() -> None:
+    global _local_index
+    if _local_index is not None:
+        _local_index.close()
+        _local_index = None
+
+
+def get_local_index() -> LocalBM25Index | None:
+    return _local_index
+
+
+def search_local(queries: list[str], k: int = 100, score_threshold: float = 50) -> list[list[dict]]:
+    """로컬 인덱스로 여러 쿼리 검색 (score_threshold 필터는 filter_score와 동일)"""
+    index = get_local_index()
+    if index is None:
+        return [[] for _ in queries]
+    return [
+        [hit for hit in index.search(query, k) if hit["score"] >= score_threshold]
+        for query in queries
+    ]
+
+
+def iter_records_from_directory(directory: str, max_files: int | None = None):
+    """크롤링한 JSON 문서 디렉터리에서 문장 레코드 생성 (fast-sentences 색인과 동일)"""
+    from surgiform.core.ingest.uptodate.fast_medical_rag import build_sentence_records
+
+    json_files = glob.glob(os.path.join(directory, "*.json"))
+    if max_files:
+        json_files = json_files[:max_files]
+
+    for json_file in tqdm(json_files, desc="📚 BM25", unit="docs"):
+        try:
+            parsed = build_sentence_records(json_file)
+        except Exception as e:
+            print(f"❌ Error parsing {os.path.basename(json_file)}: {e}")
+            continue
+        if parsed is not None:
+            yield from parsed[1]
+
+
+def iter_records_from_es(index: str = "fast-sentences"):
+    """이미 색인된 fast-sentences 인덱스를 그대로 내려받아 문장 레코드 생성"""
+    from elasticsearch.helpers import scan
+    from surgiform.external.es_client import get_es_client
+
+    source_fields = ["sentence_id", "document_url", "text", "document_title", "section", "entities"]
+    for hit in tqdm(scan(get_es_client(), index=index, _source=source_fields), desc="📚 BM25", unit="sentences"):
+        yield hit["_source"]
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="로컬 BM25 인덱스 생성")
+    parser.add_argument("--directory", default="data/uptodate/general-surgery")
+    parser.add_argument("--max-files", type=int)
+    parser.add_argument("--from-es", action="store_true", help="JSON 대신 fast-sentences 인덱스에서 생성")
+    parser.add_argument("--output", default="data/fast-sentences.bm25")
+    parser.add_argument("--search", help="생성 후 테스트 검색어")
+
+    args = parser.parse_args()
+
+    try:
+        records = iter_records_from_es() if args.from_es else iter_records_from_directory(args.directory, args.max_files)
+        summary = build_local_index(records, args.output)
+        print(f"✅ {args.output}: {summary}")
+
+        if args.search:
+            index = LocalBM25Index(args.output)
+            for hit in index.search(args.search, k=3):
+                print(f"  {hit['score']:.2f} {hit['text'][:80]}")
+            index.close()
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
@@ -1,9 +1,19 @@
 import sys
 import os
+import time
+import asyncio
 import logging
+from functools import lru_cache
 from elasticsearch import AsyncElasticsearch, NotFoundError, ConnectionError
+from elastic_transport import AiohttpHttpNode
 from dotenv import load_dotenv
 
+from surgiform.deploy.settings import get_settings
+from surgiform.core.cache import AsyncTTLCache
+from surgiform.core.deadline import current_budget
+from surgiform.core.ingest.uptodate.local_bm25 import get_local_index
+from surgiform.core.ingest.uptodate.local_bm25 import search_local
+
 load_dotenv()
 
 ES_HOST = os.getenv("ES_HOST")
@@ -11,14 +21,246 @@ ES_HOST = os.getenv("ES_HOST")
 # 로깅 설정
 logger = logging.getLogger(__name__)
 
+# 워커(프로세스)당 하나만 유지하는 풀링된 클라이언트
+_es_client: AsyncElasticsearch | None = None
+
+
+class KeepAliveAiohttpNode(AiohttpHttpNode):
+    """
+    유휴 커넥션 keep-alive 시간을 설정값으로 지정하는 aiohttp 노드
+
+    세션·커넥터 생성(풀 크기, enable_cleanup_closed 등)은 elastic_transport에 맡기고,
+    만들어진 커넥터의 keep-alive 시간만 바꾼다 (aiohttp 기본값 15초).
+    """
+
+    def _create_aiohttp_session(self) -> None:
+        super()._create_aiohttp_session()
+        connector = self.session.connector
+        if hasattr(connector, "_keepalive_timeout"):
+            connector._keepalive_timeout = get_settings().es_keep_alive
+        else:
+            logger.warning("aiohttp 커넥터에 keep-alive 설정이 없어 기본값을 사용합니다.")
+
+
+def init_es_client() -> AsyncElasticsearch | None:
+    """
+    풀링된 AsyncElasticsearch 클라이언트를 생성 (이미 있으면 재사용)
+
+    FastAPI lifespan 시작 시 호출되며, lifespan 밖(스크립트 등)에서는
+    첫 검색 시 지연 생성된다.
+    """
+    global _es_client
+    if _es_client is not None:
+        return _es_client
+    if not ES_HOST:
+        return None
+
+    settings = get_settings()
+    _es_client = AsyncElasticsearch(
+        [ES_HOST],
+        basic_auth=(settings.es_user, settings.es_password)
+        if settings.es_user
+        else None,
+        node_class=KeepAliveAiohttpNode,
+        connections_per_node=settings.es_pool_maxsize,
+        http_compress=settings.es_http_compress,
+        request_timeout=settings.es_request_timeout,
+    )
+    logger.info(
+        f"Elasticsearch 커넥션 풀 생성: host={ES_HOST}, maxsize={settings.es_pool_maxsize}, "
+        f"keep_alive={settings.es_keep_alive}s, compress={settings.es_http_compress}"
+    )
+    return _es_client
+
+
+async def close_es_client() -> None:
+    """풀링된 클라이언트 종료 (FastAPI lifespan 종료 시 호출)"""
+    global _es_client
+    if _es_client is None:
+        return
+    try:
+        await _es_client.close()
+    except Exception as e:
+        logger.debug(f"Elasticsearch 연결 종료 중 오류: {e}")
+    finally:
+        _es_client = None
+
+
+def get_es_pool_stats() -> dict:
+    """
+    커넥션 풀 상태 (헬스 체크용)
+
+    Returns:
+        dict: 노드별/전체 사용 중(in_use)·유휴(idle) 커넥션 수
+    """
+    if _es_client is None:
+        return {"initialized": False}
+
+    nodes = []
+    for node in _es_client.transport.node_pool.all():
+        session = getattr(node, "session", None)
+        connector = session.connector if session is not None else None
+        in_use = len(getattr(connector, "_acquired", ()))
+        idle = sum(len(conns) for conns in getattr(connector, "_conns", {}).values())
+        nodes.append({"base_url": node.base_url, "in_use": in_use, "idle": idle})
+
+    return {
+        "initialized": True,
+        "maxsize": get_settings().es_pool_maxsize,
+        "in_use": sum(node["in_use"] for node in nodes),
+        "idle": sum(node["idle"] for node in nodes),
+        "nodes": nodes,
+    }
+
 
 def filter_score(response, score_threshold=50):
     return [hit for hit in response['hits']['hits'] if hit['_score'] >= score_threshold]
 
 
+SEARCH_INDEX = "fast-sentences"
+SEARCH_FIELDS = ["text^2", "document_title", "entities"]
+SOURCE_FIELDS = ["text", "document_title", "document_url", "entities", "section"]
+
+
+def build_search_body(query, k=100):
+    """검색 요청 본문 (search / msearch 공용)"""
+    return {
+        "query": {
+            "multi_match": {
+                "query": query,
+                "fields": SEARCH_FIELDS
+            }
+        },
+        "_source": SOURCE_FIELDS,
+        "size": k
+    }
+
+
+def build_knn_body(vector, k=10, num_candidates=100):
+    """kNN 검색 요청 본문 (msearch용, embedding 벡터는 내려받지 않도록 필요한 필드만 지정)"""
+    return {
+        "knn": {
+            "field": "embedding",
+            "query_vector": vector,
+            "k": k,
+            "num_candidates": num_candidates,
+        },
+        "_source": SOURCE_FIELDS,
+        "size": k
+    }
+
+
+def to_results(hits):
+    """ES hit 리스트를 파이프라인에서 쓰는 결과 dict 리스트로 변환"""
+    return [{
+        "id": hit['_id'],
+        "url": hit['_source']['document_url'],
+        "text": hit['_source']['text'],
+        "title": hit['_source']['document_title'],
+        "section": hit['_source']['section'],
+        "entities": hit['_source']['entities'],
+        "score": hit['_score']
+    } for hit in hits]
+
+
+@lru_cache
+def get_retrieval_cache() -> AsyncTTLCache:
+    """(query, k, score_threshold) → 검색 결과 캐시 (워커당 1개)"""
+    settings = get_settings()
+    return AsyncTTLCache("retrieval", maxsize=settings.es_cache_maxsize, ttl=settings.es_cache_ttl)
+
+
+_generation_checked_at = float("-inf")
+
+
+async def sync_index_generation(es) -> None:
+    """
+    인덱스 _meta의 generation 스탬프를 주기적으로 확인해 캐시 무효화
+
+    UltraFastMedicalRAG.batch_index_ultra_fast가 색인 후 새 스탬프를 기록한다.
+    """
+    global _generation_checked_at
+    now = time.monotonic()
+    if now - _generation_checked_at < get_settings().es_cache_generation_check_interval:
+        return
+    # 동시에 여러 요청이 확인하지 않도록 먼저 갱신
+    _generation_checked_at = now
+
+    try:
+        response = await es.indices.get_mapping(index=SEARCH_INDEX)
+        # 별칭으로 조회해도 실제 인덱스명이 키가 되므로 첫 항목 사용
+        index_mapping = next(iter(response.body.values()), {})
+        generation = index_mapping.get("mappings", {}).get("_meta", {}).get("generation")
+    except Exception as e:
+        logger.debug(f"인덱스 generation 확인 실패: {type(e).__name__}: {e}")
+        return
+    get_retrieval_cache().set_generation(generation)
+
+
+async def refresh_index_generation():
+    """
+    live 인덱스 generation을 바로 확인해 반환 (확인할 수 없으면 캐시에 알려진 값, 없으면 None)
+
+    워커·배치 시작 시 evidence pack이 live 인덱스와 같은 generation인지 비교하는 데 쓴다.
+    """
+    global _generation_checked_at
+    es = init_es_client() if get_settings().retrieval_backend != "local" else None
+    if es is not None:
+        _generation_checked_at = float("-inf")
+        await sync_index_generation(es)
+    return get_retrieval_cache().generation
+
+
+def _is_cacheable(results) -> bool:
+    # 오류(None)는 캐시하지 않음
+    return results is not None
+
+
+def _with_deadline(es):
+    """
+    요청 deadline이 있으면 남은 시간으로 요청 타임아웃을 줄인 client (없으면 그대로)
+
+    Returns:
+        client 또는 deadline이 이미 지났으면 None (검색 생략)
+    """
+    budget = current_budget()
+    if budget.remaining() is None:
+        return es
+    if budget.expired:
+        return None
+    return es.options(request_timeout=budget.timeout(get_settings().es_request_timeout))
+
+
+async def _search(es, query, k, score_threshold):
+    """search 1회 호출 (오류 시 None)"""
+    es = _with_deadline(es)
+    if es is None:
+        logger.warning(f"요청 deadline 초과로 Elasticsearch 검색 생략: 쿼리='{query}'")
+        return None
+    try:
+        # 인덱스가 없으면 NotFoundError로 처리 (별도 exists 왕복 없음)
+        response = await es.search(index=SEARCH_INDEX, **build_search_body(query, k))
+
+        filtered_response = filter_score(response, score_threshold=score_threshold)
+        results = to_results(filtered_response)
+        
+        logger.info(f"Elasticsearch 검색 완료: 쿼리='{query}', 결과 수={len(results)}")
+        return results
+        
+    except NotFoundError:
+        logger.warning("Elasticsearch 인덱스 'fast-sentences'가 존재하지 않습니다. 빈 결과를 반환합니다.")
+        return None
+    except ConnectionError as e:
+        logger.error(f"Elasticsearch 연결 오류: {e}. 빈 결과를 반환합니다.")
+        return None
+    except Exception as e:
+        logger.error(f"Elasticsearch 검색 중 오류 발생: {type(e).__name__}: {e}. 빈 결과를 반환합니다.")
+        return None
+
+
 async def get_es_response(query, k=100, score_threshold=50):    
     """
-    Elasticsearch에서 의료 문서 검색
+    Elasticsearch에서 의료 문서 검색 (결과 캐시 사용)
     
     Args:
         query: 검색 쿼리
@@ -26,61 +268,183 @@ async def get_es_response(query, k=100, score_threshold=50):
         score_threshold: 최소 점수 임계값
         
     Returns:
-        list: 검색 결과 리스트 (오류 시 빈 리스트)
+        list: 검색 결과 리스트 (오류 시 빈 리스트). 캐시와 공유되므로 수정하지 말 것
     """
-    if not ES_HOST:
-        logger.warning("ES_HOST 환경변수가 설정되지 않았습니다. 빈 결과를 반환합니다.")
-        return []
-        
-    es = AsyncElasticsearch([ES_HOST])
+    if get_settings().retrieval_backend == "local":
+        return (await _search_local([query], k, score_threshold))[0]
 
-    try:
-        # 인덱스 존재 여부 확인
-        index_exists = await es.indices.exists(index="fast-sentences")
-        if not index_exists:
-            logger.warning("Elasticsearch 인덱스 'fast-sentences'가 존재하지 않습니다. 빈 결과를 반환합니다.")
-            return []
+    es = init_es_client()
+    if es is None:
+        logger.warning("ES_HOST 환경변수가 설정되지 않았습니다.")
+        return (await _fallback_local([query], [None], k, score_threshold))[0]
 
-        response = await es.search(
-            index="fast-sentences",
-            query={
-                "multi_match": {
-                    "query": query,
-                    "fields": ["text^2", "document_title", "entities"]
-                }
-            },
-            _source=["text", "document_title", "document_url", "entities", "section"],
-            size=k
-        )
+    await sync_index_generation(es)
+    results = await get_retrieval_cache().get_or_compute(
+        (query, k, score_threshold),
+        lambda: _search(es, query, k, score_threshold),
+        cacheable=_is_cacheable,
+    )
+    return (await _fallback_local([query], [results], k, score_threshold))[0]
 
-        filtered_response = filter_score(response, score_threshold=score_threshold)
 
-        results = [{
-            "url": hit['_source']['document_url'],
-            "text": hit['_source']['text'],
-            "title": hit['_source']['document_title'],
-            "section": hit['_source']['section'],
-            "entities": hit['_source']['entities'],
-            "score": hit['_score']
-        } for hit in filtered_response]
-        
-        logger.info(f"Elasticsearch 검색 완료: 쿼리='{query}', 결과 수={len(results)}")
-        return results
-        
+async def _msearch_bodies(es, bodies, labels):
+    """
+    _msearch 1회 호출 (BM25·kNN 공용)
+
+    Args:
+        bodies: 검색 요청 본문 리스트
+        labels: 로그에 쓸 본문별 이름 (쿼리 문자열 등)
+
+    Returns:
+        list: 본문별 응답 item (실패한 검색은 None)
+    """
+    searches = []
+    for body in bodies:
+        searches.append({"index": SEARCH_INDEX})
+        searches.append(body)
+
+    es = _with_deadline(es)
+    if es is None:
+        logger.warning(f"요청 deadline 초과로 Elasticsearch 검색 생략: 쿼리 수={len(bodies)}")
+        return [None for _ in bodies]
+
+    try:
+        response = await es.msearch(searches=searches)
     except NotFoundError:
         logger.warning("Elasticsearch 인덱스 'fast-sentences'가 존재하지 않습니다. 빈 결과를 반환합니다.")
-        return []
+        return [None for _ in bodies]
     except ConnectionError as e:
         logger.error(f"Elasticsearch 연결 오류: {e}. 빈 결과를 반환합니다.")
-        return []
+        return [None for _ in bodies]
     except Exception as e:
-        logger.error(f"Elasticsearch 검색 중 오류 발생: {type(e).__name__}: {e}. 빈 결과를 반환합니다.")
+        logger.error(f"Elasticsearch 멀티 검색 중 오류 발생: {type(e).__name__}: {e}. 빈 결과를 반환합니다.")
+        return [None for _ in bodies]
+
+    items = []
+    for label, item in zip(labels, response["responses"]):
+        # 개별 검색 실패는 해당 쿼리만 빈 결과로 처리
+        if "error" in item:
+            logger.error(f"Elasticsearch 검색 오류: 쿼리='{label}', 오류={item['error']}")
+            items.append(None)
+            continue
+        items.append(item)
+    return items
+
+
+async def _msearch_chunk(es, queries, k, score_threshold):
+    """BM25 쿼리 묶음을 _msearch 1회로 검색 (실패한 쿼리는 None)"""
+    items = await _msearch_bodies(es, [build_search_body(query, k) for query in queries], queries)
+    return [None if item is None else to_results(filter_score(item, score_threshold=score_threshold)) for item in items]
+
+
+async def _msearch(es, queries, k, score_threshold):
+    """요청 본문이 과도하게 커지지 않도록 배치 단위로 나눠서 병렬 _msearch"""
+    batch_size = max(1, get_settings().es_msearch_batch_size)
+    chunks = [queries[i:i + batch_size] for i in range(0, len(queries), batch_size)]
+    chunk_results = await asyncio.gather(*[
+        _msearch_chunk(es, chunk, k, score_threshold) for chunk in chunks
+    ])
+
+    results = [result for chunk_result in chunk_results for result in chunk_result]
+    logger.info(
+        f"Elasticsearch 멀티 검색 완료: 쿼리 수={len(queries)}, 요청 수={len(chunks)}, "
+        f"결과 수={sum(len(result) for result in results if result)}"
+    )
+    return results
+
+
+async def get_es_responses(queries, k=100, score_threshold=50):
+    """
+    여러 쿼리를 _msearch로 묶어서 검색 (입력 순서대로 결과 반환)
+
+    캐시에 있는 쿼리는 건너뛰고, 다른 요청이 이미 검색 중인 쿼리는 그 결과를 기다린다.
+
+    Args:
+        queries: 검색 쿼리 리스트
+        k: 쿼리별 반환할 최대 결과 수
+        score_threshold: 최소 점수 임계값
+
+    Returns:
+        list[list]: 쿼리별 검색 결과 리스트 (오류 시 해당 쿼리는 빈 리스트)
+    """
+    queries = list(queries)
+    if not queries:
         return []
-    finally:
-        try:
-            await es.close()
-        except Exception as e:
-            logger.debug(f"Elasticsearch 연결 종료 중 오류: {e}")
+
+    if get_settings().retrieval_backend == "local":
+        return await _search_local(queries, k, score_threshold)
+
+    es = init_es_client()
+    if es is None:
+        logger.warning("ES_HOST 환경변수가 설정되지 않았습니다.")
+        return await _fallback_local(queries, [None for _ in queries], k, score_threshold)
+
+    await sync_index_generation(es)
+    results = await get_retrieval_cache().get_many_or_compute(
+        [(query, k, score_threshold) for query in queries],
+        lambda keys: _msearch(es, [key[0] for key in keys], k, score_threshold),
+        cacheable=_is_cacheable,
+    )
+    return await _fallback_local(queries, results, k, score_threshold)
+
+
+async def get_knn_responses(vectors, k=10, num_candidates=100):
+    """
+    쿼리 벡터별 kNN 검색 (풀링된 AsyncElasticsearch로 _msearch, 입력 순서대로 결과 반환)
+
+    BM25 검색과 같이 ES_MSEARCH_BATCH_SIZE 단위로 묶어 보내고, 요청 deadline이 있으면
+    남은 시간으로 요청 타임아웃을 줄인다.
+
+    Args:
+        vectors: 쿼리 임베딩 리스트 (None이면 해당 쿼리는 빈 결과)
+        k: 쿼리별 반환할 최대 결과 수
+        num_candidates: 샤드별 후보 수
+
+    Returns:
+        list[list]: 쿼리별 검색 결과 리스트 (오류 시 해당 쿼리는 빈 리스트)
+    """
+    vectors = list(vectors)
+    results = [[] for _ in vectors]
+    positions = [i for i, vector in enumerate(vectors) if vector is not None]
+    if not positions:
+        return results
+
+    es = init_es_client()
+    if es is None:
+        logger.warning("ES_HOST 환경변수가 설정되지 않았습니다.")
+        return results
+
+    batch_size = max(1, get_settings().es_msearch_batch_size)
+    chunks = [positions[i:i + batch_size] for i in range(0, len(positions), batch_size)]
+    chunk_items = await asyncio.gather(*[
+        _msearch_bodies(es, [build_knn_body(vectors[i], k, num_candidates) for i in chunk], [f"kNN #{i}" for i in chunk])
+        for chunk in chunks
+    ])
+    for chunk, items in zip(chunks, chunk_items):
+        for i, item in zip(chunk, items):
+            results[i] = to_results(item["hits"]["hits"]) if item is not None else []
+    logger.info(f"Elasticsearch kNN 검색 완료: 쿼리 수={len(positions)}, 요청 수={len(chunks)}")
+    return results
+
+
+async def _search_local(queries, k, score_threshold):
+    """로컬 BM25 인덱스 검색 (CPU 작업이므로 스레드 풀에서 실행)"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, search_local, list(queries), k, score_threshold)
+
+
+async def _fallback_local(queries, results, k, score_threshold):
+    """ES 검색에 실패한(None) 쿼리는 로컬 BM25 인덱스가 있으면 그 결과로, 없으면 빈 결과로 대체"""
+    failed = [i for i, result in enumerate(results) if result is None]
+    if not failed or get_local_index() is None:
+        return [result or [] for result in results]
+
+    logger.warning(f"Elasticsearch 대신 로컬 BM25 인덱스로 검색: 쿼리 수={len(failed)}")
+    local_results = await _search_local([queries[i] for i in failed], k, score_threshold)
+    results = list(results)
+    for i, local_result in zip(failed, local_results):
+        results[i] = local_result
+    return results
 
 
 # 동기 버전도 유지 (기존 코드 호환성을 위해)
@@ -140,18 +504,19 @@ def get_es_response_sync(query, k=100, score_threshold=50):
 
 
 if __name__ == "__main__":
-    import asyncio
-    
     async def main():
         # 테스트 검색
         print("=== Elasticsearch 연결 테스트 ===")
-        response = await get_es_response("lung cancer")
-        print(f"검색 결과: {len(response)}개")
-        
-        if response:
-            print("첫 번째 결과:")
-            print(response[0])
-        else:
-            print("검색 결과가 없습니다. (인덱스가 비어있거나 연결 오류)")
+        try:
+            response = await get_es_response("lung cancer")
+            print(f"검색 결과: {len(response)}개")
+
+            if response:
+                print("첫 번째 결과:")
+                print(response[0])
+            else:
+                print("검색 결과가 없습니다. (인덱스가 비어있거나 연결 오류)")
+        finally:
+            await close_es_client()
     
     asyncio.run(main())
\ No newline at end of file
@@ -0,0 +1,108 @@
+"""
+읽기 전용 memory-mapped 배열 파일
+
+evidence pack, 로컬 BM25 인덱스처럼 오프라인으로 만들고 워커가 mmap으로 여는
+파일의 공통 포맷. 헤더(JSON) + 이름 붙은 NumPy 배열 + 가변 길이 레코드(blob)로 구성된다.
+
+파일 구조 (little endian, 배열은 8바이트 정렬)
+    magic(8) | header_len(u64) | header(JSON) | arrays... | blob_offsets(u64[n+1]) | blobs
+"""
+
+import os
+import json
+import mmap
+import struct
+
+import numpy as np
+
+ALIGNMENT = 8
+
+
+def _align(offset: int) -> int:
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def write_mmap_file(path: str, magic: bytes, header: dict, arrays: dict[str, np.ndarray], blobs: list[bytes] | None = None) -> None:
+    """
+    헤더·배열·blob을 하나의 파일로 저장 (임시 파일에 쓴 뒤 원자적으로 교체)
+
+    Args:
+        path: 출력 파일 경로
+        magic: 8바이트 파일 식별자
+        header: JSON으로 저장할 메타데이터
+        arrays: 이름 → 1차원 NumPy 배열
+        blobs: 가변 길이 레코드 (i번째 레코드는 MmapFile.blob(i)로 조회)
+    """
+    assert len(magic) == 8
+    blobs = blobs or []
+    blob_offsets = np.zeros(len(blobs) + 1, dtype="<u8")
+    np.cumsum([len(blob) for blob in blobs], out=blob_offsets[1:])
+    arrays = {**arrays, "_blob_offsets": blob_offsets}
+
+    # 배열 위치는 데이터 영역 시작점 기준 상대 오프셋으로 기록
+    layout = {}
+    offset = 0
+    for name, array in arrays.items():
+        array = np.ascontiguousarray(array)
+        arrays[name] = array
+        layout[name] = [array.dtype.str, int(array.size), offset]
+        offset = _align(offset + array.nbytes)
+    blob_start = offset
+
+    header_bytes = json.dumps({**header, "_arrays": layout, "_blob_start": blob_start}, ensure_ascii=False).encode("utf-8")
+    data_start = _align(len(magic) + 8 + len(header_bytes))
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(magic)
+        f.write(struct.pack("<Q", len(header_bytes)))
+        f.write(header_bytes)
+        for name, array in arrays.items():
+            f.write(b"\0" * (data_start + layout[name][2] - f.tell()))
+            f.write(array.tobytes())
+        f.write(b"\0" * (data_start + blob_start - f.tell()))
+        for blob in blobs:
+            f.write(blob)
+    # 읽고 있는 워커가 깨진 파일을 보지 않도록 원자적으로 교체
+    os.replace(tmp_path, path)
+
+
+class MmapFile:
+    """write_mmap_file로 만든 파일을 mmap으로 열어 배열을 복사 없이 노출"""
+
+    def __init__(self, path: str, magic: bytes):
+        self.path = path
+        self._file = open(path, "rb")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self._mmap[:len(magic)] != magic:
+            self.close()
+            raise ValueError(f"파일 형식이 올바르지 않습니다: {path}")
+        (header_len,) = struct.unpack_from("<Q", self._mmap, len(magic))
+        header_start = len(magic) + 8
+        self.header = json.loads(self._mmap[header_start:header_start + header_len])
+
+        data_start = _align(header_start + header_len)
+        self.arrays: dict[str, np.ndarray] = {
+            name: np.frombuffer(self._mmap, dtype=dtype, count=count, offset=data_start + offset)
+            for name, (dtype, count, offset) in self.header.pop("_arrays").items()
+        }
+        self._blob_offsets = self.arrays.pop("_blob_offsets")
+        self._blob_start = data_start + self.header.pop("_blob_start")
+
+    @property
+    def blob_count(self) -> int:
+        return len(self._blob_offsets) - 1
+
+    def blob(self, index: int) -> bytes:
+        begin = self._blob_start + int(self._blob_offsets[index])
+        end = self._blob_start + int(self._blob_offsets[index + 1])
+        return self._mmap[begin:end]
+
+    def close(self) -> None:
+        # mmap을 닫기 전에 버퍼를 참조하는 배열부터 해제
+        self.arrays = {}
+        self._blob_offsets = None
+        self._mmap.close()
+        self._file.close()
@@ -0,0 +1,15 @@
+"""
+검색·evidence 공통 텍스트 처리
+
+로컬 BM25 인덱스(ingest)와 evidence 후처리·관련성 필터(consent)가 같은 토큰화를 써야
+색인 시점과 요청 시점의 용어가 일치한다.
+"""
+
+import re
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> list[str]:
+    """소문자 영숫자 토큰 분리"""
+    return _TOKEN_PATTERN.findall(text.lower())
@@ -1,11 +1,35 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from fastapi.exceptions import RequestValidationError
 from surgiform.api.router import api_router
+from surgiform.core.ingest.uptodate.run_es import init_es_client
+from surgiform.core.ingest.uptodate.run_es import close_es_client
+from surgiform.core.ingest.uptodate.run_es import refresh_index_generation
+from surgiform.core.consent.evidence_pack import load_evidence_pack
+from surgiform.core.consent.evidence_pack import close_evidence_pack
+from surgiform.core.ingest.uptodate.local_bm25 import load_local_index
+from surgiform.core.ingest.uptodate.local_bm25 import close_local_index
 import json
 
-app = FastAPI(title="Surgiform API", version="0.1.0")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 워커당 하나의 풀링된 Elasticsearch 클라이언트를 공유
+    init_es_client()
+    # 사전 계산된 evidence pack이 있으면 mmap으로 열어 둠 (live 인덱스와 generation이 같을 때만)
+    await refresh_index_generation()
+    load_evidence_pack()
+    # ES 없이 쓰거나 ES 장애 시 fallback으로 쓸 로컬 BM25 인덱스
+    load_local_index()
+    yield
+    close_local_index()
+    close_evidence_pack()
+    await close_es_client()
+
+
+app = FastAPI(title="Surgiform API", version="0.1.0", lifespan=lifespan)
 
 # CORS 설정
 app.add_middleware(
@@ -697,7 +697,7 @@ Please edit the above content according to the user's request. Maintain consiste
             SystemMessage(content=system_prompt),
             HumanMessage(content=user_prompt)
         ]
-        response = llm.invoke(messages)
+        response = await llm.ainvoke(messages)
         return response.content.strip()
     except Exception as e:
         print(f"AI 편집 중 오류: {str(e)}")
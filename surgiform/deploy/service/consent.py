@@ -1,12 +1,78 @@
+import json
+from typing import AsyncIterator
+
 from surgiform.api.models.consent import ConsentGenerateIn
 from surgiform.api.models.consent import ConsentGenerateOut
-from surgiform.core.consent.pipeline import generate_consent  # TODO
+from surgiform.api.models.consent import ConsentBatchGenerateIn
+from surgiform.api.models.consent import ConsentRegenerateIn
+from surgiform.core.consent.batch import iter_batch
+from surgiform.core.consent.pipeline import generate_consent_with_status  # TODO
+from surgiform.core.consent.pipeline import stream_consent
+from surgiform.core.consent.pipeline import regenerate_sections
+from surgiform.core.consent.pipeline import consent_request_fingerprint
+from surgiform.core.consent.result_cache import get_consent_singleflight
+from surgiform.core.consent.profiles import get_profile
 
 
-async def create_consent(payload: ConsentGenerateIn) -> ConsentGenerateOut:
+async def create_consent(payload: ConsentGenerateIn, timeout: float | None = None, mode: str | None = None) -> ConsentGenerateOut:
     """
     수술동의서 생성 오케스트레이터 (Async 버전)
+
+    더블 클릭·타임아웃 재시도처럼 같은 입력이 동시에 들어오면 하나의 생성 결과를 함께 기다린다.
+    합쳐진 요청은 먼저 도착한 요청의 deadline(timeout)을 따른다.
+    """
+    fingerprint = consent_request_fingerprint(payload, mode)
+    consents, references, degraded_sections = await get_consent_singleflight().run(
+        fingerprint,
+        lambda: generate_consent_with_status(payload, timeout, mode),  # type: ignore[arg-type]
+    )
+
+    return ConsentGenerateOut(consents=consents, references=references, degraded_sections=degraded_sections, profile=get_profile(payload.profile).name)
+
+
+async def regenerate_consent(payload: ConsentRegenerateIn, timeout: float | None = None) -> ConsentGenerateOut:
+    """
+    수술동의서 일부 섹션 재생성
+
+    요청한 섹션만 수정된 입력으로 다시 생성하고 나머지는 기존 동의서 내용을 그대로 병합한다.
     """
-    consents, references = await generate_consent(payload)  # type: ignore[arg-type]
+    consents, references, degraded_sections = await regenerate_sections(
+        payload.payload, payload.consents, payload.references, list(payload.sections), timeout,
+    )
+    return ConsentGenerateOut(
+        consents=consents, references=references,
+        degraded_sections=degraded_sections, profile=get_profile(payload.payload.profile).name,
+    )
+
+
+def format_sse(event: str, data: str) -> str:
+    """Server-Sent Events 메시지 1개"""
+    return f"event: {event}\ndata: {data}\n\n"
 
-    return ConsentGenerateOut(consents=consents, references=references)
+
+async def stream_consent_events(payload: ConsentGenerateIn, timeout: float | None = None, mode: str | None = None) -> AsyncIterator[str]:
+    """
+    수술동의서 생성 SSE 스트림
+
+    섹션이 완료되는 즉시 section 이벤트를 보내고, 마지막 done 이벤트에
+    조립된 ConsentGenerateOut 전체를 담는다.
+    """
+    async for event, data in stream_consent(payload, timeout, mode):
+        if event == "done":
+            out = ConsentGenerateOut(
+                consents=data["consents"], references=data["references"],
+                degraded_sections=data["degraded_sections"], profile=data["profile"],
+            )
+            yield format_sse(event, out.model_dump_json())
+        else:
+            yield format_sse(event, json.dumps(data, ensure_ascii=False))
+
+
+async def stream_consent_batch(payload: ConsentBatchGenerateIn, mode: str | None = None) -> AsyncIterator[str]:
+    """
+    수술동의서 일괄 생성 NDJSON 스트림 (레코드가 끝나는 순서대로 한 줄씩)
+
+    각 줄: {"key", "registration_no", "status": "ok" | "error", "result" | "error"}
+    """
+    async for row in iter_batch(payload.records, mode=mode):
+        yield json.dumps(row, ensure_ascii=False) + "\n"
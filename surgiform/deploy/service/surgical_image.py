@@ -188,8 +188,11 @@ async def extract_surgical_steps(request: StepExtractionRequest) -> StepExtracti
 
                 # 한국어 요청 시 번역 수행
                 if request.language == "ko":
-                    translated_title = translate_text(original_title, "Korean")
-                    translated_desc = translate_text(original_desc, "Korean")
+                    # sync LLM 호출은 이벤트 루프를 막지 않도록 스레드에서 실행
+                    translated_title, translated_desc = await asyncio.gather(
+                        asyncio.to_thread(translate_text, original_title, "Korean"),
+                        asyncio.to_thread(translate_text, original_desc, "Korean"),
+                    )
                 else:
                     translated_title = original_title
                     translated_desc = original_desc
@@ -15,6 +15,21 @@ class Settings(BaseSettings):
     # --- OpenAI ---
     openai_api_key: str = Field(..., alias="OPENAI_API_KEY")
 
+    # LLM gateway (워커 단위 모델별 예산, 응답 헤더로 자동 조정)
+    llm_gateway_enabled: bool = Field(True, alias="LLM_GATEWAY_ENABLED")
+    llm_max_concurrency: int = Field(16, alias="LLM_MAX_CONCURRENCY")  # 모델별 동시 요청 수
+    llm_requests_per_minute: float = Field(500, alias="LLM_REQUESTS_PER_MINUTE")  # 모델별 초기 분당 요청 한도
+    llm_tokens_per_minute: float = Field(200000, alias="LLM_TOKENS_PER_MINUTE")  # 모델별 초기 분당 토큰 한도
+    llm_completion_token_estimate: int = Field(1000, alias="LLM_COMPLETION_TOKEN_ESTIMATE")  # 요청당 예상 출력 토큰
+    llm_router_models: str = Field("gpt-5,gpt-5-mini,gpt-4.1,gpt-4.1-mini,gpt-3.5-turbo", alias="LLM_ROUTER_MODELS")  # 섹션 생성 후보 모델 (쉼표 구분, 우선순위 순)
+    llm_router_quality_floor: int = Field(3, alias="LLM_ROUTER_QUALITY_FLOOR")  # 후보로 쓸 최소 품질 등급 (MODEL_QUALITY 기준)
+    llm_router_latency_target: float = Field(60.0, alias="LLM_ROUTER_LATENCY_TARGET")  # 모델별 p90 지연 목표(초), 넘으면 다음 후보 사용
+    llm_hedge_enabled: bool = Field(False, alias="LLM_HEDGE_ENABLED")  # 섹션 생성 호출이 느리면 중복 요청(hedge) 사용
+    llm_hedge_percentile: float = Field(0.95, alias="LLM_HEDGE_PERCENTILE")  # hedge를 보낼 모델별 실측 지연 백분위
+    llm_hedge_min_samples: int = Field(20, alias="LLM_HEDGE_MIN_SAMPLES")  # hedge 시작 전 필요한 모델별 지연 표본 수
+    llm_hedge_budget: float = Field(0.1, alias="LLM_HEDGE_BUDGET")  # 전체 호출 대비 hedge 최대 비율 (추가 비용 상한)
+    llm_hedge_model: str = Field("", alias="LLM_HEDGE_MODEL")  # hedge 요청 모델 (비우면 원래 모델과 같음)
+
     # --- Google Gemini ---
     gemini_api_key: str | None = Field(None, alias="GEMINI_API_KEY")
 
@@ -22,6 +37,47 @@ class Settings(BaseSettings):
     es_host: str = Field("http://localhost:9200", alias="ES_HOST")
     es_user: str | None = Field(None, alias="ES_USER")
     es_password: str | None = Field(None, alias="ES_PASSWORD")
+    es_pool_maxsize: int = Field(32, alias="ES_POOL_MAXSIZE")  # 노드당 최대 커넥션 수
+    es_keep_alive: float = Field(60.0, alias="ES_KEEP_ALIVE")  # 유휴 커넥션 유지 시간(초)
+    es_http_compress: bool = Field(True, alias="ES_HTTP_COMPRESS")
+    es_request_timeout: float = Field(30.0, alias="ES_REQUEST_TIMEOUT")
+    es_msearch_batch_size: int = Field(50, alias="ES_MSEARCH_BATCH_SIZE")  # _msearch 1회당 쿼리 수
+    es_cache_maxsize: int = Field(4096, alias="ES_CACHE_MAXSIZE")  # 0이면 검색 캐시 비활성화
+    es_cache_ttl: float = Field(3600.0, alias="ES_CACHE_TTL")  # 초
+    es_cache_generation_check_interval: float = Field(30.0, alias="ES_CACHE_GENERATION_CHECK_INTERVAL")  # 초
+
+    # --- Retrieval ---
+    retrieval_backend: str = Field("es", alias="RETRIEVAL_BACKEND")  # es: ES 우선(실패 시 로컬 BM25), local: 로컬 BM25만
+    local_bm25_index_path: str | None = Field(None, alias="LOCAL_BM25_INDEX_PATH")  # 로컬 BM25 인덱스 파일
+    retrieval_mode: str = Field("bm25", alias="RETRIEVAL_MODE")  # bm25 | hybrid (BM25 + kNN)
+    embedding_cache_path: str = Field(".cache/query_embeddings.sqlite3", alias="EMBEDDING_CACHE_PATH")  # 쿼리 임베딩 디스크 캐시
+
+    # --- Consent pipeline ---
+    consent_evidence_top_n: int = Field(30, alias="CONSENT_EVIDENCE_TOP_N")  # 섹션당 최대 evidence 수
+    consent_evidence_token_budget: int = Field(2500, alias="CONSENT_EVIDENCE_TOKEN_BUDGET")  # 섹션당 evidence 토큰 예산
+    consent_evidence_mmr: bool = Field(False, alias="CONSENT_EVIDENCE_MMR")  # MMR 다양성 선택 사용 여부
+    consent_evidence_mmr_top_n: int = Field(12, alias="CONSENT_EVIDENCE_MMR_TOP_N")
+    consent_evidence_mmr_diversity: float = Field(0.3, alias="CONSENT_EVIDENCE_MMR_DIVERSITY")  # 0: 순위 그대로, 1: 다양성 우선
+    consent_shared_evidence_top_n: int = Field(5, alias="CONSENT_SHARED_EVIDENCE_TOP_N")  # 모든 섹션 프롬프트 prefix에 공통으로 넣는 수술 evidence 수
+    consent_relevance_filter: bool = Field(True, alias="CONSENT_RELEVANCE_FILTER")  # 환자·섹션과 겹치는 용어가 적은 evidence 후보 제외 (로컬 점수)
+    consent_relevance_min_score: float = Field(0.15, alias="CONSENT_RELEVANCE_MIN_SCORE")  # 로컬 관련성 점수(0~1) 하한
+    consent_llm_validation: bool = Field(False, alias="CONSENT_LLM_VALIDATION")  # 섹션당 LLM 1회로 evidence 후보 Y/N 검증 (프로필이 정하지 않을 때)
+    consent_llm_validation_model: str = Field("gpt-4.1-mini", alias="CONSENT_LLM_VALIDATION_MODEL")
+    consent_llm_validation_max_candidates: int = Field(30, alias="CONSENT_LLM_VALIDATION_MAX_CANDIDATES")  # 검증 호출 1회에 보내는 최대 후보 수
+    consent_llm_validation_timeout: float = Field(20.0, alias="CONSENT_LLM_VALIDATION_TIMEOUT")  # 초, 넘으면 검증 없이 로컬 필터 결과 사용
+    consent_evidence_pack_path: str | None = Field(None, alias="CONSENT_EVIDENCE_PACK_PATH")  # 사전 계산 evidence pack 파일
+    consent_cache_maxsize: int = Field(512, alias="CONSENT_CACHE_MAXSIZE")  # 0이면 동의서 결과 캐시 비활성화
+    consent_cache_ttl: float = Field(86400.0, alias="CONSENT_CACHE_TTL")  # 초
+    consent_section_cache_maxsize: int = Field(4096, alias="CONSENT_SECTION_CACHE_MAXSIZE")  # 0이면 섹션 캐시 비활성화
+    consent_section_cache_ttl: float = Field(86400.0, alias="CONSENT_SECTION_CACHE_TTL")  # 초
+    consent_preprocess_cache_maxsize: int = Field(4096, alias="CONSENT_PREPROCESS_CACHE_MAXSIZE")  # 번역·키워드 추출 결과 캐시
+    consent_preprocess_cache_ttl: float = Field(86400.0, alias="CONSENT_PREPROCESS_CACHE_TTL")  # 초
+    consent_batch_concurrency: int = Field(8, alias="CONSENT_BATCH_CONCURRENCY")  # 일괄 생성 시 동시에 생성하는 동의서 수
+    consent_profile: str = Field("balanced", alias="CONSENT_PROFILE")  # 기본 생성 프로필 (fast / balanced / thorough)
+    consent_generation_mode: str = Field("sections", alias="CONSENT_GENERATION_MODE")  # sections: 섹션별 호출, structured: 구조화 출력 1회 (대량 생성용)
+    consent_deadline: float = Field(120.0, alias="CONSENT_DEADLINE")  # 동의서 1건 기본 deadline(초), 0이면 제한 없음
+    consent_fast_model: str = Field("gpt-4.1-mini", alias="CONSENT_FAST_MODEL")  # deadline이 임박했을 때 쓰는 빠른 모델
+    consent_fast_model_reserve: float = Field(20.0, alias="CONSENT_FAST_MODEL_RESERVE")  # 빠른 모델 재생성을 위해 남겨두는 시간(초)
 
     class Config:
         env_file = ".env"
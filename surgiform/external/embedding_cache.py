@@ -0,0 +1,74 @@
+"""쿼리 임베딩 디스크 캐시 (SQLite, 정규화된 쿼리 텍스트 기준)"""
+
+import os
+import re
+import sqlite3
+import threading
+from functools import lru_cache
+
+import numpy as np
+
+from surgiform.deploy.settings import get_settings
+
+_WHITESPACE_PATTERN = re.compile(r"\s+")
+
+
+def normalize_query(text: str) -> str:
+    """대소문자·공백 차이를 무시한 캐시 키"""
+    return _WHITESPACE_PATTERN.sub(" ", text).strip().lower()
+
+
+class EmbeddingCache:
+    """(모델, 정규화된 쿼리) → float32 벡터. 여러 워커가 같은 파일을 공유해도 안전"""
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS query_embeddings ("
+            " model TEXT NOT NULL, query TEXT NOT NULL, vector BLOB NOT NULL,"
+            " PRIMARY KEY (model, query))"
+        )
+        self._conn.commit()
+        self.hits = 0
+        self.misses = 0
+
+    def get_many(self, model: str, queries: list[str]) -> dict[str, list[float]]:
+        """캐시에 있는 쿼리만 {정규화된 쿼리: 벡터}로 반환"""
+        keys = list(dict.fromkeys(normalize_query(query) for query in queries))
+        if not keys:
+            return {}
+        placeholders = ",".join("?" * len(keys))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT query, vector FROM query_embeddings WHERE model = ? AND query IN ({placeholders})",
+                [model, *keys],
+            ).fetchall()
+        found = {query: np.frombuffer(vector, dtype="<f4").tolist() for query, vector in rows}
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+        return found
+
+    def set_many(self, model: str, vectors: dict[str, list[float]]) -> None:
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO query_embeddings (model, query, vector) VALUES (?, ?, ?)",
+                [
+                    (model, normalize_query(query), np.asarray(vector, dtype="<f4").tobytes())
+                    for query, vector in vectors.items()
+                ],
+            )
+            self._conn.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            (size,) = self._conn.execute("SELECT COUNT(*) FROM query_embeddings").fetchone()
+        return {"path": self.path, "size": size, "hits": self.hits, "misses": self.misses}
+
+
+@lru_cache
+def get_embedding_cache() -> EmbeddingCache:
+    return EmbeddingCache(get_settings().embedding_cache_path)
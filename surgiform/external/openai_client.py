@@ -1,11 +1,631 @@
 """LangChain-OpenAI 래퍼 (ChatCompletion 전용)"""
 
+import re
+import time
+import heapq
+import asyncio
+import logging
+import threading
+from collections import deque
 from functools import lru_cache
+from typing import Any
 from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.outputs import ChatResult
 from langchain_openai import ChatOpenAI
 from surgiform.deploy.settings import get_settings
+from surgiform.external.embedding_cache import get_embedding_cache
+from surgiform.external.embedding_cache import normalize_query
 import openai
 
+# 로깅 설정
+logger = logging.getLogger(__name__)
+
+
+# --- LLM gateway ---
+# 워커 안의 모든 get_chat_llm 호출을 모델별 예산(동시 요청·분당 요청/토큰)으로 제어한다.
+# 대기열은 우선순위 순(같은 우선순위는 도착 순)이며, 응답의 x-ratelimit-* 헤더로
+# 실제 남은 한도에 맞춰 예산을 조정한다 (다른 워커가 쓴 양까지 반영됨).
+
+# 작을수록 먼저 처리 (대화형 채팅 > 동의서 일괄 생성)
+LLM_PRIORITIES = {"interactive": 0, "batch": 1}
+DEFAULT_LLM_PRIORITY = "interactive"
+
+_DURATION_PATTERN = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def llm_priority_config(priority: str) -> dict:
+    """LangChain invoke/ainvoke config로 gateway 우선순위 지정"""
+    return {"metadata": {"llm_priority": priority}}
+
+
+def parse_reset_duration(value: str | None) -> float | None:
+    """x-ratelimit-reset-* 값("1s", "6m0s", "20ms")을 초로 변환"""
+    if not value:
+        return None
+    parts = _DURATION_PATTERN.findall(value)
+    if not parts:
+        try:
+            return float(value)
+        except ValueError:
+            return None
+    return sum(float(number) * _DURATION_UNITS[unit] for number, unit in parts)
+
+
+def estimate_tokens(messages) -> int:
+    """요청 토큰 수 추정 (프롬프트 글자 수 기반 + 예상 출력 토큰)"""
+    chars = sum(len(message.content) if isinstance(message.content, str) else len(str(message.content)) for message in messages)
+    # 한국어가 섞여 있어 영어 기준(4자/토큰)보다 보수적으로 추정
+    return chars // 3 + get_settings().llm_completion_token_estimate
+
+
+class ModelBudget:
+    """모델 1개의 워커 단위 예산 (동시 요청 수 + 분당 요청/토큰 token bucket)"""
+
+    def __init__(self, model: str, max_concurrency: int, requests_per_minute: float, tokens_per_minute: float):
+        self.model = model
+        self.max_concurrency = max_concurrency
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.in_flight = 0
+        self.request_level = float(requests_per_minute)
+        self.token_level = float(tokens_per_minute)
+        self.paused_until = 0.0
+        self._refilled_at = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._refilled_at
+        self._refilled_at = now
+        self.request_level = min(self.requests_per_minute, self.request_level + elapsed * self.requests_per_minute / 60)
+        self.token_level = min(self.tokens_per_minute, self.token_level + elapsed * self.tokens_per_minute / 60)
+
+    def wait_time(self, tokens: int, now: float) -> float | None:
+        """
+        요청을 바로 보낼 수 있으면 0, 분당 한도 때문에 기다려야 하면 대기 초,
+        동시 요청 수가 가득 차서 다른 요청이 끝나야 하면 None
+        """
+        self._refill(now)
+        if now < self.paused_until:
+            return self.paused_until - now
+        if self.in_flight >= self.max_concurrency:
+            return None
+        # 한 요청이 분당 한도보다 커도 영원히 막히지 않도록 상한을 둠
+        tokens = min(tokens, self.tokens_per_minute)
+        waits = [0.0]
+        if self.request_level < 1:
+            waits.append((1 - self.request_level) * 60 / self.requests_per_minute)
+        if self.token_level < tokens:
+            waits.append((tokens - self.token_level) * 60 / self.tokens_per_minute)
+        return max(waits)
+
+    def take(self, tokens: int) -> None:
+        self.in_flight += 1
+        self.request_level -= 1
+        self.token_level -= tokens
+
+    def release(self, reserved_tokens: int, used_tokens: int | None) -> None:
+        self.in_flight -= 1
+        if used_tokens is not None:
+            # 추정치와 실제 사용량의 차이를 돌려주거나 추가로 차감
+            self.token_level = min(self.tokens_per_minute, self.token_level + reserved_tokens - used_tokens)
+
+    def update_from_headers(self, headers: dict, now: float) -> None:
+        """x-ratelimit-* 응답 헤더로 한도와 남은 양을 서버 기준으로 맞춤"""
+        headers = {key.lower(): value for key, value in headers.items()}
+        self._refill(now)
+        limit_requests = _header_number(headers, "x-ratelimit-limit-requests")
+        limit_tokens = _header_number(headers, "x-ratelimit-limit-tokens")
+        remaining_requests = _header_number(headers, "x-ratelimit-remaining-requests")
+        remaining_tokens = _header_number(headers, "x-ratelimit-remaining-tokens")
+        if limit_requests:
+            self.requests_per_minute = limit_requests
+        if limit_tokens:
+            self.tokens_per_minute = limit_tokens
+        if remaining_requests is not None:
+            self.request_level = min(self.request_level, remaining_requests)
+        if remaining_tokens is not None:
+            self.token_level = min(self.token_level, remaining_tokens)
+
+    def pause(self, seconds: float, now: float) -> None:
+        self.paused_until = max(self.paused_until, now + seconds)
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": self.in_flight,
+            "max_concurrency": self.max_concurrency,
+            "requests_per_minute": self.requests_per_minute,
+            "tokens_per_minute": self.tokens_per_minute,
+            "request_level": round(self.request_level, 1),
+            "token_level": round(self.token_level),
+            "paused_for": max(0.0, round(self.paused_until - time.monotonic(), 2)),
+        }
+
+
+def _header_number(headers: dict, name: str) -> float | None:
+    try:
+        return float(headers[name])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+class LLMPermit:
+    """gateway가 발급한 요청 1건의 실행 허가"""
+
+    def __init__(self, model: str, priority: str, tokens: int, queue_wait: float):
+        self.model = model
+        self.priority = priority
+        self.tokens = tokens
+        self.queue_wait = queue_wait
+        self.released = False
+
+
+class _Waiter:
+    def __init__(self, model: str, priority: str, tokens: int, loop: asyncio.AbstractEventLoop | None):
+        self.model = model
+        self.priority = priority
+        self.tokens = tokens
+        self.enqueued_at = time.monotonic()
+        self.granted = False
+        self.loop = loop
+        self.future = loop.create_future() if loop is not None else None
+        self.event = threading.Event() if loop is None else None
+
+    def grant(self) -> None:
+        self.granted = True
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(_set_future_result, self.future)
+        else:
+            self.event.set()
+
+
+def _set_future_result(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+class LLMGateway:
+    """워커 전역 LLM 요청 관문 (async 호출과 스레드의 sync 호출을 같은 대기열로 관리)"""
+
+    # 분당 한도 대기 중에도 취소·우선순위 변화를 확인하는 최대 간격(초)
+    MAX_POLL_INTERVAL = 1.0
+
+    def __init__(self, max_concurrency: int, requests_per_minute: float, tokens_per_minute: float):
+        self.max_concurrency = max_concurrency
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._lock = threading.Lock()
+        self._budgets: dict[str, ModelBudget] = {}
+        self._queues: dict[str, list[tuple[int, int, _Waiter]]] = {}
+        self._seq = 0
+        self._waits: dict[tuple[str, str], deque] = {}
+        self._counters: dict[tuple[str, str], dict] = {}
+        self.rate_limited = 0
+
+    def _budget(self, model: str) -> ModelBudget:
+        budget = self._budgets.get(model)
+        if budget is None:
+            budget = ModelBudget(model, self.max_concurrency, self.requests_per_minute, self.tokens_per_minute)
+            self._budgets[model] = budget
+        return budget
+
+    def _enqueue(self, model: str, priority: str, tokens: int, loop) -> _Waiter:
+        waiter = _Waiter(model, priority, tokens, loop)
+        with self._lock:
+            self._seq += 1
+            heapq.heappush(self._queues.setdefault(model, []), (LLM_PRIORITIES.get(priority, 0), self._seq, waiter))
+        return waiter
+
+    def _dispatch(self, model: str) -> float | None:
+        """대기열 앞에서부터 보낼 수 있는 요청을 허가. 다음 확인까지 기다릴 시간 반환"""
+        with self._lock:
+            queue = self._queues.get(model, [])
+            budget = self._budget(model)
+            while queue:
+                waiter = queue[0][2]
+                wait = budget.wait_time(waiter.tokens, time.monotonic())
+                if wait != 0:
+                    return wait
+                heapq.heappop(queue)
+                budget.take(waiter.tokens)
+                waiter.grant()
+            return None
+
+    def _remove(self, waiter: _Waiter) -> None:
+        with self._lock:
+            queue = self._queues.get(waiter.model, [])
+            for i, (_, _, queued) in enumerate(queue):
+                if queued is waiter:
+                    queue.pop(i)
+                    heapq.heapify(queue)
+                    return
+
+    def _permit(self, waiter: _Waiter) -> LLMPermit:
+        queue_wait = time.monotonic() - waiter.enqueued_at
+        with self._lock:
+            key = (waiter.model, waiter.priority)
+            self._waits.setdefault(key, deque(maxlen=1000)).append(queue_wait)
+            counters = self._counters.setdefault(key, {"requests": 0, "errors": 0})
+            counters["requests"] += 1
+        return LLMPermit(waiter.model, waiter.priority, waiter.tokens, queue_wait)
+
+    async def acquire_async(self, model: str, tokens: int, priority: str = DEFAULT_LLM_PRIORITY) -> LLMPermit:
+        waiter = self._enqueue(model, priority, tokens, asyncio.get_running_loop())
+        try:
+            while not waiter.granted:
+                wait = self._dispatch(model)
+                if waiter.granted:
+                    break
+                timeout = self.MAX_POLL_INTERVAL if wait is None else min(wait, self.MAX_POLL_INTERVAL)
+                try:
+                    await asyncio.wait_for(asyncio.shield(waiter.future), timeout=timeout)
+                except asyncio.TimeoutError:
+                    pass
+        except BaseException:
+            self._remove(waiter)
+            if waiter.granted:
+                # 허가를 받은 직후 취소된 경우 예산을 돌려줌
+                self.release(self._permit(waiter))
+            raise
+        return self._permit(waiter)
+
+    def acquire(self, model: str, tokens: int, priority: str = DEFAULT_LLM_PRIORITY) -> LLMPermit:
+        """
+        sync 호출용 (스레드를 막고 대기)
+
+        이벤트 루프 스레드에서 막고 기다리면 허가를 풀어줄 async 요청이 멈춰 교착되고, 대기 없이 허가하면
+        우선순위·동시 실행 한도를 건너뛰므로 거부한다. async 코드에서는 ainvoke(acquire_async)를 쓰거나
+        sync 호출을 asyncio.to_thread로 실행해야 한다.
+        """
+        try:
+            asyncio.get_running_loop()
+            on_event_loop = True
+        except RuntimeError:
+            on_event_loop = False
+        if on_event_loop:
+            raise RuntimeError(
+                f"LLM gateway: 이벤트 루프 스레드에서 sync LLM 호출({model})은 지원하지 않습니다. "
+                f"ainvoke를 쓰거나 asyncio.to_thread로 실행하세요."
+            )
+
+        waiter = self._enqueue(model, priority, tokens, None)
+        try:
+            while not waiter.granted:
+                wait = self._dispatch(model)
+                if waiter.granted:
+                    break
+                waiter.event.wait(self.MAX_POLL_INTERVAL if wait is None else min(wait, self.MAX_POLL_INTERVAL))
+        except BaseException:
+            self._remove(waiter)
+            if waiter.granted:
+                self.release(self._permit(waiter))
+            raise
+        return self._permit(waiter)
+
+    def release(self, permit: LLMPermit, used_tokens: int | None = None, headers: dict | None = None, error: BaseException | None = None) -> None:
+        """요청 종료 처리: 실제 사용량 반영, 응답 헤더로 예산 조정, 429면 일시 정지"""
+        if permit.released:
+            return
+        permit.released = True
+        now = time.monotonic()
+        with self._lock:
+            budget = self._budget(permit.model)
+            budget.release(permit.tokens, used_tokens)
+            if headers:
+                budget.update_from_headers(headers, now)
+            if error is not None:
+                self._counters[(permit.model, permit.priority)]["errors"] += 1
+                retry_after = _rate_limit_retry_after(error)
+                if retry_after is not None:
+                    self.rate_limited += 1
+                    budget.pause(retry_after, now)
+                    logger.warning(f"LLM gateway: {permit.model} rate limit, {retry_after:.1f}초 동안 요청 중지")
+        self._dispatch(permit.model)
+
+    def stats(self) -> dict:
+        with self._lock:
+            models = {}
+            for model, budget in self._budgets.items():
+                models[model] = {**budget.stats(), "queued": len(self._queues.get(model, []))}
+            queue_wait = {}
+            for (model, priority), waits in self._waits.items():
+                ordered = sorted(waits)
+                queue_wait[f"{model}:{priority}"] = {
+                    **self._counters[(model, priority)],
+                    "wait_avg_ms": round(sum(ordered) / len(ordered) * 1000, 1),
+                    "wait_p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 1),
+                    "wait_max_ms": round(ordered[-1] * 1000, 1),
+                }
+        return {"models": models, "queue_wait": queue_wait, "rate_limited": self.rate_limited}
+
+
+def _rate_limit_retry_after(error: BaseException) -> float | None:
+    """429 오류면 다시 보내기까지 기다릴 초 (retry-after 또는 x-ratelimit-reset-* 헤더)"""
+    response = getattr(error, "response", None)
+    if not isinstance(error, openai.RateLimitError) and getattr(response, "status_code", None) != 429:
+        return None
+    headers = {key.lower(): value for key, value in (getattr(response, "headers", None) or {}).items()}
+    candidates = [
+        parse_reset_duration(headers.get("retry-after")),
+        parse_reset_duration(headers.get("x-ratelimit-reset-requests")),
+        parse_reset_duration(headers.get("x-ratelimit-reset-tokens")),
+    ]
+    candidates = [value for value in candidates if value is not None]
+    return max(candidates) if candidates else 1.0
+
+
+@lru_cache
+def get_llm_gateway() -> LLMGateway:
+    settings = get_settings()
+    return LLMGateway(settings.llm_max_concurrency, settings.llm_requests_per_minute, settings.llm_tokens_per_minute)
+
+
+def _result_usage(result: ChatResult) -> tuple[int | None, dict | None]:
+    """ChatResult에서 (총 사용 토큰, 응답 헤더)"""
+    token_usage = (result.llm_output or {}).get("token_usage") or {}
+    headers = None
+    if result.generations:
+        headers = (result.generations[0].generation_info or {}).get("headers")
+    return token_usage.get("total_tokens"), headers
+
+
+def _run_priority(run_manager) -> str:
+    metadata = getattr(run_manager, "metadata", None) or {}
+    return metadata.get("llm_priority", DEFAULT_LLM_PRIORITY)
+
+
+class GatewayChatOpenAI(ChatOpenAI):
+    """모든 요청이 LLM gateway의 허가를 받은 뒤 전송되는 ChatOpenAI"""
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        gateway = get_llm_gateway()
+        permit = gateway.acquire(self.model_name, estimate_tokens(messages), _run_priority(run_manager))
+        try:
+            result = super()._generate(messages, stop=stop, run_manager=run_manager, **kwargs)
+        except BaseException as e:
+            gateway.release(permit, error=e)
+            raise
+        used_tokens, headers = _result_usage(result)
+        gateway.release(permit, used_tokens=used_tokens, headers=headers)
+        return result
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        gateway = get_llm_gateway()
+        permit = await gateway.acquire_async(self.model_name, estimate_tokens(messages), _run_priority(run_manager))
+        try:
+            result = await super()._agenerate(messages, stop=stop, run_manager=run_manager, **kwargs)
+        except BaseException as e:
+            gateway.release(permit, error=e)
+            raise
+        used_tokens, headers = _result_usage(result)
+        gateway.release(permit, used_tokens=used_tokens, headers=headers)
+        return result
+
+
+# --- prompt 캐시 지표 ---
+# OpenAI는 같은 prefix(1024토큰 이상)로 시작하는 요청의 입력 토큰을 캐시에서 읽는다.
+# 응답 usage의 cached 토큰 수와 지연을 모델별로 모아 캐시 적중률과 지연 차이를 확인한다.
+
+
+class PromptCacheStats:
+    """모델별 입력 토큰·캐시에서 읽은 토큰 수와 캐시 적중 여부별 지연"""
+
+    def __init__(self):
+        self._models: dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def record(self, model: str, usage: dict | None, latency: float) -> None:
+        """usage: AIMessage.usage_metadata (input_tokens, input_token_details.cache_read)"""
+        if not usage:
+            return
+        cached_tokens = (usage.get("input_token_details") or {}).get("cache_read") or 0
+        with self._lock:
+            entry = self._models.setdefault(model, {
+                "calls": 0, "input_tokens": 0, "cached_tokens": 0,
+                "cache_hit_calls": 0, "cache_hit_latency": 0.0, "cache_miss_latency": 0.0,
+            })
+            entry["calls"] += 1
+            entry["input_tokens"] += usage.get("input_tokens") or 0
+            entry["cached_tokens"] += cached_tokens
+            if cached_tokens:
+                entry["cache_hit_calls"] += 1
+                entry["cache_hit_latency"] += latency
+            else:
+                entry["cache_miss_latency"] += latency
+
+    def stats(self) -> dict:
+        with self._lock:
+            models = {}
+            for model, entry in self._models.items():
+                misses = entry["calls"] - entry["cache_hit_calls"]
+                models[model] = {
+                    "calls": entry["calls"],
+                    "input_tokens": entry["input_tokens"],
+                    "cached_tokens": entry["cached_tokens"],
+                    "cached_ratio": round(entry["cached_tokens"] / entry["input_tokens"], 3) if entry["input_tokens"] else 0.0,
+                    "cache_hit_calls": entry["cache_hit_calls"],
+                    "latency_cache_hit_avg_s": round(entry["cache_hit_latency"] / entry["cache_hit_calls"], 2) if entry["cache_hit_calls"] else None,
+                    "latency_cache_miss_avg_s": round(entry["cache_miss_latency"] / misses, 2) if misses else None,
+                }
+        return models
+
+
+@lru_cache
+def get_prompt_cache_stats() -> PromptCacheStats:
+    return PromptCacheStats()
+
+
+# --- 모델 라우터 ---
+# 고정된 모델 순서 대신, 모델별 최근 지연·오류율·429 비율을 보고 호출마다 모델을 고른다.
+# 품질 하한(quality floor) 이상인 후보 중 건강한(지연 목표·오류율 기준 통과) 모델에서
+# 품질이 가장 높은 모델을 쓰고, 건강한 후보가 없으면 가장 덜 나쁜 후보를 쓴다.
+
+# 모델별 품질 등급 (동의서 섹션 생성 기준, 클수록 좋음)
+MODEL_QUALITY = {
+    "gpt-5": 5,
+    "gpt-5-mini": 4,
+    "gpt-4.1": 4,
+    "gpt-4o": 3,
+    "gpt-4.1-mini": 3,
+    "gpt-4o-mini": 2,
+    "gpt-4.1-nano": 2,
+    "gpt-5-nano": 2,
+    "gpt-3.5-turbo": 1,
+}
+
+
+def _percentile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+class ModelRouter:
+    """모델별 최근 호출 결과(지연·오류·429)를 기록하고 호출마다 모델 선택"""
+
+    # 이 비율을 넘으면 건강하지 않은 모델로 보고 후순위로 미룸
+    MAX_ERROR_RATE = 0.5
+    MAX_RATE_LIMIT_RATE = 0.2
+    # 판단에 필요한 최소 표본 수 (부족하면 건강한 것으로 간주)
+    MIN_SAMPLES = 5
+
+    def __init__(self, models: list[str], quality_floor: int, latency_target: float, window_seconds: float = 300.0, window_size: int = 200):
+        self.models = models
+        self.quality_floor = quality_floor
+        # 모델별 p90 지연 목표(초)
+        self.latency_target = latency_target
+        # 오래된 결과는 버려 건강하지 않던 모델도 일정 시간 뒤 다시 시도됨
+        self.window_seconds = window_seconds
+        self._window_size = window_size
+        # 모델 → deque[(기록 시각, 지연, 오류 여부, 429 여부)]
+        self._outcomes: dict[str, deque] = {}
+        # (모델, 선택 사유) → 횟수
+        self.decisions: dict[tuple[str, str], int] = {}
+        self._lock = threading.Lock()
+
+    def candidates(self, models: tuple[str, ...] | list[str] | None = None, quality_floor: int | None = None) -> list[str]:
+        """
+        품질 하한 이상인 후보 (설정 순서 유지, 품질 정보가 없는 모델은 하한 통과로 간주)
+
+        models·quality_floor가 주어지면 라우터 설정 대신 사용 (생성 프로필별 후보)
+        """
+        models = list(models) if models is not None else self.models
+        floor = quality_floor if quality_floor is not None else self.quality_floor
+        return [model for model in models if MODEL_QUALITY.get(model, floor) >= floor]
+
+    def record(self, model: str, latency: float, error: BaseException | None = None) -> None:
+        rate_limited = error is not None and _rate_limit_retry_after(error) is not None
+        with self._lock:
+            self._outcomes.setdefault(model, deque(maxlen=self._window_size)).append((time.monotonic(), latency, error is not None, rate_limited))
+
+    async def ainvoke(self, model: str, prompt, config: dict | None = None, **kwargs: Any):
+        """get_chat_llm(model)로 호출하고 지연·오류와 prompt 캐시 사용량 기록 (kwargs는 API 요청 인자, 예: response_format)"""
+        started = time.perf_counter()
+        try:
+            response = await get_chat_llm(model_name=model).ainvoke(prompt, config=config, **kwargs)
+        except asyncio.CancelledError:
+            # deadline·hedge로 취소된 호출의 지연은 최소한 지금까지 걸린 시간
+            self.record(model, time.perf_counter() - started)
+            raise
+        except Exception as e:
+            self.record(model, time.perf_counter() - started, e)
+            raise
+        latency = time.perf_counter() - started
+        self.record(model, latency)
+        get_prompt_cache_stats().record(model, getattr(response, "usage_metadata", None), latency)
+        return response
+
+    def _recent(self, model: str) -> list[tuple]:
+        outcomes = self._outcomes.get(model)
+        if not outcomes:
+            return []
+        cutoff = time.monotonic() - self.window_seconds
+        while outcomes and outcomes[0][0] < cutoff:
+            outcomes.popleft()
+        return list(outcomes)
+
+    def _health(self, model: str) -> dict:
+        recent = self._recent(model)
+        latencies = [latency for _, latency, error, _ in recent if not error]
+        return {
+            "samples": len(recent),
+            "error_rate": sum(error for _, _, error, _ in recent) / len(recent) if recent else 0.0,
+            "rate_limit_rate": sum(rate_limited for *_, rate_limited in recent) / len(recent) if recent else 0.0,
+            "p50_s": _percentile(latencies, 0.5) if latencies else None,
+            "p90_s": _percentile(latencies, 0.9) if latencies else None,
+        }
+
+    def _problem(self, health: dict) -> str | None:
+        """건강하지 않은 이유 (건강하면 None)"""
+        if health["samples"] < self.MIN_SAMPLES:
+            return None
+        if health["rate_limit_rate"] > self.MAX_RATE_LIMIT_RATE:
+            return "rate_limited"
+        if health["error_rate"] > self.MAX_ERROR_RATE:
+            return "errors"
+        if health["p90_s"] is not None and health["p90_s"] > self.latency_target:
+            return "slow"
+        return None
+
+    def choose(self, exclude: tuple[str, ...] = (), models: tuple[str, ...] | None = None, quality_floor: int | None = None) -> str:
+        """
+        호출 1회에 쓸 모델 선택
+
+        Args:
+            exclude: 이번 호출에서 이미 실패한 모델 (재시도 시 다른 모델로 넘어감)
+            models, quality_floor: 라우터 설정 대신 쓸 후보·품질 하한
+        """
+        allowed = self.candidates(models, quality_floor)
+        candidates = [model for model in allowed if model not in exclude] or allowed or list(models or self.models)
+        with self._lock:
+            health = {model: self._health(model) for model in candidates}
+        problems = {model: self._problem(health[model]) for model in candidates}
+
+        def quality(model: str) -> int:
+            return MODEL_QUALITY.get(model, self.quality_floor)
+
+        # 품질이 같으면 설정 순서가 앞선 모델
+        best = max(candidates, key=quality)
+        healthy = [model for model in candidates if problems[model] is None]
+        if healthy:
+            model = max(healthy, key=quality)
+            if model == best:
+                reason = "retry" if exclude else "preferred"
+            else:
+                reason = f"{problems[best]}_fallback"
+        else:
+            # 모두 건강하지 않으면 429·오류가 적고 빠른 모델
+            model = min(candidates, key=lambda model: (
+                health[model]["rate_limit_rate"], health[model]["error_rate"], health[model]["p90_s"] or 0.0))
+            reason = "degraded"
+        with self._lock:
+            self.decisions[(model, reason)] = self.decisions.get((model, reason), 0) + 1
+        return model
+
+    def stats(self) -> dict:
+        with self._lock:
+            models = {}
+            for model in self.models:
+                health = self._health(model)
+                models[model] = {
+                    **{key: round(value, 3) if isinstance(value, float) else value for key, value in health.items()},
+                    "problem": self._problem(health),
+                }
+            decisions = {f"{model}:{reason}": count for (model, reason), count in self.decisions.items()}
+        return {
+            "quality_floor": self.quality_floor,
+            "latency_target_s": self.latency_target,
+            "candidates": self.candidates(),
+            "models": models,
+            "decisions": decisions,
+        }
+
+
+@lru_cache
+def get_model_router() -> ModelRouter:
+    """섹션 생성 모델 라우터 (워커당 1개)"""
+    settings = get_settings()
+    models = [model.strip() for model in settings.llm_router_models.split(",") if model.strip()]
+    return ModelRouter(models, settings.llm_router_quality_floor, settings.llm_router_latency_target)
+
 
 @lru_cache
 def get_chat_llm(
@@ -20,6 +640,15 @@ def get_chat_llm(
     if model_name in ["gpt-5", "gpt-5-mini", "gpt-5-nano"]:
         actual_temperature = 1.0
 
+    if settings.llm_gateway_enabled:
+        return GatewayChatOpenAI(
+            model=model_name,
+            temperature=actual_temperature,
+            api_key=settings.openai_api_key,
+            # x-ratelimit-* 헤더로 gateway 예산을 조정
+            include_response_headers=True,
+        )
+
     return ChatOpenAI(
         model=model_name,
         temperature=actual_temperature,
@@ -35,12 +664,46 @@ def get_openai_client():
     return client
 
 
+# fast-sentences의 embedding 필드와 같은 모델이어야 kNN 검색이 의미 있음
+EMBEDDING_MODEL = "text-embedding-ada-002"
+
+
+def get_query_embeddings(
+        texts: list[str],
+        model_name: str = EMBEDDING_MODEL
+) -> list[list[float] | None]:
+    """
+    검색 쿼리 임베딩 (디스크 캐시 + 캐시에 없는 쿼리만 한 번에 배치 요청)
+
+    Returns:
+        입력 순서대로의 벡터 리스트 (실패 시 해당 항목 None)
+    """
+    cache = get_embedding_cache()
+    vectors = cache.get_many(model_name, texts)
+
+    missing = list(dict.fromkeys(
+        normalize_query(text) for text in texts if normalize_query(text) not in vectors
+    ))
+    if missing:
+        try:
+            response = get_openai_client().embeddings.create(model=model_name, input=missing)
+            new_vectors = {query: item.embedding for query, item in zip(missing, response.data)}
+            cache.set_many(model_name, new_vectors)
+            vectors.update(new_vectors)
+        except Exception as e:
+            # 임베딩 실패 시 해당 쿼리는 kNN 없이 BM25만 사용
+            logger.warning(f"쿼리 임베딩 실패, kNN 없이 BM25만 사용: {type(e).__name__}: {e}")
+
+    return [vectors.get(normalize_query(text)) for text in texts]
+
+
 # TODO: get_key_word_list_from_text
 def get_key_word_list_from_text(
         text: str | None,
         max_keywords: int = -1,
         model_name: str = "gpt-4.1-mini",
-        temperature: float = 0.2
+        temperature: float = 0.2,
+        priority: str = DEFAULT_LLM_PRIORITY
 ) -> list[str | None]:
     """
     텍스트에서 키워드를 추출하는 함수
@@ -48,6 +711,7 @@ def get_key_word_list_from_text(
     Args:
         text: 키워드를 추출할 텍스트
         max_keywords: 추출할 최대 키워드 수 (기본값: 10)
+        priority: LLM gateway 우선순위 (interactive | batch)
         
     Returns:
         추출된 키워드 리스트
@@ -68,7 +732,7 @@ keyword1, keyword2, keyword3, ...
 
 Keywords:"""
 
-        response = llm.invoke(prompt)
+        response = llm.invoke(prompt, config=llm_priority_config(priority))
         keywords_text = response.content.strip()
 
         # 쉼표로 구분된 키워드를 리스트로 변환
@@ -90,7 +754,8 @@ def translate_text(
         text: str,
         target_language: str = "English",
         model_name: str = "gpt-4.1-mini", # 의료·법적 정확성/톤 중요
-        temperature: float = 0.2
+        temperature: float = 0.2,
+        priority: str = DEFAULT_LLM_PRIORITY
 ) -> str:
     """
     텍스트를 번역하는 함수
@@ -104,7 +769,7 @@ def translate_text(
 
         Translated text:"""
 
-        response = llm.invoke(prompt)
+        response = llm.invoke(prompt, config=llm_priority_config(priority))
         return response.content.strip()
     except Exception as e:
         # OpenAI API 할당량 초과나 기타 오류 시 원본 텍스트 반환
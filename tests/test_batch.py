@@ -0,0 +1,62 @@
+import json
+import asyncio
+
+from surgiform.api.models.base import ConsentBase
+from surgiform.api.models.base import ReferenceBase
+from surgiform.core.consent import batch
+
+
+def _record(registration_no, surgery_name):
+    return {
+        "registration_no": registration_no,
+        "patient_name": "환자",
+        "surgery_name": surgery_name,
+        "age": 45,
+        "gender": "M",
+        "scheduled_date": "2025-01-15",
+        "diagnosis": "담석증",
+        "surgical_site_mark": "RUQ",
+        "participants": [{"is_specialist": True, "department": "GS"}],
+        "patient_condition": "복통",
+    }
+
+
+def _empty_consent():
+    sections = ("prognosis_without_surgery", "alternative_treatments", "surgery_purpose_necessity_effect",
+                "possible_complications_sequelae", "emergency_measures", "mortality_risk")
+    details = {name: "" for name in ("overall_description", "estimated_duration", "method_change_or_addition",
+                                     "transfusion_possibility", "surgeon_change_possibility")}
+    consents = ConsentBase(**{name: "" for name in sections}, surgery_method_content=details)
+    references = ReferenceBase(**{name: [] for name in sections}, surgery_method_content={name: [] for name in details})
+    return consents, references
+
+
+def test_run_batch_groups_by_procedure_and_resumes(monkeypatch, tmp_path):
+    input_path = tmp_path / "schedule.jsonl"
+    output_path = tmp_path / "consents.jsonl"
+    records = [_record("1", "B 수술"), _record("2", "A 수술"), _record("3", "B 수술")]
+    input_path.write_text("\n".join(json.dumps(record, ensure_ascii=False) for record in records), encoding="utf-8")
+
+    calls = []
+
+    async def fake_generate_consent(record, **kwargs):
+        # 일괄 생성에는 요청 deadline을 적용하지 않음
+        assert kwargs["timeout"] == 0
+        calls.append(record.registration_no)
+        if record.registration_no == "3" and len(calls) <= 3:
+            raise RuntimeError("timeout")
+        return *_empty_consent(), {}
+
+    monkeypatch.setattr(batch, "generate_consent_with_status", fake_generate_consent)
+    monkeypatch.setattr(batch, "close_es_client", lambda: asyncio.sleep(0))
+
+    first = asyncio.run(batch.run_batch(str(input_path), str(output_path), concurrency=1))
+    # 같은 수술끼리 연달아 실행
+    assert calls == ["2", "1", "3"]
+    assert first == {"total": 3, "skipped": 0, "ok": 2, "error": 1}
+
+    # 재실행하면 실패한 레코드만 다시 생성
+    second = asyncio.run(batch.run_batch(str(input_path), str(output_path), concurrency=1))
+    assert calls[3:] == ["3"]
+    assert second == {"total": 3, "skipped": 2, "ok": 1}
+    assert len(batch.load_completed_keys(str(output_path))) == 3
@@ -0,0 +1,61 @@
+import asyncio
+
+from surgiform.core.cache import SingleFlight
+
+
+def test_singleflight_shares_one_computation_and_survives_leader_cancel():
+    calls = []
+
+    async def run():
+        flight = SingleFlight("test")
+        release = asyncio.Event()
+
+        async def compute():
+            calls.append(1)
+            await release.wait()
+            return "result"
+
+        leader = asyncio.ensure_future(flight.run("key", compute))
+        follower = asyncio.ensure_future(flight.run("key", compute))
+        await asyncio.sleep(0)
+
+        # 먼저 온 요청이 연결을 끊어도 남은 요청은 같은 계산 결과를 받음
+        leader.cancel()
+        await asyncio.sleep(0)
+        release.set()
+        return await follower, leader.cancelled(), flight.stats()
+
+    result, leader_cancelled, stats = asyncio.run(run())
+
+    assert result == "result"
+    assert leader_cancelled
+    assert len(calls) == 1
+    assert stats == {"inflight": 0, "calls": 1, "coalesced": 1, "cancelled": 0}
+
+
+def test_singleflight_cancels_computation_when_all_waiters_leave():
+    async def run():
+        flight = SingleFlight("test")
+        started = asyncio.Event()
+        cancelled = asyncio.Event()
+
+        async def compute():
+            started.set()
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        waiters = [asyncio.ensure_future(flight.run("key", compute)) for _ in range(2)]
+        await started.wait()
+        for waiter in waiters:
+            waiter.cancel()
+        await asyncio.wait_for(cancelled.wait(), timeout=1)
+        await asyncio.sleep(0)
+        return flight.stats()
+
+    stats = asyncio.run(run())
+
+    assert stats["cancelled"] == 1
+    assert stats["inflight"] == 0
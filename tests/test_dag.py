@@ -0,0 +1,66 @@
+import asyncio
+
+from surgiform.core.dag import AsyncDAG
+
+
+def test_dag_starts_nodes_as_soon_as_their_inputs_resolve():
+    order = []
+
+    async def run():
+        slow_done = asyncio.Event()
+        dag = AsyncDAG("test")
+
+        async def fast():
+            return 1
+
+        async def slow():
+            await asyncio.sleep(0.05)
+            slow_done.set()
+            return 2
+
+        async def after_fast(value):
+            # slow 노드를 기다리지 않고 바로 시작
+            order.append(("after_fast", slow_done.is_set()))
+            return value + 10
+
+        async def after_both(a, b):
+            order.append(("after_both", slow_done.is_set()))
+            return a + b
+
+        dag.add("fast", fast)
+        dag.add("slow", slow)
+        dag.add("after_fast", after_fast, ("fast",))
+        dag.add("after_both", after_both, ("after_fast", "slow"))
+        result = await dag.result("after_both")
+        return result, dag.timing_summary()
+
+    result, timings = asyncio.run(run())
+
+    assert result == 13
+    assert order == [("after_fast", False), ("after_both", True)]
+    assert timings["slow"]["status"] == "done"
+    assert timings["slow"]["duration_ms"] >= 40
+
+
+def test_dag_propagates_dependency_failure():
+    async def run():
+        dag = AsyncDAG("test")
+
+        async def broken():
+            raise ValueError("boom")
+
+        async def child(value):
+            return value
+
+        dag.add("broken", broken)
+        dag.add("child", child, ("broken",))
+        try:
+            await dag.result("child")
+        except ValueError:
+            return dag.timing_summary()
+
+    timings = asyncio.run(run())
+
+    assert timings["broken"]["status"] == "failed"
+    assert timings["child"]["status"] == "failed"
+    assert "started_ms" not in timings["child"]
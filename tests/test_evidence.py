@@ -0,0 +1,70 @@
+from surgiform.core.consent import evidence
+from surgiform.core.consent.evidence import fuse_evidence
+
+
+def _hit(text, sentence_id=None):
+    return {"id": sentence_id, "url": "u", "text": text, "title": "t", "section": "", "entities": [], "score": 1.0}
+
+
+def test_fuse_evidence_deduplicates_and_ranks_by_rrf():
+    result_lists = [
+        [_hit("shared", "s1"), _hit("only in first", "s2")],
+        [_hit("only in second", "s3"), _hit("shared", "s1")],
+        [_hit("Same  text "), _hit("same text")],
+    ]
+
+    fused = fuse_evidence(result_lists)
+
+    assert [hit["text"] for hit in fused][0] == "shared"
+    assert len(fused) == 4
+    assert len(fuse_evidence(result_lists, top_n=2)) == 2
+
+
+def test_pack_evidence_stops_at_budget(monkeypatch):
+    monkeypatch.setattr(evidence, "count_tokens", lambda text, model_name: len(text.split()))
+    hits = [_hit("one two three"), _hit("four five"), _hit("six")]
+
+    packed = evidence.pack_evidence(hits, budget=7, model_name="gpt-4.1")
+
+    assert [hit["text"] for hit in packed.hits] == ["one two three", "four five"]
+    assert [hit["text"] for hit in packed.dropped] == ["six"]
+    assert packed.tokens == 7
+
+
+def test_count_tokens_caches_missing_tokenizer(monkeypatch):
+    calls = []
+
+    def fail(name):
+        calls.append(name)
+        raise OSError("offline")
+
+    monkeypatch.setattr(evidence.tiktoken, "encoding_for_model", fail)
+    evidence._get_encoding.cache_clear()
+    try:
+        assert evidence.count_tokens("a" * 30, "unknown-model") == 11
+        assert evidence.count_tokens("b" * 30, "unknown-model") == 11
+    finally:
+        evidence._get_encoding.cache_clear()
+
+    assert calls == ["unknown-model"]
+
+
+def test_select_mmr_skips_near_duplicates():
+    hits = [
+        {**_hit("bleeding may occur after cholecystectomy"), "rrf_score": 1.0},
+        {**_hit("bleeding may occur after the cholecystectomy"), "rrf_score": 0.95},
+        {**_hit("bile leak is a rare complication"), "rrf_score": 0.9},
+    ]
+
+    selected = evidence.select_mmr(hits, top_n=2, diversity=0.5)
+
+    assert [hit["text"] for hit in selected] == [hits[0]["text"], hits[2]["text"]]
+
+
+def test_tfidf_matrix_caps_vocabulary():
+    texts = ["bleeding risk after surgery", "bleeding risk", "infection after surgery"]
+
+    matrix = evidence.tfidf_matrix(texts, max_vocabulary=3)
+
+    assert matrix.shape == (3, 3)
+    assert all(abs(float((row ** 2).sum()) - 1.0) < 1e-5 for row in matrix)
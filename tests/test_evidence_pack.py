@@ -0,0 +1,94 @@
+import asyncio
+from types import SimpleNamespace
+
+from surgiform.api.models.consent import Gender
+from surgiform.api.models.consent import SpecialCondition
+from surgiform.core.consent import build_evidence_pack
+from surgiform.core.consent import evidence_pack
+from surgiform.core.consent import retrieval
+from surgiform.core.consent.evidence_pack import EvidencePack
+from surgiform.core.consent.evidence_pack import write_evidence_pack
+from surgiform.core.ingest.uptodate.run_es import get_retrieval_cache
+
+
+def _hit(sentence_id, text, score):
+    return {"id": sentence_id, "url": "u", "text": text, "title": "t", "section": "s", "entities": ["surgery"], "score": score}
+
+
+def test_evidence_pack_round_trip(tmp_path):
+    path = str(tmp_path / "evidence.pack")
+    shared = _hit("s1", "출혈 위험 bleeding risk", 3.0)
+    write_evidence_pack(path, {
+        ("복강경 담낭절제술", "담석증", "mortality_risk", "diabetes"): [shared, _hit("s2", "other", 1.5)],
+        ("복강경 담낭절제술", "담석증", "emergency_measures", "diabetes"): [shared],
+        ("복강경 담낭절제술", "담석증", "emergency_measures", "smoking"): [],
+    }, index_generation="g1")
+
+    pack = EvidencePack(path)
+    try:
+        assert pack.stats()["sentences"] == 2
+        assert pack.covers("복강경  담낭절제술 ", "담석증", "Diabetes")
+        assert not pack.covers("복강경 담낭절제술", "담석증", "renal")
+        hits = pack.get("복강경 담낭절제술", "담석증", "mortality_risk", "diabetes")
+        assert [(hit["id"], hit["score"]) for hit in hits] == [("s1", 3.0), ("s2", 1.5)]
+        assert hits[0]["text"] == "출혈 위험 bleeding risk"
+        assert pack.get("복강경 담낭절제술", "담석증", "emergency_measures", "smoking") == []
+        assert pack.get("다른 수술", "담석증", "emergency_measures", "smoking") is None
+    finally:
+        pack.close()
+
+
+def test_stale_evidence_pack_is_rejected(tmp_path, monkeypatch):
+    path = str(tmp_path / "evidence.pack")
+    write_evidence_pack(path, {("수술", "진단", "mortality_risk", "diabetes"): [_hit("s1", "text", 1.0)]}, index_generation="g1")
+    cache = get_retrieval_cache()
+    monkeypatch.setattr(cache, "generation", "g2")
+
+    # 로드 시 live generation과 다르면 등록하지 않음
+    assert evidence_pack.load_evidence_pack(path) is None
+    assert evidence_pack.get_evidence_pack() is None
+
+    monkeypatch.setattr(cache, "generation", "g1")
+    pack = evidence_pack.load_evidence_pack(path)
+    try:
+        assert evidence_pack.get_evidence_pack() is pack
+        # 실행 중 재색인되면 그때부터 사용하지 않음
+        monkeypatch.setattr(cache, "generation", "g3")
+        assert evidence_pack.get_evidence_pack() is None
+        assert pack.stale
+    finally:
+        evidence_pack.close_evidence_pack()
+
+
+def test_built_pack_serves_procedure_and_site_keywords_without_es(tmp_path, monkeypatch):
+    path = str(tmp_path / "evidence.pack")
+    es_queries = []
+
+    async def fake_get_es_responses(queries, k, score_threshold):
+        es_queries.append(list(queries))
+        return [[_hit(f"{query} 1", f"{query} general", 3.0), _hit(f"{query} 2", f"{query} bleeding risk", 2.0)]
+                for query in queries]
+
+    monkeypatch.setattr(build_evidence_pack, "translate_text", lambda text, **kwargs: f"en:{text}")
+    monkeypatch.setattr(build_evidence_pack, "get_es_responses", fake_get_es_responses)
+    entries = asyncio.run(build_evidence_pack.build_procedure_entries("복강경 담낭절제술", "담석증", ["RUQ"]))
+    write_evidence_pack(path, entries)
+
+    monkeypatch.setattr(retrieval, "get_es_responses", fake_get_es_responses)
+    monkeypatch.setattr(get_retrieval_cache(), "generation", None)
+    evidence_pack.load_evidence_pack(path)
+    try:
+        payload = SimpleNamespace(surgery_name="복강경 담낭절제술", diagnosis="담석증", age=45, gender=Gender.male,
+                                  surgical_site_mark="RUQ", special_conditions=SpecialCondition(diabetes=True))
+        es_queries.clear()
+        plan = asyncio.run(retrieval.RetrievalPlan.search(payload, "en:담석증", "en:복강경 담낭절제술",
+                                                          retrieval.base_keyword_sources(payload)))
+
+        # 나이 키워드만 요청 시 검색
+        assert es_queries == [["en:담석증 en:복강경 담낭절제술 45 years old"]]
+        assert [hit["text"] for hit in plan.shared_hits(k=2)] == ["en:담석증 en:복강경 담낭절제술 general",
+                                                                  "en:담석증 en:복강경 담낭절제술 bleeding risk"]
+        site_hits = plan.hits_for_section("mortality_risk", k=1)[plan.keywords.index("RUQ")]
+        assert site_hits[0]["text"] == "en:담석증 en:복강경 담낭절제술 RUQ general"
+    finally:
+        evidence_pack.close_evidence_pack()
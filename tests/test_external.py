@@ -1,6 +1,92 @@
+import time
+import asyncio
+
 from surgiform.external.openai_client import get_chat_llm
+from surgiform.external.openai_client import LLMGateway
+from surgiform.external.openai_client import ModelBudget
+from surgiform.external.openai_client import ModelRouter
+from surgiform.external.openai_client import parse_reset_duration
 
 
 def test_llm_stub():
     llm = get_chat_llm()
     assert llm.model_name.startswith("gpt")
+
+
+def test_llm_gateway_serves_interactive_before_batch():
+    gateway = LLMGateway(max_concurrency=1, requests_per_minute=1000, tokens_per_minute=1_000_000)
+    order = []
+
+    async def call(priority):
+        permit = await gateway.acquire_async("gpt-test", 10, priority)
+        order.append(priority)
+        await asyncio.sleep(0.01)
+        gateway.release(permit, used_tokens=10)
+
+    async def run():
+        first = await gateway.acquire_async("gpt-test", 10, "batch")
+        waiting = [asyncio.ensure_future(call("batch")), asyncio.ensure_future(call("interactive"))]
+        await asyncio.sleep(0.01)
+        gateway.release(first, used_tokens=10)
+        await asyncio.gather(*waiting)
+
+    asyncio.run(run())
+
+    assert order == ["interactive", "batch"]
+    assert gateway.stats()["queue_wait"]["gpt-test:batch"]["requests"] == 2
+
+
+def test_llm_gateway_sync_acquire_waits_off_loop_and_rejects_on_loop():
+    gateway = LLMGateway(max_concurrency=1, requests_per_minute=1000, tokens_per_minute=1_000_000)
+
+    async def run():
+        first = await gateway.acquire_async("gpt-test", 10, "interactive")
+        # 이벤트 루프 스레드에서는 한도를 건너뛰지 않고 거부
+        try:
+            gateway.acquire("gpt-test", 10)
+            on_loop_error = None
+        except RuntimeError as e:
+            on_loop_error = e
+        # 스레드에서는 동시 실행 한도가 풀릴 때까지 대기
+        waiting = asyncio.ensure_future(asyncio.to_thread(gateway.acquire, "gpt-test", 10))
+        await asyncio.sleep(0.05)
+        blocked = not waiting.done()
+        gateway.release(first, used_tokens=10)
+        second = await asyncio.wait_for(waiting, 2)
+        gateway.release(second, used_tokens=10)
+        return on_loop_error, blocked
+
+    on_loop_error, blocked = asyncio.run(run())
+
+    assert on_loop_error is not None
+    assert blocked
+
+
+def test_model_budget_follows_rate_limit_headers():
+    budget = ModelBudget("gpt-test", max_concurrency=4, requests_per_minute=1000, tokens_per_minute=1_000_000)
+    budget.update_from_headers({
+        "x-ratelimit-limit-tokens": "60000",
+        "x-ratelimit-remaining-tokens": "0",
+        "x-ratelimit-remaining-requests": "10",
+    }, time.monotonic())
+
+    assert budget.tokens_per_minute == 60000
+    # 남은 토큰이 없으면 1000 토큰이 채워질 때까지(약 1초) 대기
+    assert 0.9 < budget.wait_time(1000, time.monotonic()) <= 1.0
+    assert parse_reset_duration("6m0s") == 360
+    assert parse_reset_duration("20ms") == 0.02
+
+
+def test_model_router_routes_around_slow_and_rate_limited_models():
+    router = ModelRouter(["gpt-5", "gpt-4.1", "gpt-4.1-mini", "gpt-3.5-turbo"], quality_floor=3, latency_target=10.0)
+    assert router.candidates() == ["gpt-5", "gpt-4.1", "gpt-4.1-mini"]
+    # 표본이 없으면 품질이 가장 높은 모델
+    assert router.choose() == "gpt-5"
+
+    for _ in range(ModelRouter.MIN_SAMPLES):
+        router.record("gpt-5", 30.0)
+    assert router.choose() == "gpt-4.1"
+
+    # 재시도 시 이미 쓴 모델은 제외
+    assert router.choose(exclude=("gpt-4.1",)) == "gpt-4.1-mini"
+    assert router.stats()["decisions"] == {"gpt-5:preferred": 1, "gpt-4.1:slow_fallback": 1, "gpt-4.1-mini:slow_fallback": 1}
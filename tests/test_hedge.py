@@ -0,0 +1,48 @@
+import asyncio
+
+from surgiform.core.hedge import HedgedCaller
+
+
+def test_hedge_fires_after_threshold_and_cancels_slow_primary():
+    cancelled = []
+
+    async def slow():
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.append("primary")
+            raise
+        return "slow"
+
+    async def fast():
+        return "fast"
+
+    async def run():
+        hedger = HedgedCaller("test", percentile=0.5, min_samples=2, budget=1.0)
+        # 표본이 부족하면 hedge 없이 primary 결과 사용
+        assert await hedger.call("model", fast) == "fast"
+        assert hedger.threshold("model") is None
+        hedger.record("model", 0.01)
+        assert await hedger.call("model", slow, hedge=fast) == "fast"
+        return hedger
+
+    hedger = asyncio.run(run())
+    assert cancelled == ["primary"]
+    assert hedger.stats()["hedged"] == 1
+    assert hedger.stats()["hedge_wins"] == 1
+
+
+def test_hedge_budget_caps_duplicate_requests():
+    async def slow():
+        await asyncio.sleep(0.05)
+        return "slow"
+
+    async def run():
+        hedger = HedgedCaller("test", percentile=0.5, min_samples=1, budget=0.0)
+        hedger.record("model", 0.001)
+        assert await hedger.call("model", slow) == "slow"
+        return hedger
+
+    hedger = asyncio.run(run())
+    assert hedger.stats()["hedged"] == 0
+    assert hedger.stats()["budget_skips"] == 1
@@ -0,0 +1,34 @@
+from surgiform.core.ingest.uptodate.local_bm25 import LocalBM25Index
+from surgiform.core.ingest.uptodate.local_bm25 import build_local_index
+
+
+def _record(sentence_id, text, title="Cholecystectomy", entities=None):
+    return {
+        "sentence_id": sentence_id,
+        "document_url": f"https://example.com/{sentence_id}",
+        "text": text,
+        "document_title": title,
+        "section": "Complications",
+        "entities": entities or [],
+    }
+
+
+def test_local_bm25_search_ranks_by_field_weighted_bm25(tmp_path):
+    path = str(tmp_path / "fast-sentences.bm25")
+    build_local_index([
+        _record("s1", "Bile duct injury is a serious complication of cholecystectomy."),
+        _record("s2", "Wound infection is common after open surgery.", title="Hernia repair"),
+        _record("s3", "Bleeding and bile leak may occur.", entities=["surgery"]),
+        _record("s1", "duplicate sentence id is skipped"),
+    ], path)
+
+    index = LocalBM25Index(path)
+    try:
+        hits = index.search("bile duct injury", k=10)
+        assert [hit["id"] for hit in hits] == ["s1", "s3"]
+        assert set(hits[0]) == {"id", "url", "text", "title", "section", "entities", "score"}
+        assert index.search("hernia", k=10)[0]["id"] == "s2"
+        assert index.search("nonexistent", k=10) == []
+        assert index.stats()["doc_count"] == 3
+    finally:
+        index.close()
@@ -0,0 +1,67 @@
+import asyncio
+from types import SimpleNamespace
+
+from surgiform.api.models.consent import PublicConsentGenerateIn
+from surgiform.core.consent import relevance
+from surgiform.core.consent.relevance import context_terms
+from surgiform.core.consent.relevance import filter_relevant
+from surgiform.core.consent.relevance import validate_with_llm
+
+
+def _hit(sentence_id, text, entities=()):
+    return {"id": sentence_id, "url": "u", "text": text, "title": "t", "section": "", "entities": list(entities), "score": 1.0}
+
+
+def _payload():
+    return PublicConsentGenerateIn(
+        surgery_name="복강경 담낭절제술",
+        age=45,
+        gender="M",
+        scheduled_date="2025-01-15",
+        diagnosis="담석증",
+        surgical_site_mark="RUQ",
+        participants=[{"is_specialist": True, "department": "GS"}],
+        patient_condition="복통",
+    )
+
+
+def test_local_filter_keeps_hits_matching_patient_context_and_entities():
+    context = context_terms("cholelithiasis", "laparoscopic cholecystectomy", ["45 years old", "diabetes"])
+    result_lists = [[
+        _hit("s1", "Laparoscopic cholecystectomy is the standard treatment for symptomatic cholelithiasis."),
+        _hit("s2", "Bile duct injury is a rare complication.", entities=["cholecystectomy", "diabetes mellitus"]),
+        _hit("s3", "Cataract surgery restores vision in older adults."),
+    ]]
+
+    filtered = filter_relevant(result_lists, "possible_complications_sequelae", context, min_score=0.15)
+
+    assert "45" not in context and "years" not in context
+    assert [hit["id"] for hit in filtered[0]] == ["s1", "s2"]
+    assert all("relevance" in hit for hit in filtered[0])
+
+
+def test_llm_validation_sends_one_call_per_section_and_fails_open(monkeypatch):
+    prompts = []
+    answers = iter(['["N", "Y"]', "not json"])
+
+    class FakeRouter:
+        async def ainvoke(self, model, prompt, config=None, **kwargs):
+            prompts.append(prompt)
+            return SimpleNamespace(content=next(answers))
+
+    monkeypatch.setattr(relevance, "get_model_router", lambda: FakeRouter())
+    result_lists = [[_hit("s1", "relevant"), _hit("s2", "irrelevant")], [_hit("s2", "irrelevant"), _hit("s3", "shared")]]
+
+    async def run():
+        validated = await validate_with_llm(result_lists, "mortality_risk", _payload(), None, "batch", exclude_texts={"shared"})
+        # 응답 형식이 맞지 않으면 입력 그대로 사용
+        unchanged = await validate_with_llm(result_lists, "mortality_risk", _payload(), None, "batch", exclude_texts={"shared"})
+        return validated, unchanged
+
+    validated, unchanged = asyncio.run(run())
+
+    assert len(prompts) == 2
+    # 두 키워드에 모두 나온 문장이 RRF 순위 1위
+    assert "1. irrelevant" in prompts[0] and "2. relevant" in prompts[0] and "shared" not in prompts[0]
+    assert [[hit["id"] for hit in hits] for hits in validated] == [["s1"], ["s3"]]
+    assert unchanged == result_lists
@@ -0,0 +1,320 @@
+import json
+import asyncio
+from datetime import date
+
+from surgiform.api.models.consent import ConsentGenerateIn
+from surgiform.api.models.consent import ConsentGenerateOut
+from surgiform.api.models.consent import ConsentRegenerateIn
+from surgiform.api.models.consent import SpecialCondition
+from surgiform.core.consent import pipeline
+from surgiform.core.consent import retrieval
+from surgiform.core.consent import structured
+from surgiform.core.consent.result_cache import get_consent_cache
+from surgiform.core.consent.result_cache import get_section_cache
+from surgiform.core.deadline import RequestBudget
+from surgiform.core.deadline import budget_context
+from surgiform.deploy.settings import get_settings
+from surgiform.deploy.service.consent import create_consent
+from surgiform.deploy.service.consent import regenerate_consent
+from surgiform.deploy.service.consent import stream_consent_events
+
+
+def _payload(patient_name, **overrides):
+    fields = dict(
+        registration_no="12345678",
+        patient_name=patient_name,
+        surgery_name="복강경 담낭절제술",
+        age=45,
+        gender="M",
+        scheduled_date=date(2025, 1, 15),
+        diagnosis="담석증",
+        surgical_site_mark="RUQ",
+        participants=[{"is_specialist": True, "department": "GS"}],
+        patient_condition="복통",
+    )
+    # model_copy(update=...)는 검증을 건너뛰므로 덮어쓸 필드도 생성자로 검증
+    return ConsentGenerateIn(**{**fields, **overrides})
+
+
+def _patch_preprocessing(monkeypatch):
+    async def fake_get_es_responses(queries, k, score_threshold):
+        return [[] for _ in queries]
+
+    monkeypatch.setattr(pipeline, "translate_text", lambda text, **kwargs: f"en:{text}")
+    monkeypatch.setattr(pipeline, "get_key_word_list_from_text", lambda text, **kwargs: [])
+    monkeypatch.setattr(retrieval, "get_es_responses", fake_get_es_responses)
+
+
+def test_generate_consent_reuses_result_for_same_deidentified_payload(monkeypatch):
+    calls = []
+
+
+    async def fake_generate_rag_response(processed_payload, task_name, tried_models=None):
+        calls.append(task_name)
+        return f"{task_name} 설명", []
+
+    _patch_preprocessing(monkeypatch)
+    monkeypatch.setattr(pipeline, "generate_rag_response", fake_generate_rag_response)
+    get_consent_cache().clear()
+    get_section_cache().clear()
+
+    first, _ = asyncio.run(pipeline.generate_consent(_payload("홍길동")))
+    # 환자 식별 정보만 다른 재제출은 캐시에서 반환
+    second, _ = asyncio.run(pipeline.generate_consent(_payload("김철수")))
+
+    assert len(calls) == 11
+    assert second == first
+    assert second is not first
+
+
+def test_section_cache_shares_procedure_only_sections_across_patients(monkeypatch):
+    calls = []
+
+
+    async def fake_generate_rag_response(processed_payload, task_name, tried_models=None):
+        calls.append(task_name)
+        return f"{task_name} 설명", []
+
+    _patch_preprocessing(monkeypatch)
+    monkeypatch.setattr(pipeline, "generate_rag_response", fake_generate_rag_response)
+    get_consent_cache().clear()
+    get_section_cache().clear()
+
+    asyncio.run(pipeline.generate_consent(_payload("홍길동")))
+    other_patient = _payload("홍길동", age=70, special_conditions=SpecialCondition(diabetes=True))
+    asyncio.run(pipeline.generate_consent(other_patient))
+
+    regenerated = calls[11:]
+    assert "estimated_duration" not in regenerated
+    assert "method_change_or_addition" not in regenerated
+    assert "possible_complications_sequelae" in regenerated
+
+
+def test_stream_consent_events_emit_sections_then_done(monkeypatch):
+
+    async def fake_generate_rag_response(processed_payload, task_name, tried_models=None):
+        if task_name == "mortality_risk":
+            raise ValueError("boom")
+        return f"{task_name} 설명", []
+
+    _patch_preprocessing(monkeypatch)
+    monkeypatch.setattr(pipeline, "generate_rag_response", fake_generate_rag_response)
+    get_consent_cache().clear()
+    get_section_cache().clear()
+
+    async def collect():
+        return [message async for message in stream_consent_events(_payload("홍길동"))]
+
+    messages = asyncio.run(collect())
+    events = [message.split("\n", 1)[0].removeprefix("event: ") for message in messages]
+
+    assert events.count("section") == 10
+    assert events.count("error") == 1
+    assert events[-1] == "done"
+    done = ConsentGenerateOut.model_validate_json(messages[-1].split("data: ", 1)[1])
+    assert done.consents.mortality_risk == ""
+    assert done.consents.surgery_method_content.estimated_duration == "estimated_duration 설명"
+
+
+def test_stream_consent_events_from_cache_serialize_references(monkeypatch):
+    async def fake_generate_rag_response(processed_payload, task_name, tried_models=None):
+        return f"{task_name} 설명", [{"url": "https://example.com", "title": "t", "text": f"{task_name} 근거"}]
+
+    _patch_preprocessing(monkeypatch)
+    monkeypatch.setattr(pipeline, "generate_rag_response", fake_generate_rag_response)
+    get_consent_cache().clear()
+    get_section_cache().clear()
+
+    async def collect():
+        return [message async for message in stream_consent_events(_payload("홍길동"))]
+
+    first = asyncio.run(collect())
+    # 두 번째 요청은 전체 결과 캐시에서 스트리밍
+    second = asyncio.run(collect())
+
+    assert get_consent_cache().stats()["hits"] >= 1
+    sections = [json.loads(message.split("data: ", 1)[1]) for message in second if message.startswith("event: section")]
+    assert len(sections) == 11
+    assert sections[0]["references"][0]["url"] == "https://example.com"
+    assert second[-1] == first[-1]
+
+
+def test_slow_section_degrades_to_placeholder_after_deadline(monkeypatch):
+    async def fake_generate_rag_response(processed_payload, task_name, tried_models=None):
+        if task_name == "possible_complications_sequelae":
+            await asyncio.sleep(5)
+        return f"{task_name} 설명", []
+
+    _patch_preprocessing(monkeypatch)
+    monkeypatch.setattr(pipeline, "generate_rag_response", fake_generate_rag_response)
+    get_consent_cache().clear()
+    get_section_cache().clear()
+
+    consents, _, degraded = asyncio.run(pipeline.generate_consent_with_status(_payload("홍길동"), timeout=0.3))
+
+    assert degraded == {"possible_complications_sequelae": "placeholder"}
+    assert consents.possible_complications_sequelae == pipeline.degraded_placeholder("possible_complications_sequelae")
+    assert consents.prognosis_without_surgery == "prognosis_without_surgery 설명"
+    # degrade된 결과는 전체·섹션 캐시에 남기지 않음
+    assert get_consent_cache().stats()["size"] == 0
+
+
+def test_slow_fast_model_fallback_degrades_to_placeholder(monkeypatch):
+    models = []
+
+    class SlowRouter:
+        def choose(self, exclude=(), **kwargs):
+            return "gpt-5"
+
+        async def ainvoke(self, model, prompt, config=None, **kwargs):
+            models.append(model)
+            await asyncio.sleep(5)
+
+    monkeypatch.setattr(pipeline, "get_model_router", lambda: SlowRouter())
+    monkeypatch.setattr(get_settings(), "consent_fast_model_reserve", 0.2)
+    processed = pipeline.ProcessedPayload(pipeline.preprocess(_payload("홍길동")), "cholelithiasis", "cholecystectomy", [], [],
+                                          retrieval_plan=retrieval.RetrievalPlan([], [], [], keyword_fields=[]))
+    budget = RequestBudget(0.5)
+
+    async def run():
+        return await budget_context(budget).run(asyncio.ensure_future, pipeline.generate_rag_response(processed, "mortality_risk"))
+
+    content, refs = asyncio.run(run())
+
+    # 원래 모델이 예약 시간 전에 끝나지 않아 빠른 모델로 재생성했지만 그것도 deadline을 넘김
+    assert models == ["gpt-5", get_settings().consent_fast_model]
+    assert content == pipeline.degraded_placeholder("mortality_risk")
+    assert refs == []
+    assert budget.degraded == {"mortality_risk": "placeholder"}
+
+
+def test_deadline_placeholder_does_not_leak_into_concurrent_request(monkeypatch):
+    async def fake_generate_rag_response(processed_payload, task_name, tried_models=None):
+        await asyncio.sleep(0.6)
+        return f"{task_name} 설명", []
+
+    _patch_preprocessing(monkeypatch)
+    monkeypatch.setattr(pipeline, "generate_rag_response", fake_generate_rag_response)
+    get_consent_cache().clear()
+    get_section_cache().clear()
+
+    async def run():
+        # 같은 수술 정보로 deadline이 짧은 요청과 제한 없는 요청이 같은 섹션 계산을 기다림
+        return await asyncio.gather(
+            pipeline.generate_consent_with_status(_payload("홍길동"), timeout=0.3),
+            pipeline.generate_consent_with_status(_payload("김철수", age=70), timeout=0),
+        )
+
+    (short_consents, _, short_degraded), (consents, _, degraded) = asyncio.run(run())
+
+    assert set(short_degraded.values()) == {"placeholder"}
+    assert len(short_degraded) == 11
+    assert degraded == {}
+    assert consents.surgery_method_content.estimated_duration == "estimated_duration 설명"
+    assert consents.possible_complications_sequelae == "possible_complications_sequelae 설명"
+    # deadline 없는 요청의 결과만 캐시됨
+    assert get_consent_cache().stats()["size"] == 1
+
+
+def test_section_prompts_share_prefix_up_to_patient_context():
+    payload = pipeline.preprocess(_payload("홍길동"))
+    shared = ["shared evidence"]
+    prompts = [
+        pipeline.build_section_prompt(task_name, payload, pipeline.section_dependencies(task_name), shared, [f"{task_name} evidence"])
+        for task_name in ("overall_description", "possible_complications_sequelae")
+    ]
+
+    prefix = prompts[0][:prompts[0].index("### PATIENT_CONTEXT")]
+    assert prompts[1].startswith(prefix)
+    assert "shared evidence" in prefix and "담석증" in prefix
+    # 섹션명은 공통 prefix에 들어가지 않음
+    assert "overall_description" not in prefix
+    assert prompts[0].rstrip().endswith("nothing else.")
+
+
+def test_structured_mode_falls_back_only_for_invalid_sections(monkeypatch):
+    calls = []
+    prompts = []
+
+    class FakeRouter:
+        def choose(self, exclude=(), **kwargs):
+            return "gpt-4.1"
+
+        async def ainvoke(self, model, prompt, config=None, **kwargs):
+            prompts.append((prompt, kwargs))
+            content = {name: f"{name} 구조화" for name in pipeline.SECTION_NAMES if name not in pipeline.SURGERY_DETAIL_SECTION_NAMES}
+            content["surgery_method_content"] = {name: f"{name} 구조화" for name in pipeline.SURGERY_DETAIL_SECTION_NAMES}
+            content["mortality_risk"] = ""
+            content["surgery_method_content"]["estimated_duration"] = 3
+            return type("Response", (), {"content": json.dumps(content, ensure_ascii=False)})()
+
+    async def fake_generate_rag_response(processed_payload, task_name, tried_models=None):
+        calls.append(task_name)
+        return f"{task_name} 섹션별", []
+
+    _patch_preprocessing(monkeypatch)
+    monkeypatch.setattr(structured, "get_model_router", lambda: FakeRouter())
+    monkeypatch.setattr(pipeline, "generate_rag_response", fake_generate_rag_response)
+    get_consent_cache().clear()
+    get_section_cache().clear()
+
+    consents, _, _ = asyncio.run(pipeline.generate_consent_with_status(_payload("홍길동"), mode="structured"))
+
+    assert len(prompts) == 1 and prompts[0][1] == {"response_format": {"type": "json_object"}}
+    assert sorted(calls) == ["estimated_duration", "mortality_risk"]
+    assert consents.mortality_risk == "mortality_risk 섹션별"
+    assert consents.surgery_method_content.estimated_duration == "estimated_duration 섹션별"
+    assert consents.emergency_measures == "emergency_measures 구조화"
+
+
+def test_fast_profile_skips_keyword_extraction_and_is_reported(monkeypatch):
+    keyword_calls = []
+    seen_k = []
+
+    async def fake_generate_rag_response(processed_payload, task_name, tried_models=None):
+        seen_k.append(processed_payload.profile.k)
+        return f"{task_name} 설명", []
+
+    _patch_preprocessing(monkeypatch)
+    monkeypatch.setattr(pipeline, "get_key_word_list_from_text", lambda text, **kwargs: keyword_calls.append(text) or [])
+    monkeypatch.setattr(pipeline, "generate_rag_response", fake_generate_rag_response)
+    get_consent_cache().clear()
+    get_section_cache().clear()
+
+    payload = _payload("홍길동", profile="fast")
+    out = asyncio.run(create_consent(payload))
+
+    assert out.profile == "fast"
+    assert keyword_calls == []
+    assert set(seen_k) == {5}
+    # 프로필이 다르면 다른 캐시 키
+    assert pipeline.consent_request_fingerprint(payload) != pipeline.consent_request_fingerprint(_payload("홍길동"))
+
+
+def test_regenerate_replaces_only_requested_sections(monkeypatch):
+    calls = []
+
+    async def fake_generate_rag_response(processed_payload, task_name, tried_models=None):
+        calls.append(task_name)
+        allergy = processed_payload.payload.special_conditions.allergy
+        return f"{task_name} 설명 ({allergy})", []
+
+    _patch_preprocessing(monkeypatch)
+    monkeypatch.setattr(pipeline, "generate_rag_response", fake_generate_rag_response)
+    get_consent_cache().clear()
+    get_section_cache().clear()
+
+    original = asyncio.run(create_consent(_payload("홍길동")))
+    changed = _payload("홍길동", special_conditions=SpecialCondition(allergy="페니실린"))
+    body = ConsentRegenerateIn(
+        payload=changed, consents=original.consents, references=original.references,
+        sections=["possible_complications_sequelae"],
+    )
+    out = asyncio.run(regenerate_consent(body))
+
+    assert calls[11:] == ["possible_complications_sequelae"]
+    assert "페니실린" in out.consents.possible_complications_sequelae
+    # 요청하지 않은 섹션은 기존 내용 유지
+    assert out.consents.prognosis_without_surgery == original.consents.prognosis_without_surgery
+    assert out.consents.surgery_method_content.overall_description == original.consents.surgery_method_content.overall_description
+    assert out.degraded_sections == {}
@@ -0,0 +1,80 @@
+import asyncio
+from datetime import date
+
+from surgiform.api.models.consent import PublicConsentGenerateIn
+from surgiform.core.consent import retrieval
+
+
+def _payload():
+    return PublicConsentGenerateIn(
+        surgery_name="복강경 담낭절제술",
+        age=45,
+        gender="M",
+        scheduled_date=date(2025, 1, 15),
+        diagnosis="담석증",
+        surgical_site_mark="RUQ",
+        participants=[{"is_specialist": True, "department": "GS"}],
+        patient_condition="복통",
+        special_conditions={"diabetes": True, "smoking": True},
+    )
+
+
+def _hit(text, score):
+    return {"url": "u", "text": text, "title": "t", "section": "", "entities": [], "score": score}
+
+
+def test_retrieval_plan_searches_each_keyword_once(monkeypatch):
+    calls = []
+
+    async def fake_get_es_responses(queries, k, score_threshold):
+        calls.append(list(queries))
+        return [[_hit("possible complications include bleeding", 2.5), _hit("general outcome", 3.0)] for _ in queries]
+
+    monkeypatch.setattr(retrieval, "get_es_responses", fake_get_es_responses)
+    payload = _payload()
+    base_sources = retrieval.base_keyword_sources(payload)
+    base_keywords = {keyword for keyword, _ in base_sources}
+    extracted_sources = retrieval.extracted_keyword_sources(["pain", "diabetes"], [])
+
+    # build_consent_dag의 retrieval_base → retrieval_extracted → retrieval_plan 순서
+    async def run():
+        base_plan = await retrieval.RetrievalPlan.search(payload, "cholelithiasis", "laparoscopic cholecystectomy", base_sources)
+        extracted_plan = await retrieval.RetrievalPlan.search(
+            payload, "cholelithiasis", "laparoscopic cholecystectomy",
+            [source for source in extracted_sources if source[0] not in base_keywords],
+        )
+        plan = retrieval.RetrievalPlan.merge([base_plan, extracted_plan])
+        plan.attribute(extracted_sources)
+        return plan
+
+    plan = asyncio.run(run())
+
+    # "diabetes"는 특이사항과 키워드 추출 결과에 모두 있지만 한 번만 검색 (+ 수술 기본 쿼리)
+    queries = [query for call in calls for query in call]
+    assert len(queries) == len(set(queries)) == 7
+    assert calls[1] == ["cholelithiasis laparoscopic cholecystectomy pain"]
+    assert [hit["text"] for hit in plan.shared_hits(k=1)] == ["possible complications include bleeding"]
+    # 수술 정보만 쓰는 섹션은 환자 키워드 검색 결과를 쓰지 않음
+    assert len(plan.hits_for_section("estimated_duration", k=1, fields=("surgery_name", "diagnosis"))) == 1
+    # 키워드 추출에서도 나온 "diabetes"는 patient_condition을 쓰는 섹션에도 포함
+    assert "diabetes" in plan.section_keywords(("surgery_name", "patient_condition"))
+    top = plan.hits_for_section("possible_complications_sequelae", k=1)[0][0]
+    assert top["text"] == "possible complications include bleeding"
+
+
+def test_hybrid_search_fuses_bm25_and_knn(monkeypatch):
+    async def fake_get_es_responses(queries, k, score_threshold):
+        return [[{**_hit("bm25 only", 9.0), "id": "a"}, {**_hit("both", 3.0), "id": "b"}] for _ in queries]
+
+    async def fake_get_knn_responses(vectors, k):
+        return [[{**_hit("both", 0.9), "id": "b"}] if vector else [] for vector in vectors]
+
+    monkeypatch.setattr(retrieval, "get_es_responses", fake_get_es_responses)
+    monkeypatch.setattr(retrieval, "get_knn_responses", fake_get_knn_responses)
+    monkeypatch.setattr(retrieval, "get_query_embeddings", lambda queries: [[0.1] if query == "q1" else None for query in queries])
+
+    results = asyncio.run(retrieval.hybrid_search(["q1", "q2"], k=10))
+
+    # 양쪽에 모두 나온 문장이 RRF로 먼저 오고, 임베딩이 없으면 BM25 순서 유지
+    assert [hit["text"] for hit in results[0]] == ["both", "bm25 only"]
+    assert [hit["text"] for hit in results[1]] == ["bm25 only", "both"]
@@ -0,0 +1,98 @@
+import asyncio
+
+from surgiform.core.ingest.uptodate import run_es
+
+
+def _hit(text, score):
+    return {
+        "_id": text,
+        "_score": score,
+        "_source": {
+            "document_url": f"https://example.com/{text}",
+            "text": text,
+            "document_title": "title",
+            "section": "section",
+            "entities": [],
+        },
+    }
+
+
+class FakeAsyncES:
+    def __init__(self):
+        self.calls = []
+
+    async def msearch(self, searches):
+        self.calls.append(searches)
+        responses = []
+        for body in searches[1::2]:
+            query = body["query"]["multi_match"]["query"]
+            if query == "broken":
+                responses.append({"error": {"type": "search_phase_execution_exception"}})
+            else:
+                responses.append({"hits": {"hits": [_hit(f"{query}-a", 5), _hit(f"{query}-b", 0.5)]}})
+        return {"responses": responses}
+
+
+def test_get_es_responses_keeps_order_and_filters(monkeypatch):
+    fake = FakeAsyncES()
+    monkeypatch.setattr(run_es, "_es_client", fake)
+    run_es.get_retrieval_cache().clear()
+
+    results = asyncio.run(run_es.get_es_responses(["q1", "broken", "q2"], k=10, score_threshold=1))
+
+    assert len(fake.calls) == 1
+    assert [[hit["text"] for hit in result] for result in results] == [["q1-a"], [], ["q2-a"]]
+
+
+def test_get_es_responses_serves_repeated_queries_from_cache(monkeypatch):
+    fake = FakeAsyncES()
+    monkeypatch.setattr(run_es, "_es_client", fake)
+    run_es.get_retrieval_cache().clear()
+
+    asyncio.run(run_es.get_es_responses(["cached", "broken"], k=10, score_threshold=1))
+    results = asyncio.run(run_es.get_es_responses(["cached", "broken", "new"], k=10, score_threshold=1))
+
+    # 오류가 난 쿼리는 캐시하지 않으므로 다시 검색
+    assert [body["query"]["multi_match"]["query"] for body in fake.calls[1][1::2]] == ["broken", "new"]
+    assert [hit["text"] for hit in results[0]] == ["cached-a"]
+
+
+def test_get_knn_responses_uses_single_msearch(monkeypatch):
+    calls = []
+
+    class FakeKnnES:
+        async def msearch(self, searches):
+            calls.append(searches)
+            return {"responses": [{"hits": {"hits": [_hit(f"knn-{body['knn']['query_vector'][0]}", 0.9)]}} for body in searches[1::2]]}
+
+    monkeypatch.setattr(run_es, "_es_client", FakeKnnES())
+
+    results = asyncio.run(run_es.get_knn_responses([[1.0], None, [2.0]], k=5))
+
+    # 벡터가 없는 쿼리는 요청에 넣지 않고, 나머지는 _msearch 1회로 검색
+    assert len(calls) == 1
+    assert [body["knn"]["k"] for body in calls[0][1::2]] == [5, 5]
+    assert "embedding" not in calls[0][1]["_source"]
+    assert [[hit["text"] for hit in result] for result in results] == [["knn-1.0"], [], ["knn-2.0"]]
+
+
+def test_keep_alive_node_keeps_library_session_options(monkeypatch):
+    from elastic_transport import NodeConfig
+
+    monkeypatch.setattr(run_es.get_settings(), "es_keep_alive", 42.0)
+
+    async def run():
+        node = run_es.KeepAliveAiohttpNode(NodeConfig("http", "localhost", 9200))
+        node._create_aiohttp_session()
+        connector = node.session.connector
+        try:
+            return connector._keepalive_timeout, connector._cleanup_closed_disabled
+        finally:
+            await node.close()
+
+    keepalive_timeout, cleanup_closed_disabled = asyncio.run(run())
+
+    assert keepalive_timeout == 42.0
+    # 라이브러리 기본 커넥터 옵션(enable_cleanup_closed 등)을 그대로 유지
+    from elastic_transport._node._http_aiohttp import _NEEDS_CLEANUP_CLOSED
+    assert cleanup_closed_disabled is not _NEEDS_CLEANUP_CLOSED